@@ -0,0 +1,145 @@
+from telebot.types import Message, CallbackQuery
+
+from helpers import user_actions
+from helpers.deleting_messages import async_deleting_user_messages
+from helpers.sending_messages import async_send_message
+from database.queries import async_get_users
+from helpers.players_queue import is_free
+from helpers.user_actions import MENU_BUTTONS, DIRECTION_BUTTONS
+from helpers.validators import validate_positions_callback
+from objects.state import async_init
+from threads.async_session import async_check_queue
+from async_loader import async_bot
+
+
+# Логика обработчиков общая с handlers.py и находится в helpers/user_actions.py.
+# Здесь только отправка ответов через AsyncTeleBot.
+
+# |--------------------|
+# | Обработчики команд |
+# |--------------------|
+@async_bot.message_handler(commands=['info'])
+@async_deleting_user_messages(async_bot)
+@async_init(async_bot)
+async def info(message: Message):
+    """
+    Обработчик команды /info.
+
+    :param message: сообщение
+    """
+    reply = user_actions.get_info_reply(message.from_user.id)
+    if reply:
+        await async_send_message(async_bot, message.from_user.id, **reply)
+
+@async_bot.message_handler(commands=['rating'])
+@async_deleting_user_messages(async_bot)
+@async_init(async_bot)
+async def rating_table(message: Message):
+    """
+    Обработчик команды /rating.
+
+    :param message: сообщение
+    """
+    if is_free(message.from_user.id):
+        users = await async_get_users()
+        await async_send_message(async_bot, message.chat.id, **user_actions.get_rating_reply(message.from_user.id, users))
+
+@async_bot.message_handler(commands=['start'])
+@async_deleting_user_messages(async_bot)
+@async_init(async_bot)
+async def start(message: Message):
+    """
+    Обработчик команды /start.
+
+    :param message: сообщение
+    """
+    reply = user_actions.get_start_reply(message.from_user)
+    if reply:
+        await async_send_message(async_bot, message.chat.id, **reply)
+
+@async_bot.message_handler(commands=['play'])
+@async_deleting_user_messages(async_bot)
+@async_init(async_bot)
+async def add_player_to_queue(message: Message):
+    """
+    Обработчик команды /play.
+
+    :param message: сообщение
+    """
+    reply, added = user_actions.join_queue(message.from_user)
+    await async_send_message(async_bot, message.from_user.id, **reply)
+
+    # Проверяем количество игроков в очереди и запускаем сессию с нужным количеством игроков.
+    if added:
+        async_check_queue(async_bot)
+
+@async_bot.message_handler(commands=['leave'])
+@async_deleting_user_messages(async_bot)
+@async_init(async_bot)
+async def leave(message: Message):
+    """
+    Обработчик команды /leave.
+
+    :param message: сообщение
+    """
+    reply = user_actions.leave(message.from_user.id)
+    if reply:
+        await async_send_message(async_bot, message.from_user.id, **reply)
+
+# |-------------------------------|
+# | Обработчики встроенных кнопок |
+# |-------------------------------|
+@async_bot.callback_query_handler(validate_positions_callback)
+async def process_position_buttons(callback: CallbackQuery):
+    """
+    Обработчик кнопок позиций ячеек.
+
+    :param callback: данные о кнопке
+    """
+    user_actions.press_position(callback.from_user.id, callback.data)
+
+@async_bot.callback_query_handler(lambda callback: callback.data in DIRECTION_BUTTONS)
+async def process_direction_buttons(callback: CallbackQuery):
+    """
+    Обработчик кнопок направления.
+
+    :param callback: данные о кнопке
+    """
+    user_actions.press_direction(callback.from_user.id, callback.data)
+
+@async_bot.callback_query_handler(lambda callback: callback.data == 'auto_place')
+async def process_auto_place_button(callback: CallbackQuery):
+    """
+    Обработчик кнопки случайной расстановки кораблей.
+
+    :param callback: данные о кнопке
+    """
+    user_actions.press_auto_place(callback.from_user.id)
+
+# |-------------------|
+# | Обработчик текста |
+# |-------------------|
+@async_bot.message_handler(content_types=['text'])
+@async_deleting_user_messages(async_bot)
+@async_init(async_bot)
+async def game_process(message: Message):
+    """
+    Обработчик обычного сообщения.
+
+    :param message: сообщение
+    """
+    command = MENU_BUTTONS.get(message.text)
+    if command:
+        await MENU_HANDLERS[command](message)
+        return
+
+    user_actions.send_fleet(message.from_user.id, message.text)
+
+
+# Обработчики команд, которые вызывают кнопки главной клавиатуры.
+MENU_HANDLERS = {
+    'play': add_player_to_queue,
+    'leave': leave,
+    'info': info,
+    'rating': rating_table,
+}
@@ -0,0 +1,9 @@
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from loader import TOKEN, API_URL
+
+if API_URL:
+    asyncio_helper.API_URL = API_URL
+
+async_bot = AsyncTeleBot(TOKEN)
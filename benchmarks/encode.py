@@ -0,0 +1,94 @@
+"""
+Сравнение форматов изображения поля.
+
+Запуск из корня проекта:
+    python -m benchmarks.encode --games 5
+"""
+import argparse
+import random
+import time
+
+from PIL import Image
+
+from benchmarks.render import create_players
+from objects.player import Player, get_field_template
+from settings import ROW_LETTERS
+
+# Проверяемые варианты: формат, уровень сжатия, качество JPEG.
+OPTIONS = [
+    ('png', 6, None),
+    ('png', 1, None),
+    ('png-palette', 1, None),
+    ('png-palette', 6, None),
+    ('png-palette', 9, None),
+    ('webp', 0, None),
+    ('webp', 4, None),
+    ('jpeg', None, 90),
+    ('jpeg', None, 75),
+]
+
+
+def collect_boards(games: int, seed: int, palette: bool) -> list[Image.Image]:
+    """
+    Отрисовка полей на протяжении нескольких партий.
+
+    :param games: количество партий
+    :param seed: зерно случайного порядка выстрелов
+    :param palette: рисовать ли поля в режиме с палитрой
+    :return: изображения полей
+    """
+    rnd = random.Random(seed)
+    boards = []
+    for _ in range(games):
+        attacker, defender = create_players()
+        for player in (attacker, defender):
+            player.field_img = get_field_template(ROW_LETTERS, palette)
+
+        positions = [cell.position for row in defender.field for cell in row]
+        rnd.shuffle(positions)
+
+        for position in positions:
+            if defender.get_cell(position).opened:
+                continue
+
+            defender.open_cell(position)
+            boards.append(attacker.render_player_field(True).copy())
+            boards.append(defender.render_player_field(False, position).copy())
+
+    return boards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=5, help='количество партий')
+    parser.add_argument('--seed', type=int, default=0, help='зерно случайного порядка выстрелов')
+    args = parser.parse_args()
+
+    boards = {
+        palette: collect_boards(args.games, args.seed, palette)
+        for palette in (False, True)
+    }
+
+    for image_format, compress_level, jpeg_quality in OPTIONS:
+        kwargs = dict(image_format=image_format)
+        if compress_level is not None:
+            kwargs['compress_level'] = compress_level
+            name = f'{image_format} (сжатие {compress_level})'
+        else:
+            kwargs['jpeg_quality'] = jpeg_quality
+            name = f'{image_format} (качество {jpeg_quality})'
+
+        elapsed = 0.0
+        size = 0
+        format_boards = boards[image_format == 'png-palette']
+        for img in format_boards:
+            start = time.perf_counter()
+            bio = Player.get_io_field_image(img, **kwargs)
+            elapsed += time.perf_counter() - start
+            size += len(bio.getvalue())
+
+        print(f'{name:<26} {elapsed / len(format_boards) * 1000:8.3f} мс/поле  {size / len(format_boards):8.0f} байт/поле')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,582 @@
+"""
+Локальный сервер, который заменяет Telegram Bot API для нагрузочного тестирования.
+
+Сервер реализует методы, которые вызывает бот (getUpdates, setWebhook, sendMessage, sendPhoto, editMessageMedia,
+deleteMessage, deleteMessages, answerCallbackQuery), и умеет добавлять задержку ответа и ответы 429.
+Если бот установил webhook, то обновления отправляются ему запросами, как это делает Telegram.
+Вместе с сервером работают симулируемые пользователи: они пишут /play, расставляют корабли кнопкой
+случайной расстановки и стреляют по закрытым клеткам, отвечая на клавиатуры бота.
+
+Запуск из корня проекта (бот запускается отдельным процессом):
+    python -m benchmarks.fake_telegram --users 200 --games 1 --port 8081
+    TELEGRAM_API_URL=http://127.0.0.1:8081/bot{0}/{1} python main.py
+
+Или сразу вместе с ботом:
+    python -m benchmarks.fake_telegram --users 200 --games 1 --spawn-bot
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.error import URLError
+from urllib.parse import parse_qsl, urlsplit
+from urllib.request import Request, urlopen
+
+from threads.dispatcher import TokenBucket
+
+# Пользователь бота, которого возвращает getMe.
+BOT_USER = {
+    'id': 1,
+    'is_bot': True,
+    'first_name': 'Sea Battle',
+    'username': 'sea_battle_bot',
+}
+
+# Методы, которые отправляют сообщения в чат. Только на них действуют ограничения частоты и ответы 429.
+SENDING_METHODS = ('sendMessage', 'sendPhoto', 'editMessageMedia')
+
+
+class FakeTelegram:
+    """
+    Состояние сервера: очередь обновлений, счетчики запросов и ограничения частоты.
+
+    Attributes:
+        latency (float): задержка каждого ответа (сек.)
+        jitter (float): случайная добавка к задержке (сек.)
+        error_rate (float): доля запросов отправки, на которые сервер отвечает 429
+        retry_after (int): значение retry_after в ответах 429 (сек.)
+        global_bucket (Optional[TokenBucket]): общее ограничение частоты отправки сообщений
+        chat_rate (float): ограничение частоты отправки сообщений в один чат (0 - нет ограничения)
+        chat_buckets (dict[int: TokenBucket]): ограничения частоты отправки по чатам
+        updates (list[dict]): обновления, которые бот еще не подтвердил
+        calls (Counter[str: int]): количество запросов каждого метода
+        rejected (int): количество ответов 429
+        uploaded_bytes (int): сколько байт изображений загрузил бот
+        listeners (list[Callable]): функции, которые вызываются при каждом отправленном ботом сообщении
+            (id чата, сообщение, клавиатура)
+        condition (threading.Condition): условие для длинного опроса getUpdates
+        webhook_url (Optional[str]): адрес, на который отправляются обновления (None - обновления ждут getUpdates)
+        webhook_secret (str): секрет webhook
+        deliveries (queue.Queue): обновления, которые нужно отправить на webhook
+    """
+
+    def __init__(
+            self,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            retry_after: int = 1,
+            global_rate: float = 0.0,
+            chat_rate: float = 0.0,
+            chat_burst: float = 1.0,
+    ):
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.retry_after: int = retry_after
+        self.global_bucket: Optional[TokenBucket] = TokenBucket(global_rate, global_rate) if global_rate else None
+        self.chat_rate: float = chat_rate
+        self.chat_burst: float = chat_burst
+        self.chat_buckets: dict[int: TokenBucket] = dict()
+        self.updates: list[dict] = list()
+        self.calls: Counter[str: int] = Counter()
+        self.rejected: int = 0
+        self.uploaded_bytes: int = 0
+        self.listeners: list[Callable[[int, dict, dict], None]] = list()
+        self.condition: threading.Condition = threading.Condition()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: str = ''
+        self.deliveries: queue.Queue = queue.Queue()
+        self._delivery_threads: int = 0
+
+    def add_update(self, update: dict) -> None:
+        """
+        Добавление обновления, которое бот получит через getUpdates или webhook.
+
+        :param update: обновление без update_id
+        """
+        with self.condition:
+            update['update_id'] = next(self._update_ids)
+            if self.webhook_url:
+                self.deliveries.put(update)
+                return
+
+            self.updates.append(update)
+            self.condition.notify_all()
+
+    def deliver(self) -> None:
+        """
+        Отправка обновлений на webhook одним соединением.
+
+        Если бот не принял обновление, то оно отправляется повторно.
+        """
+        while True:
+            update = self.deliveries.get()
+            request = Request(
+                self.webhook_url,
+                data=json.dumps(update, ensure_ascii=False).encode(),
+                headers={'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': self.webhook_secret},
+            )
+            try:
+                with urlopen(request, timeout=10) as response:
+                    response.read()
+            except (URLError, OSError):
+                time.sleep(0.1)
+                self.deliveries.put(update)
+
+    def create_message_json(self, chat_id: int, **fields) -> dict:
+        return {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            **fields,
+        }
+
+    def is_rate_limited(self, method: str, chat_id: Optional[int]) -> bool:
+        """
+        Нужно ли ответить на запрос ошибкой 429.
+
+        :param method: метод Bot API
+        :param chat_id: id чата
+        :return: bool
+        """
+        if method not in SENDING_METHODS:
+            return False
+
+        if self.error_rate and random.random() < self.error_rate:
+            return True
+
+        now = time.monotonic()
+        with self.condition:
+            buckets = [self.global_bucket] if self.global_bucket else []
+            if self.chat_rate and chat_id is not None:
+                buckets.append(self.chat_buckets.setdefault(chat_id, TokenBucket(self.chat_rate, self.chat_burst)))
+
+            if any(bucket.get_delay(now) > 0 for bucket in buckets):
+                return True
+
+            for bucket in buckets:
+                bucket.take()
+
+        return False
+
+    def handle(self, method: str, params: dict[str: str], uploaded: int) -> tuple[int, dict]:
+        """
+        Обработка запроса к Bot API.
+
+        :param method: метод Bot API
+        :param params: параметры запроса
+        :param uploaded: сколько байт файлов передано в запросе
+        :return: код ответа HTTP и тело ответа
+        """
+        chat_id = int(params['chat_id']) if 'chat_id' in params else None
+        with self.condition:
+            self.calls[method] += 1
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.random() * self.jitter)
+
+        if self.is_rate_limited(method, chat_id):
+            with self.condition:
+                self.rejected += 1
+
+            return 429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }
+
+        with self.condition:
+            self.uploaded_bytes += uploaded
+
+        handler = getattr(self, 'method_' + method, None)
+        result = handler(params, chat_id, uploaded) if handler else True
+        return 200, {'ok': True, 'result': result}
+
+    def method_getMe(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> dict:
+        return BOT_USER
+
+    def method_setWebhook(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> bool:
+        with self.condition:
+            self.webhook_url = params.get('url') or None
+            self.webhook_secret = params.get('secret_token', '')
+
+            # Как и Telegram, открываем к боту не больше max_connections соединений.
+            max_connections = int(params.get('max_connections', 40))
+            for num in range(self._delivery_threads, max_connections):
+                threading.Thread(target=self.deliver, name=f'webhook-delivery-{num}', daemon=True).start()
+
+            self._delivery_threads = max(self._delivery_threads, max_connections)
+
+            # Обновления, которые бот не забрал через getUpdates, тоже отправляются на webhook.
+            if self.webhook_url:
+                for update in self.updates:
+                    self.deliveries.put(update)
+
+                self.updates.clear()
+
+        return True
+
+    def method_deleteWebhook(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> bool:
+        with self.condition:
+            self.webhook_url = None
+
+        return True
+
+    def method_getUpdates(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> list[dict]:
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 100))
+        deadline = time.monotonic() + float(params.get('timeout', 0))
+        with self.condition:
+            # Обновления с номером меньше offset бот уже получил.
+            self.updates = [update for update in self.updates if update['update_id'] >= offset]
+            while not self.updates and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+
+            return self.updates[:limit]
+
+    def method_sendMessage(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> dict:
+        message = self.create_message_json(chat_id, text=params.get('text', ''))
+        self.notify(chat_id, message, params.get('reply_markup'))
+        return message
+
+    def method_sendPhoto(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> dict:
+        message = self.create_message_json(
+            chat_id,
+            photo=self.get_photo_sizes(params.get('photo') if not uploaded else None),
+            caption=params.get('caption', ''),
+        )
+        self.notify(chat_id, message, params.get('reply_markup'))
+        return message
+
+    def method_editMessageMedia(self, params: dict[str: str], chat_id: Optional[int], uploaded: int) -> dict:
+        media = json.loads(params.get('media', '{}'))
+        file_id = media.get('media')
+        message = self.create_message_json(
+            chat_id,
+            photo=self.get_photo_sizes(None if uploaded or str(file_id).startswith('attach://') else file_id),
+            caption=media.get('caption', ''),
+        )
+        message['message_id'] = int(params.get('message_id', message['message_id']))
+        self.notify(chat_id, message, params.get('reply_markup'))
+        return message
+
+    def get_photo_sizes(self, file_id: Optional[str]) -> list[dict]:
+        """
+        Получение размеров фотографии для ответа.
+
+        :param file_id: file_id отправленной фотографии или None, если фотография загружена
+        :return: список размеров
+        """
+        if file_id is None:
+            file_id = f'photo_{next(self._file_ids)}'
+
+        return [{'file_id': file_id, 'file_unique_id': file_id, 'width': 280, 'height': 280}]
+
+    def notify(self, chat_id: int, message: dict, reply_markup: Optional[str]) -> None:
+        """
+        Передача отправленного ботом сообщения слушателям.
+
+        Клавиатура передается отдельно: в ответе Telegram есть только встроенные клавиатуры.
+
+        :param chat_id: id чата
+        :param message: сообщение
+        :param reply_markup: клавиатура в виде JSON
+        """
+        markup = json.loads(reply_markup) if reply_markup else dict()
+        if 'inline_keyboard' in markup:
+            message['reply_markup'] = markup
+
+        for listener in self.listeners:
+            listener(chat_id, message, markup)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов вида /bot<token>/<method>.
+    """
+    protocol_version = 'HTTP/1.1'
+    server: 'FakeTelegramServer'
+
+    def do_GET(self) -> None:
+        self.process()
+
+    def do_POST(self) -> None:
+        self.process()
+
+    def process(self) -> None:
+        url = urlsplit(self.path)
+        method = url.path.rsplit('/', 1)[-1]
+        params = dict(parse_qsl(url.query))
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content_type = self.headers.get('Content-Type', '')
+        uploaded = 0
+        if content_type.startswith('multipart/form-data'):
+            uploaded = len(body)
+        elif body:
+            params.update(parse_qsl(body.decode()))
+
+        status, response = self.server.telegram.handle(method, params, uploaded)
+        data = json.dumps(response, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], telegram: FakeTelegram):
+        super().__init__(address, RequestHandler)
+        self.telegram: FakeTelegram = telegram
+
+
+class ScriptedUsers:
+    """
+    Симулируемые пользователи, которые играют через сервер.
+
+    Каждый пользователь отвечает на клавиатуры бота: нажимает случайную расстановку кораблей
+    и стреляет по случайной закрытой клетке. После игры пользователь снова встает в очередь,
+    пока не сыграет нужное количество игр.
+
+    Attributes:
+        telegram (FakeTelegram): состояние сервера
+        users_count (int): количество пользователей
+        games (int): сколько игр должен сыграть каждый пользователь
+        think_time (float): среднее время, за которое пользователь отвечает на сообщение (сек.)
+        games_left (dict[int: int]): сколько игр осталось сыграть каждому пользователю
+        finished_games (int): количество сыгранных пользователями игр
+        moves (int): количество выстрелов
+        reply_delays (list[float]): время от действия пользователя до следующего сообщения бота в его чат (сек.)
+        actions (list[tuple[float, int, int, str, str]]): куча запланированных действий
+        condition (threading.Condition): условие для ожидания ближайшего действия
+    """
+
+    def __init__(self, telegram: FakeTelegram, users_count: int, games: int, think_time: float, ramp_up: float):
+        self.telegram: FakeTelegram = telegram
+        self.users_count: int = users_count
+        self.games: int = games
+        self.think_time: float = think_time
+        self.ramp_up: float = ramp_up
+        self.games_left: dict[int: int] = dict()
+        self.finished_games: int = 0
+        self.moves: int = 0
+        self.reply_delays: list[float] = list()
+        self.actions: list[tuple[float, int, int, str, str]] = list()
+        self.condition: threading.Condition = threading.Condition()
+        self._action_times: dict[int: float] = dict()
+        self._counter = itertools.count()
+
+        telegram.listeners.append(self.on_bot_message)
+
+    def start(self) -> None:
+        now = time.monotonic()
+        for user_id in range(1000, 1000 + self.users_count):
+            self.games_left[user_id] = self.games
+            self.schedule(user_id, 'message', '/start', now + random.random() * self.ramp_up)
+            self.schedule(user_id, 'message', '/play', now + random.random() * self.ramp_up + 0.5)
+
+        threading.Thread(target=self.work, name='scripted-users', daemon=True).start()
+
+    @property
+    def done(self) -> bool:
+        return not any(self.games_left.values())
+
+    def schedule(self, user_id: int, kind: str, data: str, moment: Optional[float] = None) -> None:
+        """
+        Планирование действия пользователя.
+
+        :param user_id: id пользователя
+        :param kind: вид действия (message - сообщение, callback - нажатие встроенной кнопки)
+        :param data: текст сообщения или данные кнопки
+        :param moment: когда выполнить действие (по умолчанию - через время на раздумье)
+        """
+        if moment is None:
+            moment = time.monotonic() + self.think_time * (0.5 + random.random())
+
+        with self.condition:
+            heapq.heappush(self.actions, (moment, next(self._counter), user_id, kind, data))
+            self.condition.notify()
+
+    def work(self) -> None:
+        while True:
+            with self.condition:
+                while not self.actions or self.actions[0][0] > time.monotonic():
+                    self.condition.wait(self.actions[0][0] - time.monotonic() if self.actions else None)
+
+                _, _, user_id, kind, data = heapq.heappop(self.actions)
+                self._action_times[user_id] = time.monotonic()
+
+            self.telegram.add_update(self.create_update(user_id, kind, data))
+
+    def create_update(self, user_id: int, kind: str, data: str) -> dict:
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'user_{user_id}', 'username': f'user_{user_id}'}
+        message = self.telegram.create_message_json(user_id, text=data)
+        if kind == 'callback':
+            return {
+                'callback_query': {
+                    'id': str(next(self._counter)),
+                    'from': user,
+                    'chat_instance': str(user_id),
+                    'data': data,
+                    'message': message,
+                },
+            }
+
+        message['from'] = user
+        return {'message': message}
+
+    def on_bot_message(self, chat_id: int, message: dict, markup: dict) -> None:
+        """
+        Ответ пользователя на сообщение бота.
+
+        :param chat_id: id чата
+        :param message: сообщение бота
+        :param markup: клавиатура сообщения
+        """
+        with self.condition:
+            action_time = self._action_times.pop(chat_id, None)
+            if action_time is not None:
+                self.reply_delays.append(time.monotonic() - action_time)
+
+        text = message.get('text') or message.get('caption') or ''
+        buttons = [
+            button
+            for row in markup.get('inline_keyboard', [])
+            for button in row
+        ]
+        button_data = {button.get('callback_data') for button in buttons}
+
+        if 'auto_place' in button_data:
+            self.schedule(chat_id, 'callback', 'auto_place')
+
+        elif 'cancel' in button_data:
+            self.schedule(chat_id, 'callback', 'cancel')
+
+        elif buttons:
+            closed_cells = [button['callback_data'] for button in buttons if button.get('text') == '🟦']
+            if closed_cells:
+                with self.condition:
+                    self.moves += 1
+
+                self.schedule(chat_id, 'callback', random.choice(closed_cells))
+
+        if 'Поздравляем' in text or 'Вы проиграли' in text or 'Вы покинули игру' in text:
+            with self.condition:
+                self.finished_games += 1
+                self.games_left[chat_id] = max(0, self.games_left.get(chat_id, 0) - 1)
+                play_again = self.games_left[chat_id] > 0
+
+            if play_again:
+                self.schedule(chat_id, 'message', '/play')
+
+        # Проигравший остается в игре наблюдателем до ее конца, поэтому пробуем встать в очередь позже.
+        elif 'Вы уже в игре' in text and self.games_left.get(chat_id):
+            self.schedule(chat_id, 'message', '/play', time.monotonic() + 1)
+
+
+def get_percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def print_report(telegram: FakeTelegram, users: ScriptedUsers, elapsed: float) -> None:
+    with telegram.condition:
+        calls = dict(telegram.calls)
+        rejected = telegram.rejected
+        uploaded_bytes = telegram.uploaded_bytes
+
+    delays = list(users.reply_delays)
+    sending_calls = sum(calls.get(method, 0) for method in SENDING_METHODS)
+    print(
+        f'[{elapsed:7.1f} с] игр {users.finished_games:6d}  ходов {users.moves:7d}  '
+        f'сообщений бота {sending_calls / elapsed:7.1f}/с  ответов 429 {rejected:5d}  '
+        f'загружено {uploaded_bytes / 1024 / 1024:7.1f} МБ  '
+        f'ответ бота p50 {get_percentile(delays, 50) * 1000:6.0f} мс  p95 {get_percentile(delays, 95) * 1000:6.0f} мс'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='адрес сервера')
+    parser.add_argument('--port', type=int, default=8081, help='порт сервера')
+    parser.add_argument('--users', type=int, default=100, help='количество симулируемых пользователей')
+    parser.add_argument('--games', type=int, default=1, help='сколько игр сыграть каждому пользователю')
+    parser.add_argument('--think', type=float, default=0.3, help='среднее время ответа пользователя (сек.)')
+    parser.add_argument('--ramp-up', type=float, default=5, help='за сколько секунд подключаются все пользователи')
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка каждого ответа сервера (сек.)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='случайная добавка к задержке (сек.)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля запросов отправки с ответом 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after в ответах 429 (сек.)')
+    parser.add_argument('--global-rate', type=float, default=0.0, help='лимит сообщений бота в секунду (0 - нет)')
+    parser.add_argument('--chat-rate', type=float, default=0.0, help='лимит сообщений в чат в секунду (0 - нет)')
+    parser.add_argument('--chat-burst', type=float, default=3, help='сколько сообщений подряд можно отправить в чат')
+    parser.add_argument('--duration', type=float, default=0, help='максимальная длительность теста (сек., 0 - нет)')
+    parser.add_argument('--report', type=float, default=5, help='как часто печатать статистику (сек.)')
+    parser.add_argument('--spawn-bot', action='store_true', help='запустить main.py, настроенный на этот сервер')
+    args = parser.parse_args()
+
+    telegram = FakeTelegram(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        global_rate=args.global_rate,
+        chat_rate=args.chat_rate,
+        chat_burst=args.chat_burst,
+    )
+    server = FakeTelegramServer((args.host, args.port), telegram)
+    threading.Thread(target=server.serve_forever, name='fake-telegram', daemon=True).start()
+
+    api_url = f'http://{args.host}:{args.port}/bot{{0}}/{{1}}'
+    print(f'Сервер запущен: TELEGRAM_API_URL={api_url}')
+
+    bot_process = None
+    if args.spawn_bot:
+        env = {**os.environ, 'TELEGRAM_API_URL': api_url, 'TOKEN': os.getenv('TOKEN') or '1:fake'}
+        bot_process = subprocess.Popen([sys.executable, 'main.py'], env=env)
+
+    users = ScriptedUsers(telegram, args.users, args.games, args.think, args.ramp_up)
+    users.start()
+
+    start = time.monotonic()
+    try:
+        while not users.done and not (args.duration and time.monotonic() - start > args.duration):
+            time.sleep(args.report)
+            print_report(telegram, users, time.monotonic() - start)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print_report(telegram, users, time.monotonic() - start)
+        print('Запросы:', ', '.join(f'{method} {count}' for method, count in sorted(telegram.calls.items())))
+        if bot_process:
+            bot_process.terminate()
+
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Пропускная способность игровой логики: полные игры без Telegram.
+
+Игры идут в HeadlessSession: расстановка кораблей, выстрелы, выбывание игроков и подсчет рейтинга
+выполняются тем же кодом, что и в боте, с отрисовкой и кодированием полей, но без сети, потоков и ожиданий.
+
+Запуск из корня проекта:
+    python -m benchmarks.games --games 100 --players 4
+"""
+import argparse
+import random
+import time
+
+from threads.headless_session import HeadlessBot, PLACEMENT_MODES, play_game
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=100, help='количество игр')
+    parser.add_argument('--players', type=int, default=4, help='количество симулируемых пользователей в игре')
+    parser.add_argument('--ai-players', type=int, default=0, help='количество компьютерных игроков в игре')
+    parser.add_argument('--placement', choices=PLACEMENT_MODES, help='способ расстановки (по умолчанию все по очереди)')
+    parser.add_argument('--seed', type=int, default=0, help='зерно генератора случайных чисел')
+    args = parser.parse_args()
+
+    # Прогрев: шрифт, пустое поле и изображения ячеек рисуются один раз за процесс.
+    play_game(HeadlessBot(), args.players, args.ai_players, random.Random(args.seed), args.placement)
+
+    bot = HeadlessBot()
+    rnd = random.Random(args.seed)
+    ratings = dict()
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        session = play_game(bot, args.players, args.ai_players, rnd, args.placement, ratings)
+        moves += session.moves_count
+
+    elapsed = time.perf_counter() - start
+
+    print(f'игр в секунду          {args.games / elapsed:10.1f}')
+    print(f'ходов в секунду        {moves / elapsed:10.1f}')
+    print(f'время хода             {elapsed / moves * 1000:10.3f} мс (вместе с расстановкой и итогами)')
+    print(f'ходов за игру          {moves / args.games:10.1f}')
+    print(f'запросов за игру       {bot.total_calls / args.games:10.1f}')
+    print(f'загрузок фото за игру  {bot.uploads / args.games:10.1f}')
+    for method, count in sorted(bot.calls.items()):
+        print(f'  {method:<21}{count / args.games:10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Измерение памяти, которую занимают пользователи и игровые сессии.
+
+Память объектов Python измеряется с помощью tracemalloc,
+а память изображений Pillow (нарисованные виды полей) считается отдельно по их размерам.
+
+Запуск из корня проекта:
+    python -m benchmarks.memory --users 10000 --sessions 200
+
+С флагом --check скрипт завершается с ошибкой, если сессия занимает больше допустимого
+(MAX_SESSION_BYTES и MAX_SESSION_IMAGES_BYTES). Те же пределы проверяет tests/test_memory.py.
+"""
+import argparse
+import random
+import tracemalloc
+
+from PIL import Image
+from telebot.types import User
+
+import settings
+from benchmarks.render import LAYOUT
+from objects.state import State
+from settings import SHIPS, STATES
+from threads.session import SyncSession
+
+# Допустимая память одной сессии: объекты Python и изображения полей (байт).
+# Сейчас сессия на 4 игрока занимает около 110 КБ объектов и 630 КБ изображений.
+MAX_SESSION_BYTES = 256 * 1024
+MAX_SESSION_IMAGES_BYTES = 1024 * 1024
+
+
+def get_image_size(img: Image.Image) -> int:
+    """
+    Получение размера пикселей изображения.
+
+    :param img: изображение
+    :return: размер (байт)
+    """
+    return img.width * img.height * len(img.getbands())
+
+
+def measure_users(count: int) -> float:
+    """
+    Создание состояний пользователей, которые написали боту, но не играют.
+
+    :param count: количество пользователей
+    :return: память на одного пользователя (байт)
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for user_id in range(count):
+        user = User(user_id, False, f'user_{user_id}')
+        STATES[user_id] = State(None, user, 'main')
+
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / count
+
+
+def play_session(session: SyncSession, rnd: random.Random, shots: int) -> None:
+    """
+    Расстановка кораблей, выстрелы и отрисовка полей всех игроков сессии.
+
+    :param session: сессия
+    :param rnd: генератор случайных чисел
+    :param shots: сколько выстрелов сделать по каждому игроку
+    """
+    session.begin()
+    session.message_pool.clear()
+
+    players = session.players
+    for num, player in enumerate(players):
+        player.opponent = players[(num + 1) % len(players)]
+        for name, (position, direction) in zip(SHIPS, LAYOUT):
+            player.set_ship(position, name, direction)
+
+    for player in players:
+        positions = [cell.position for cell in player.opponent.cells if not cell.opened]
+        for position in rnd.sample(positions, shots):
+            if not player.opponent.get_cell(position).opened:
+                player.open_opponent_cell(position)
+
+        player.draw_player_field(opponent=True)
+        player.draw_player_field()
+
+
+def measure_sessions(count: int, first_user_id: int, shots: int) -> tuple[float, float]:
+    """
+    Создание сессий, в которых идет игра.
+
+    :param count: количество сессий
+    :param first_user_id: id первого игрока
+    :param shots: сколько выстрелов сделать по каждому игроку
+    :return: память объектов Python и память изображений на одну сессию (байт)
+    """
+    rnd = random.Random(0)
+    players_count = int(settings.TOTAL_SESSION_PLAYERS)
+    sessions = []
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for num in range(count):
+        users = []
+        for user_id in range(first_user_id + num * players_count, first_user_id + (num + 1) * players_count):
+            user = User(user_id, False, f'user_{user_id}')
+            STATES[user_id] = State(None, user, 'main')
+            users.append(user)
+
+        session = SyncSession(None, users)
+        play_session(session, rnd, shots)
+        sessions.append(session)
+
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    images_size = sum(
+        get_image_size(img)
+        for session in sessions
+        for player in session.players
+        for img in player.view_images.values()
+    )
+    return used / count, images_size / count
+
+
+def check_session_memory(session_size: float, session_images_size: float) -> list[str]:
+    """
+    Проверка памяти сессии по допустимым пределам.
+
+    :param session_size: память объектов Python на одну сессию (байт)
+    :param session_images_size: память изображений на одну сессию (байт)
+    :return: список ошибок (пустой, если пределы не превышены)
+    """
+    errors = []
+    if session_size > MAX_SESSION_BYTES:
+        errors.append(f'сессия (объекты) занимает {session_size:.0f} байт, допустимо {MAX_SESSION_BYTES}')
+
+    if session_images_size > MAX_SESSION_IMAGES_BYTES:
+        errors.append(
+            f'сессия (изображения) занимает {session_images_size:.0f} байт, допустимо {MAX_SESSION_IMAGES_BYTES}'
+        )
+
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000, help='количество пользователей без игры')
+    parser.add_argument('--sessions', type=int, default=200, help='количество сессий')
+    parser.add_argument('--shots', type=int, default=10, help='сколько выстрелов сделать по каждому игроку')
+    parser.add_argument('--check', action='store_true', help='завершиться с ошибкой, если сессия занимает больше допустимого')
+    args = parser.parse_args()
+
+    user_size = measure_users(args.users)
+    session_size, session_images_size = measure_sessions(args.sessions, args.users, args.shots)
+
+    print(f'пользователь без игры  {user_size:10.0f} байт')
+    print(f'сессия (объекты)       {session_size:10.0f} байт')
+    print(f'сессия (изображения)   {session_images_size:10.0f} байт')
+
+    if args.check:
+        errors = check_session_memory(session_size, session_images_size)
+        for error in errors:
+            print(f'ПРЕВЫШЕНИЕ: {error}')
+
+        if errors:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
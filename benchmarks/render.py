@@ -0,0 +1,130 @@
+"""
+Сравнение способов отрисовки поля.
+
+Запуск из корня проекта:
+    python -m benchmarks.render --games 20
+"""
+import argparse
+import random
+import time
+from typing import Callable
+
+from PIL import Image
+from telebot.types import User
+
+import objects.player
+from objects.player import Player, compose_field
+from settings import SHIPS, ROW_LETTERS
+
+# Расстановка кораблей, по которой идут все партии.
+LAYOUT = [
+    ('A1', 'right'),
+    ('A5', 'right'),
+    ('C1', 'right'),
+    ('C4', 'right'),
+    ('C7', 'bottom'),
+    ('E1', None),
+    ('E3', None),
+]
+
+
+def create_players() -> tuple[Player, Player]:
+    """
+    Создание двух игроков, второй из которых расставил корабли.
+
+    :return: атакующий игрок и игрок с кораблями
+    """
+    attacker = Player(User(1, False, 'attacker'))
+    defender = Player(User(2, False, 'defender'))
+    attacker.opponent = defender
+    defender.opponent = attacker
+
+    for name, (position, direction) in zip(SHIPS, LAYOUT):
+        defender.set_ship(position, name, direction)
+
+    return attacker, defender
+
+
+def draw_full(player: Player, opponent: bool, marked_position: str = None) -> Image.Image:
+    owner = player.opponent if opponent else player
+    owner.view_images.pop(opponent, None)
+    return player.render_player_field(opponent, marked_position)
+
+
+def draw_incremental(player: Player, opponent: bool, marked_position: str = None) -> Image.Image:
+    return player.render_player_field(opponent, marked_position)
+
+
+def tiles_numpy(player: Player, opponent: bool, marked_position: str = None) -> Image.Image:
+    return player.compose_player_field(opponent, marked_position)
+
+
+def tiles_paste(player: Player, opponent: bool, marked_position: str = None) -> Image.Image:
+    return compose_field(ROW_LETTERS, player.get_state_codes(opponent, marked_position))
+
+
+def measure(render: Callable, games: int, seed: int) -> tuple[float, int]:
+    """
+    Отрисовка полей на протяжении нескольких партий.
+
+    После каждого выстрела рисуется вражеское поле для атакующего и свое поле для защищающегося.
+
+    :param render: способ отрисовки
+    :param games: количество партий
+    :param seed: зерно случайного порядка выстрелов
+    :return: общее время отрисовки (сек.) и количество нарисованных полей
+    """
+    rnd = random.Random(seed)
+    elapsed = 0.0
+    boards = 0
+    for _ in range(games):
+        attacker, defender = create_players()
+        positions = [cell.position for row in defender.field for cell in row]
+        rnd.shuffle(positions)
+
+        for position in positions:
+            if defender.get_cell(position).opened:
+                continue
+
+            defender.open_cell(position)
+
+            start = time.perf_counter()
+            render(attacker, True)
+            render(defender, False, position)
+            elapsed += time.perf_counter() - start
+            boards += 2
+
+    return elapsed, boards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=20, help='количество партий для каждого способа')
+    parser.add_argument('--seed', type=int, default=0, help='зерно случайного порядка выстрелов')
+    args = parser.parse_args()
+
+    renderers = [
+        ('draw (все ячейки)', draw_full),
+        ('draw (измененные ячейки)', draw_incremental),
+    ]
+    if objects.player.numpy is not None:
+        renderers.append(('tiles (numpy)', tiles_numpy))
+
+    renderers.append(('tiles (paste)', tiles_paste))
+
+    # Прогрев: шрифт, пустое поле и изображения ячеек рисуются один раз за процесс.
+    for _, render in renderers:
+        measure(render, 1, args.seed)
+
+    numpy_module = objects.player.numpy
+    for name, render in renderers:
+        if render is tiles_paste:
+            objects.player.numpy = None
+
+        elapsed, boards = measure(render, args.games, args.seed)
+        objects.player.numpy = numpy_module
+        print(f'{name:<26} {elapsed / boards * 1000:8.3f} мс/поле  ({boards} полей)')
+
+
+if __name__ == '__main__':
+    main()
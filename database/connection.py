@@ -0,0 +1,71 @@
+import contextlib
+import queue
+import sqlite3
+from typing import Iterator
+
+from settings import DATABASE_PATH, DATABASE_BUSY_TIMEOUT
+
+# Сколько подготовленных запросов хранит каждое соединение (по умолчанию в sqlite3 - 128).
+STATEMENTS_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """
+    Пул постоянных соединений с базой данных.
+
+    Соединения открываются один раз и переиспользуются, поэтому подготовленные запросы
+    остаются в кэше соединения. База работает в режиме WAL: читатели не блокируют запись,
+    а synchronous=NORMAL не вызывает fsync при каждой транзакции.
+
+    Attributes:
+        path (str): путь к файлу базы данных
+        busy_timeout (float): сколько ждать освобождения заблокированной базы (сек.)
+        connections (queue.LifoQueue): свободные соединения
+    """
+
+    def __init__(self, path: str, busy_timeout: float):
+        self.path: str = path
+        self.busy_timeout: float = busy_timeout
+        self.connections: queue.LifoQueue = queue.LifoQueue()
+
+    def create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENTS_CACHE_SIZE,
+        )
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Получение соединения из пула.
+
+        Транзакция фиксируется при выходе из блока with или откатывается при ошибке,
+        после чего соединение возвращается в пул. Если свободных соединений нет, то открывается новое.
+
+        :return: соединение
+        """
+        try:
+            conn = self.connections.get_nowait()
+        except queue.Empty:
+            conn = self.create_connection()
+
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.connections.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+DATABASE = ConnectionPool(DATABASE_PATH, DATABASE_BUSY_TIMEOUT)
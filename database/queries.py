@@ -1,15 +1,15 @@
-import sqlite3
+import asyncio
 
 from telebot.types import User
 
-from settings import DATABASE_PATH
+from database.connection import DATABASE
 
 
 def create_tables() -> None:
     """
     Создание всех необходимых таблиц, если они не созданы.
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with DATABASE.connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS `users`(
@@ -20,60 +20,32 @@ def create_tables() -> None:
         ''')
 
 
-def update_or_add_rating(user: User, rating: int) -> None:
+def add_ratings(changes: list[tuple[User, int]]) -> None:
     """
-    Обновление или добавление рейтинга.
+    Изменение рейтинга нескольких пользователей одной транзакцией.
 
-    :param user: пользователь Telegram
-    :param rating: рейтинг пользователя
-    """
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT *
-        FROM `users`
-        WHERE `id` = ?
-        ''', (user.id,))
-
-        if cursor.fetchone():
-            cursor.execute('''
-            UPDATE `users` SET
-                `rating` = `rating` + ?
-            WHERE `id` == ?
-            ''', (rating, user.id))
-
-        else:
-            cursor.execute('''
-            INSERT INTO `users`(
-                `id`,
-                `username`,
-                `rating`
-            )
-            VALUES (
-                ?,
-                ?,
-                ?
-            )
-            ''', (user.id, user.username or user.first_name, rating))
-
-
-def get_player_rating(user: User) -> int:
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        cursor = conn.cursor()
-
-        cursor.execute('''
-        SELECT `rating`
-        FROM `users`
-        WHERE `id` == ?
-        ''', (user.id,))
+    Пользователи, которых еще нет в таблице, добавляются. Рейтинг не опускается ниже нуля.
 
-        data = cursor.fetchone()
-        if data:
-            rating = data[0]
-        else:
-            rating = None
-
-    return rating
+    :param changes: пользователи и изменения их рейтинга
+    """
+    with DATABASE.connection() as conn:
+        conn.executemany('''
+        INSERT INTO `users`(
+            `id`,
+            `username`,
+            `rating`
+        )
+        VALUES (
+            :id,
+            :username,
+            MAX(:change, 0)
+        )
+        ON CONFLICT(`id`) DO UPDATE SET
+            `rating` = MAX(`rating` + :change, 0)
+        ''', [
+            {'id': user.id, 'username': user.username or user.first_name, 'change': change}
+            for user, change in changes
+        ])
 
 
 def get_users() -> list[tuple[int, int, int]]:
@@ -85,7 +57,7 @@ def get_users() -> list[tuple[int, int, int]]:
     Возвращает id пользователей и их рейтинг в виде списка с кортежами.
     Например, [(1, Sam, 2), (2, dsdaa228, 8), (3, fhie343d, 3)].
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with DATABASE.connection() as conn:
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -97,3 +69,11 @@ def get_users() -> list[tuple[int, int, int]]:
         rating = cursor.fetchall()
 
     return rating
+
+
+async def async_add_ratings(changes: list[tuple[User, int]]) -> None:
+    await asyncio.to_thread(add_ratings, changes)
+
+
+async def async_get_users() -> list[tuple[int, int, int]]:
+    return await asyncio.to_thread(get_users)
@@ -1,13 +1,13 @@
-from telebot import TeleBot
 from telebot.types import Message, CallbackQuery
 
+from helpers import user_actions
 from helpers.deleting_messages import deleting_user_messages
 from helpers.sending_messages import send_message
 from database.queries import get_users
+from helpers.players_queue import is_free
+from helpers.user_actions import MENU_BUTTONS, DIRECTION_BUTTONS
 from helpers.validators import validate_positions_callback
-from objects.state import init, get_state
-from settings import PLAYERS_QUEUE, SHIPS, STATES
-from keyboards.reply.main_keyboard import keyboard_start, keyboard_play
+from objects.state import init
 from threads.session import check_queue
 from loader import bot
 
@@ -24,12 +24,9 @@ def info(message: Message):
 
     :param message: сообщение
     """
-    players_queue_ids = [user.id for user in PLAYERS_QUEUE]
-    user_state = get_state(message.from_user.id)
-    if message.from_user.id not in players_queue_ids and not user_state.in_game:
-        with open('message_text/information.txt', 'r', encoding='utf-8') as f:  # открываем документ
-            contents = f.read()
-            send_message(bot, message.from_user.id, contents, reply_markup=keyboard_start())
+    reply = user_actions.get_info_reply(message.from_user.id)
+    if reply:
+        send_message(bot, message.from_user.id, **reply)
 
 @bot.message_handler(commands=['rating'])
 @deleting_user_messages(bot)
@@ -40,30 +37,8 @@ def rating_table(message: Message):
 
     :param message: сообщение
     """
-    players_queue_ids = [user.id for user in PLAYERS_QUEUE]
-    user_state = get_state(message.from_user.id)
-
-    if message.from_user.id not in players_queue_ids and not user_state.in_game:
-        users_rating = ""
-        current_user_rating = None
-        for num, user in enumerate(get_users(), start=1):
-            user_id, username, rating = user
-            if num <= 10:
-                users_rating += f"{num}. @{username} - {rating}🏆\n"
-
-            if user_id == message.from_user.id:
-                current_user_rating = f"\n<b>{num}. @{username}(вы) - {rating}🏆</b>\n"
-
-        if current_user_rating:
-            users_rating += current_user_rating
-
-        send_message(
-            bot,
-            message.chat.id,
-            text=f"🏵Таблица лидеров🏵\n\n{users_rating}",
-            reply_markup=keyboard_start(),
-            parse_mode="HTML",
-        )
+    if is_free(message.from_user.id):
+        send_message(bot, message.chat.id, **user_actions.get_rating_reply(message.from_user.id, get_users()))
 
 @bot.message_handler(commands=['start'])
 @deleting_user_messages(bot)
@@ -74,16 +49,9 @@ def start(message: Message):
 
     :param message: сообщение
     """
-    players_queue_ids = [user.id for user in PLAYERS_QUEUE]
-    user_state = get_state(message.from_user.id)
-
-    if message.from_user.id not in players_queue_ids and not user_state.in_game:
-        send_message(
-            bot,
-            message.chat.id,
-            text="Привет, {0.first_name}!".format(message.from_user),
-            reply_markup=keyboard_start(),
-        )
+    reply = user_actions.get_start_reply(message.from_user)
+    if reply:
+        send_message(bot, message.chat.id, **reply)
 
 @bot.message_handler(commands=['play'])
 @deleting_user_messages(bot)
@@ -94,33 +62,13 @@ def add_player_to_queue(message: Message):
 
     :param message: сообщение
     """
-    # Получаем все id игроков, которые находятся в очереди.
-    players_queue_ids = [user.id for user in PLAYERS_QUEUE]
-
-    # Достаем состояние пользователя.
-    user_state = get_state(message.from_user.id)
+    reply, added = user_actions.join_queue(message.from_user)
+    send_message(bot, message.from_user.id, **reply)
 
-    # Если пользователь не в очереди и не в игре, то добавляем его очередь.
-    if message.from_user.id not in players_queue_ids and not user_state.in_game:
-        PLAYERS_QUEUE.append(message.from_user)
-        send_message(
-            bot,
-            message.from_user.id,
-            'Идет подбор игроков...',
-            reply_markup=keyboard_play(),
-        )
-
-        # Проверяем количество игроков в очереди и запускаем сессию с нужным количеством игроков.
+    # Проверяем количество игроков в очереди и запускаем сессию с нужным количеством игроков.
+    if added:
         check_queue(bot)
 
-    # Если пользователь в очереди, то уведомляем его об этом.
-    elif message.from_user.id in players_queue_ids:
-        send_message(bot, message.from_user.id, 'Вы уже в очереди.')
-
-    # Если пользователь в игре, то уведомляем его об этом.
-    elif user_state.in_game:
-        send_message(bot, message.from_user.id, 'Вы уже в игре.')
-
 @bot.message_handler(commands=['leave'])
 @deleting_user_messages(bot)
 @init(bot)
@@ -130,24 +78,9 @@ def leave(message: Message):
 
     :param message: сообщение
     """
-    user_state = get_state(message.from_user.id)
-
-    # Если игрок находится в игре, то ставим ему состояние leaving_game.
-    # После этого сессия увидит, что у игрока сменилось состояние и исключит его.
-    if user_state.in_game:
-        user_state.name = 'leaving_game'
-
-    # Если игрок находится в очереди подбора игроков, то удаляем его из очереди.
-    for user in PLAYERS_QUEUE:
-        if message.from_user.id == user.id:
-            PLAYERS_QUEUE.remove(user)
-            send_message(
-                bot,
-                message.from_user.id,
-                'Подбор игроков отменен.',
-                reply_markup=keyboard_start(),
-            )
-            break
+    reply = user_actions.leave(message.from_user.id)
+    if reply:
+        send_message(bot, message.from_user.id, **reply)
 
 # |-------------------------------|
 # | Обработчики встроенных кнопок |
@@ -159,38 +92,25 @@ def process_position_buttons(callback: CallbackQuery):
 
     :param callback: данные о кнопке
     """
-    user_state = get_state(callback.from_user.id)
-    for ship in SHIPS:
-
-        # Обработка позиции при подготовке к игре.
-        if user_state.name == 'setting_ship_position_' + ship:
-            user_state.name = 'check_ship_position_' + ship
-            user_state.message_storage['position'] = callback.data
+    user_actions.press_position(callback.from_user.id, callback.data)
 
-        # Обработка позиции в процессе игры.
-        elif user_state.name == 'making_move':
-            user_state.name = 'check_move'
-            user_state.message_storage['position'] = callback.data
-
-@bot.callback_query_handler(lambda callback: callback.data in ('top', 'right', 'bottom', 'left', 'cancel'))
+@bot.callback_query_handler(lambda callback: callback.data in DIRECTION_BUTTONS)
 def process_direction_buttons(callback: CallbackQuery):
     """
     Обработчик кнопок направления.
 
     :param callback: данные о кнопке
     """
-    user_state = get_state(callback.from_user.id)
-    for ship in SHIPS:
-
-        # Обработка направления при подготовке к игре.
-        if user_state.name == 'setting_ship_direction_' + ship:
+    user_actions.press_direction(callback.from_user.id, callback.data)
 
-            if callback.data == 'cancel':
-                user_state.name = 'cancel_ship_direction_' + ship
-                break
+@bot.callback_query_handler(lambda callback: callback.data == 'auto_place')
+def process_auto_place_button(callback: CallbackQuery):
+    """
+    Обработчик кнопки случайной расстановки кораблей.
 
-            user_state.name = 'check_ship_direction_' + ship
-            user_state.message_storage['direction'] = callback.data
+    :param callback: данные о кнопке
+    """
+    user_actions.press_auto_place(callback.from_user.id)
 
 # |-------------------|
 # | Обработчик текста |
@@ -202,16 +122,23 @@ def game_process(message: Message):
     """
     Обработчик обычного сообщения.
 
+    Кнопки главной клавиатуры вызывают свои команды. Во время расстановки кораблей
+    можно отправить всю расстановку одним сообщением.
+
     :param message: сообщение
     """
-    if message.text == "👥Подбор игроков👥":
-        add_player_to_queue(message)
+    command = MENU_BUTTONS.get(message.text)
+    if command:
+        MENU_HANDLERS[command](message)
+        return
 
-    elif message.text == "Покинуть очередь или игру":
-        leave(message)
+    user_actions.send_fleet(message.from_user.id, message.text)
 
-    elif message.text == "📕Информация📕":
-        info(message)
 
-    elif message.text == "🏆Рейтинг🏆":
-        rating_table(message)
+# Обработчики команд, которые вызывают кнопки главной клавиатуры.
+MENU_HANDLERS = {
+    'play': add_player_to_queue,
+    'leave': leave,
+    'info': info,
+    'rating': rating_table,
+}
@@ -1,10 +1,13 @@
 import functools
-from typing import Callable
+from typing import Callable, TYPE_CHECKING
 
 from telebot import TeleBot
 from telebot.apihelper import ApiTelegramException
 from telebot.types import Message
 
+if TYPE_CHECKING:
+    from telebot.async_telebot import AsyncTeleBot
+
 
 def delete_user_message(bot: TeleBot, chat_id: int, message_id: int) -> bool:
     try:
@@ -26,3 +29,28 @@ def deleting_user_messages(bot: TeleBot) -> Callable:
         return decorator
 
     return preparatory_decorator
+
+
+async def async_delete_user_message(bot: 'AsyncTeleBot', chat_id: int, message_id: int) -> bool:
+    # Асинхронный бот возбуждает свой класс ошибки, а его модуль требует aiohttp.
+    from telebot.asyncio_helper import ApiTelegramException as AsyncApiTelegramException
+
+    try:
+        await bot.delete_message(chat_id, message_id)
+    except AsyncApiTelegramException as exc:
+        return False
+
+    return True
+
+
+def async_deleting_user_messages(bot: 'AsyncTeleBot') -> Callable:
+    def preparatory_decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def decorator(message: Message, *args, **kwargs):
+            await async_delete_user_message(bot, message.from_user.id, message.id)
+            result = await func(message, *args, **kwargs)
+            return result
+
+        return decorator
+
+    return preparatory_decorator
@@ -0,0 +1,145 @@
+import re
+from typing import Optional
+
+from objects.bitboard import (
+    CELL_MASKS,
+    COLS_COUNT,
+    DIRECTION_STEPS,
+    POSITION_INDEXES,
+    get_area_mask,
+    get_ship_indexes,
+)
+from objects.exceptions import ShipNearbyError
+from objects.player import Player
+from settings import SHIPS
+
+# Буквы направлений в записи расстановки.
+DIRECTION_LETTERS = {
+    'r': 'right',
+    'l': 'left',
+    't': 'top',
+    'b': 'bottom',
+}
+
+# Смещения номера ячейки для каждого направления (обратная таблица для экспорта).
+INDEX_STEP_LETTERS = {
+    1: 'r',
+    -1: 'l',
+    -COLS_COUNT: 't',
+    COLS_COUNT: 'b',
+}
+
+# Запись одного корабля: позиция и необязательная буква направления, например A1r.
+SHIP_NOTATION_PATTERN = re.compile(r'([a-hA-H][1-8])([rltbRLTB]?)')
+
+
+def parse_fleet(text: str) -> tuple[list[tuple[str, str, Optional[str]]], list[str]]:
+    """
+    Разбор записи расстановки кораблей.
+
+    Запись состоит из позиций кораблей в порядке SHIPS через пробел или запятую.
+    После позиции корабля из нескольких ячеек указывается направление: r, l, t или b.
+    Например: A1r A5r C1r C4r C7b E1 E3.
+
+    :param text: запись расстановки
+    :return: список из названия корабля, позиции и направления, а также список ошибок
+    """
+    tokens = [token for token in re.split(r'[\s,;]+', text.strip()) if token]
+    placements = []
+    errors = []
+
+    if len(tokens) != len(SHIPS):
+        errors.append(f'Нужно указать {len(SHIPS)} кораблей, а указано {len(tokens)}.')
+
+    for token, name in zip(tokens, SHIPS):
+        match = SHIP_NOTATION_PATTERN.fullmatch(token)
+        if not match:
+            errors.append(f'{token}: неверная запись корабля.')
+            continue
+
+        position, direction_letter = match.groups()
+        direction = DIRECTION_LETTERS.get(direction_letter.lower())
+        if int(name[-1]) > 1 and not direction:
+            errors.append(f'{token}: для {name[-1]} размерного корабля нужно указать направление.')
+            continue
+
+        placements.append((name, position.upper(), direction))
+
+    return placements, errors
+
+
+def validate_fleet(placements: list[tuple[str, str, Optional[str]]]) -> list[str]:
+    """
+    Проверка расстановки кораблей на пустом поле.
+
+    Корабли ставятся на битовое поле, поэтому поле игрока не меняется и не нужно создавать отдельного игрока.
+
+    :param placements: список из названия корабля, позиции и направления
+    :return: список ошибок
+    """
+    ship_mask = 0
+    errors = []
+    for name, position, direction in placements:
+        ship_size = int(name[-1])
+        if ship_size > 1 and direction not in DIRECTION_STEPS:
+            errors.append(f'{position}: Передано неверное направление.')
+            continue
+
+        index = POSITION_INDEXES.get(position)
+        indexes = get_ship_indexes(index, ship_size, direction) if index is not None else None
+        if indexes is None:
+            errors.append(f'{position}: корабль выходит за пределы поля.')
+            continue
+
+        mask = sum(CELL_MASKS[ship_index] for ship_index in indexes)
+        if ship_mask & get_area_mask(mask):
+            errors.append(f'{position}: {ShipNearbyError()}')
+            continue
+
+        ship_mask |= mask
+
+    return errors
+
+
+def set_fleet(player: Player, text: str) -> list[str]:
+    """
+    Расстановка всех кораблей игрока по записи.
+
+    Корабли ставятся, только если вся запись верна, иначе поле игрока не меняется.
+
+    :param player: игрок
+    :param text: запись расстановки
+    :return: список всех ошибок (пустой, если корабли расставлены)
+    """
+    placements, errors = parse_fleet(text)
+    errors += validate_fleet(placements)
+    if errors:
+        return errors
+
+    player.clear_ships()
+    for name, position, direction in placements:
+        player.set_ship(position, name, direction)
+
+    return errors
+
+
+def format_fleet(player: Player) -> str:
+    """
+    Получение записи расстановки кораблей игрока.
+
+    :param player: игрок
+    :return: запись расстановки
+    """
+    tokens = []
+    for name in SHIPS:
+        cells = player.ships[name]
+        if not cells:
+            continue
+
+        token = cells[0].position
+        if len(cells) > 1:
+            token += INDEX_STEP_LETTERS[cells[1].index - cells[0].index]
+
+        tokens.append(token)
+
+    return ' '.join(tokens)
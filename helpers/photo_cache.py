@@ -0,0 +1,195 @@
+import asyncio
+import collections
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+from telebot.types import Message
+
+import settings
+
+
+class FileIdCache:
+    """
+    Кэш file_id загруженных в Telegram изображений.
+
+    Ключ - хэш содержимого изображения, значение - file_id, который вернул Telegram после первой отправки.
+    Повторная отправка того же изображения передает file_id вместо повторной загрузки.
+
+    Attributes:
+        max_size (int): максимальное количество file_id в кэше
+        file_ids (OrderedDict[str: str]): file_id изображений в порядке последнего использования
+        uploading (dict[str: threading.Event]): изображения, которые загружаются прямо сейчас
+        async_uploading (dict[str: asyncio.Event]): изображения, которые загружаются прямо сейчас в режиме asyncio
+        lock (threading.Lock): блокировка кэша
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size: int = max_size
+        self.file_ids: collections.OrderedDict[str: str] = collections.OrderedDict()
+        self.uploading: dict[str: threading.Event] = dict()
+        self.async_uploading: dict[str: asyncio.Event] = dict()
+        self.lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def get_key(photo: Any) -> Optional[str]:
+        """
+        Получение ключа изображения.
+
+        :param photo: изображение в виде двоичного потока
+        :return: хэш содержимого или None, если изображение уже является file_id или ссылкой
+        """
+        if not hasattr(photo, 'getvalue'):
+            return None
+
+        return hashlib.blake2b(photo.getvalue(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def get_file_id(bot_message: Any) -> Optional[str]:
+        """
+        Получение file_id изображения из отправленного сообщения.
+
+        :param bot_message: сообщение
+        :return: file_id самого большого размера изображения
+        """
+        if isinstance(bot_message, Message) and bot_message.photo:
+            return bot_message.photo[-1].file_id
+
+        return None
+
+    @staticmethod
+    def is_file_id_error(exc: Exception) -> bool:
+        """
+        Отклонил ли Telegram запрос из-за недействительного file_id.
+
+        :param exc: ошибка
+        :return: bool
+        """
+        description = getattr(exc, 'description', None) or ''
+        return getattr(exc, 'error_code', None) == 400 and 'file identifier' in description
+
+    def get(self, key: str) -> Optional[str]:
+        file_id = self.file_ids.get(key)
+        if file_id:
+            self.file_ids.move_to_end(key)
+
+        return file_id
+
+    def set(self, key: str, bot_message: Any) -> None:
+        file_id = self.get_file_id(bot_message)
+        if not file_id:
+            return
+
+        with self.lock:
+            self.file_ids[key] = file_id
+            self.file_ids.move_to_end(key)
+            while len(self.file_ids) > self.max_size:
+                self.file_ids.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self.lock:
+            self.file_ids.pop(key, None)
+
+    def send(self, photo: Any, send_func: Callable[[Any], Any]) -> Any:
+        """
+        Отправка изображения с использованием кэша.
+
+        Если такое же изображение уже загружается в другом потоке, то ждем окончания загрузки
+        и отправляем полученный file_id.
+
+        :param photo: изображение
+        :param send_func: функция, которая отправляет изображение или его file_id
+        :return: результат send_func
+        """
+        key = self.get_key(photo)
+        if key is None:
+            return send_func(photo)
+
+        while True:
+            with self.lock:
+                file_id = self.get(key)
+                if file_id:
+                    break
+
+                uploading = self.uploading.get(key)
+                if uploading is None:
+                    self.uploading[key] = threading.Event()
+                    break
+
+            uploading.wait()
+
+        if file_id:
+            try:
+                return send_func(file_id)
+            except Exception as exc:
+                if not self.is_file_id_error(exc):
+                    raise
+
+                # file_id стал недействительным, поэтому загружаем изображение заново.
+                self.discard(key)
+                photo.seek(0)
+                bot_message = send_func(photo)
+                self.set(key, bot_message)
+                return bot_message
+
+        try:
+            bot_message = send_func(photo)
+            self.set(key, bot_message)
+            return bot_message
+        finally:
+            with self.lock:
+                self.uploading.pop(key).set()
+
+    async def async_send(self, photo: Any, send_func: Callable[[Any], Awaitable[Any]]) -> Any:
+        """
+        Отправка изображения с использованием кэша в режиме asyncio.
+
+        Если такое же изображение уже загружается в другой корутине, то ждем окончания загрузки
+        и отправляем полученный file_id.
+
+        :param photo: изображение
+        :param send_func: корутина, которая отправляет изображение или его file_id
+        :return: результат send_func
+        """
+        key = self.get_key(photo)
+        if key is None:
+            return await send_func(photo)
+
+        while True:
+            with self.lock:
+                file_id = self.get(key)
+
+            if file_id:
+                break
+
+            uploading = self.async_uploading.get(key)
+            if uploading is None:
+                self.async_uploading[key] = asyncio.Event()
+                break
+
+            await uploading.wait()
+
+        if file_id:
+            try:
+                return await send_func(file_id)
+            except Exception as exc:
+                if not self.is_file_id_error(exc):
+                    raise
+
+                # file_id стал недействительным, поэтому загружаем изображение заново.
+                self.discard(key)
+                photo.seek(0)
+                bot_message = await send_func(photo)
+                self.set(key, bot_message)
+                return bot_message
+
+        try:
+            bot_message = await send_func(photo)
+            self.set(key, bot_message)
+            return bot_message
+        finally:
+            self.async_uploading.pop(key).set()
+
+
+# Общий кэш file_id изображений полей.
+PHOTO_CACHE = FileIdCache(settings.PHOTO_CACHE_SIZE)
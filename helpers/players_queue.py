@@ -0,0 +1,67 @@
+import threading
+
+from telebot.types import User
+
+from objects.state import get_state
+from settings import PLAYERS_QUEUE
+
+# Блокировка очереди игроков. Очередь меняют обработчики разных пользователей,
+# поток добавления компьютерных игроков и подбор игроков для сессий, поэтому
+# любое чтение и изменение очереди выполняется под этой блокировкой.
+PLAYERS_QUEUE_LOCK = threading.RLock()
+
+
+def is_in_queue(user_id: int) -> bool:
+    """
+    Проверка, ждет ли пользователь в очереди.
+
+    :param user_id: id пользователя
+    :return: есть ли пользователь в очереди
+    """
+    with PLAYERS_QUEUE_LOCK:
+        return any(user.id == user_id for user in PLAYERS_QUEUE)
+
+
+def is_free(user_id: int) -> bool:
+    """
+    Проверка, что пользователь не в очереди и не в игре.
+
+    :param user_id: id пользователя
+    :return: свободен ли пользователь
+    """
+    with PLAYERS_QUEUE_LOCK:
+        return not is_in_queue(user_id) and not get_state(user_id).in_game
+
+
+def add_to_queue(user: User) -> str:
+    """
+    Добавление пользователя в очередь.
+
+    :param user: пользователь
+    :return: added - пользователь добавлен; in_queue - он уже в очереди; in_game - он уже в игре
+    """
+    with PLAYERS_QUEUE_LOCK:
+        if is_in_queue(user.id):
+            return 'in_queue'
+
+        if get_state(user.id).in_game:
+            return 'in_game'
+
+        PLAYERS_QUEUE.append(user)
+        return 'added'
+
+
+def remove_from_queue(user_id: int) -> bool:
+    """
+    Удаление пользователя из очереди.
+
+    :param user_id: id пользователя
+    :return: был ли пользователь в очереди
+    """
+    with PLAYERS_QUEUE_LOCK:
+        for user in PLAYERS_QUEUE:
+            if user.id == user_id:
+                PLAYERS_QUEUE.remove(user)
+                return True
+
+    return False
@@ -0,0 +1,24 @@
+def get_rating_table(current_user_id: int, users: list[tuple[int, str, int]]) -> str:
+    """
+    Формирование таблицы лидеров.
+
+    В таблицу попадают первые 10 игроков и сам пользователь.
+
+    :param current_user_id: id пользователя, который запросил рейтинг
+    :param users: рейтинг пользователей
+    :return: текст таблицы
+    """
+    users_rating = ""
+    current_user_rating = None
+    for num, user in enumerate(users, start=1):
+        user_id, username, rating = user
+        if num <= 10:
+            users_rating += f"{num}. @{username} - {rating}🏆\n"
+
+        if user_id == current_user_id:
+            current_user_rating = f"\n<b>{num}. @{username}(вы) - {rating}🏆</b>\n"
+
+    if current_user_rating:
+        users_rating += current_user_rating
+
+    return f"🏵Таблица лидеров🏵\n\n{users_rating}"
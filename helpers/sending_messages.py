@@ -1,7 +1,14 @@
+from typing import TYPE_CHECKING, Callable, Optional
+
 from telebot import TeleBot
-from telebot.types import Message
+from telebot.apihelper import ApiTelegramException
+from telebot.types import Message, InputMediaPhoto, InlineKeyboardMarkup
+
+from helpers.photo_cache import PHOTO_CACHE
+from objects.state import State, get_state
 
-from objects.state import get_state
+if TYPE_CHECKING:
+    from telebot.async_telebot import AsyncTeleBot
 
 
 def add_message_to_buffer(user_id: int, bot_message: Message) -> None:
@@ -15,7 +22,185 @@ def send_message(bot: TeleBot, chat_id: int, *args, **kwargs) -> Message:
     return bot_message
 
 
-def send_photo(bot: TeleBot, chat_id: int, *args, **kwargs) -> Message:
-    bot_message = bot.send_photo(chat_id, *args, **kwargs)
+def send_photo(bot: TeleBot, chat_id: int, photo, *args, **kwargs) -> Message:
+    bot_message = PHOTO_CACHE.send(photo, lambda media: bot.send_photo(chat_id, media, *args, **kwargs))
     add_message_to_buffer(chat_id, bot_message)
     return bot_message
+
+
+def send_board(
+        bot: TeleBot,
+        chat_id: int,
+        photo,
+        caption: Optional[str] = None,
+        reply_markup=None,
+        **kwargs,
+) -> Optional[Message]:
+    """
+    Обновление сообщения с полем игрока.
+
+    Если у игрока уже есть сообщение с полем, то оно редактируется, иначе отправляется новое.
+    Сообщение с полем не попадает в буфер, пока идет игра.
+
+    :param bot: бот
+    :param chat_id: id чата
+    :param photo: изображение поля
+    :param caption: подпись
+    :param reply_markup: клавиатура
+    :return: сообщение с полем или None, если поле не изменилось
+    """
+    user_state = get_state(chat_id)
+    if user_state.board_message_id:
+        try:
+            bot_message = PHOTO_CACHE.send(photo, get_edit_board(bot, chat_id, user_state, caption, reply_markup, **kwargs))
+        except ApiTelegramException as exc:
+            if is_board_not_modified(exc):
+                return None
+        else:
+            return get_edited_board_message(bot_message)
+
+    # Если сообщения с полем нет или его больше нельзя редактировать (например, его удалили), то отправляем новое.
+    prepare_new_board(user_state, photo)
+    bot_message = PHOTO_CACHE.send(photo, get_send_board(bot, chat_id, caption, reply_markup, **kwargs))
+    user_state.board_message_id = bot_message.id
+    return bot_message
+
+
+def get_edit_board(bot, chat_id: int, user_state: State, caption: Optional[str], reply_markup, **kwargs) -> Callable:
+    """
+    Получение запроса на редактирование сообщения с полем.
+
+    Подходит и для TeleBot, и для AsyncTeleBot: асинхронный бот вернет корутину.
+
+    :param bot: бот
+    :param chat_id: id чата
+    :param user_state: состояние игрока
+    :param caption: подпись
+    :param reply_markup: клавиатура
+    :return: функция, которая принимает изображение или его file_id
+    """
+    return lambda media: bot.edit_message_media(
+        InputMediaPhoto(media, caption=caption, parse_mode=kwargs.get('parse_mode')),
+        chat_id,
+        user_state.board_message_id,
+        reply_markup=get_board_markup(reply_markup),
+    )
+
+
+def get_send_board(bot, chat_id: int, caption: Optional[str], reply_markup, **kwargs) -> Callable:
+    """
+    Получение запроса на отправку нового сообщения с полем.
+
+    :param bot: бот
+    :param chat_id: id чата
+    :param caption: подпись
+    :param reply_markup: клавиатура
+    :return: функция, которая принимает изображение или его file_id
+    """
+    return lambda media: bot.send_photo(chat_id, media, caption=caption, reply_markup=reply_markup, **kwargs)
+
+
+def get_edited_board_message(bot_message) -> Optional[Message]:
+    """
+    Получение отредактированного сообщения с полем.
+
+    :param bot_message: ответ Telegram на редактирование
+    :return: сообщение или None, если Telegram вернул только True
+    """
+    if isinstance(bot_message, Message):
+        return bot_message
+
+    return None
+
+
+def is_board_not_modified(exc: Exception) -> bool:
+    """
+    Разбор ошибки редактирования сообщения с полем.
+
+    Ошибка 400 означает, что поле не изменилось или сообщение больше нельзя редактировать.
+    Остальные ошибки возбуждаются снова.
+
+    :param exc: ошибка Telegram
+    :return: True, если поле не изменилось; False, если нужно отправить новое сообщение
+    """
+    if exc.error_code != 400:
+        raise exc
+
+    return 'message is not modified' in exc.description
+
+
+def prepare_new_board(user_state: State, photo) -> None:
+    """
+    Подготовка к отправке нового сообщения с полем.
+
+    Старое сообщение с полем переносится в буфер, чтобы оно удалилось вместе с остальными сообщениями,
+    а не осталось в чате навсегда.
+
+    :param user_state: состояние игрока
+    :param photo: изображение поля
+    """
+    user_state.release_board_message()
+    if hasattr(photo, 'seek'):
+        photo.seek(0)
+
+
+def get_board_markup(reply_markup) -> Optional[InlineKeyboardMarkup]:
+    """
+    Получение клавиатуры для редактирования поля.
+
+    При редактировании сообщения можно передать только встроенную клавиатуру.
+
+    :param reply_markup: клавиатура
+    :return: встроенная клавиатура или None
+    """
+    if isinstance(reply_markup, InlineKeyboardMarkup):
+        return reply_markup
+
+    return None
+
+
+async def async_add_message_to_buffer(user_id: int, bot_message: Message) -> None:
+    user_state = get_state(user_id)
+    await user_state.async_add_buffer_message(bot_message)
+
+
+async def async_send_message(bot: 'AsyncTeleBot', chat_id: int, *args, **kwargs) -> Message:
+    bot_message = await bot.send_message(chat_id, *args, **kwargs)
+    await async_add_message_to_buffer(chat_id, bot_message)
+    return bot_message
+
+
+async def async_send_photo(bot: 'AsyncTeleBot', chat_id: int, photo, *args, **kwargs) -> Message:
+    bot_message = await PHOTO_CACHE.async_send(photo, lambda media: bot.send_photo(chat_id, media, *args, **kwargs))
+    await async_add_message_to_buffer(chat_id, bot_message)
+    return bot_message
+
+
+async def async_send_board(
+        bot: 'AsyncTeleBot',
+        chat_id: int,
+        photo,
+        caption: Optional[str] = None,
+        reply_markup=None,
+        **kwargs,
+) -> Optional[Message]:
+    # Асинхронный бот возбуждает свой класс ошибки, а его модуль требует aiohttp.
+    from telebot.asyncio_helper import ApiTelegramException as AsyncApiTelegramException
+
+    user_state = get_state(chat_id)
+    if user_state.board_message_id:
+        try:
+            bot_message = await PHOTO_CACHE.async_send(
+                photo,
+                get_edit_board(bot, chat_id, user_state, caption, reply_markup, **kwargs),
+            )
+        except AsyncApiTelegramException as exc:
+            if is_board_not_modified(exc):
+                return None
+        else:
+            return get_edited_board_message(bot_message)
+
+    prepare_new_board(user_state, photo)
+    bot_message = await PHOTO_CACHE.async_send(photo, get_send_board(bot, chat_id, caption, reply_markup, **kwargs))
+    user_state.board_message_id = bot_message.id
+    return bot_message
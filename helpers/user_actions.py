@@ -0,0 +1,190 @@
+"""
+Действия пользователей, общие для обработчиков telebot (handlers.py) и AsyncTeleBot (async_handlers.py).
+
+Функции меняют состояние пользователя и очередь игроков и возвращают ответ, который нужно отправить.
+Отправку выполняют сами обработчики, поэтому здесь нет ни запросов к Telegram, ни работы с базой данных.
+Ответ - именованные аргументы для send_message (text, reply_markup и т. д.) или None, если отвечать не нужно.
+"""
+from typing import Any, Optional
+
+from telebot.types import User
+
+from helpers.players_queue import add_to_queue, is_free, remove_from_queue
+from helpers.rating_table import get_rating_table
+from keyboards.reply.main_keyboard import keyboard_start, keyboard_play
+from objects.state import get_state
+from settings import SHIPS
+
+# Кнопки главной клавиатуры и команды, которые они вызывают.
+MENU_BUTTONS = {
+    '👥Подбор игроков👥': 'play',
+    'Покинуть очередь или игру': 'leave',
+    '📕Информация📕': 'info',
+    '🏆Рейтинг🏆': 'rating',
+}
+
+# Направления кораблей и отмена выбора направления.
+DIRECTION_BUTTONS = ('top', 'right', 'bottom', 'left', 'cancel')
+
+
+def get_info_reply(user_id: int) -> Optional[dict]:
+    """
+    Ответ на команду /info.
+
+    :param user_id: id пользователя
+    :return: ответ или None, если пользователь в очереди или в игре
+    """
+    if not is_free(user_id):
+        return None
+
+    with open('message_text/information.txt', 'r', encoding='utf-8') as f:  # открываем документ
+        contents = f.read()
+
+    return {'text': contents, 'reply_markup': keyboard_start()}
+
+
+def get_rating_reply(user_id: int, users: list[tuple[int, int, int]]) -> dict[str: Any]:
+    """
+    Ответ на команду /rating.
+
+    :param user_id: id пользователя
+    :param users: рейтинг всех пользователей
+    :return: ответ
+    """
+    return {
+        'text': get_rating_table(user_id, users),
+        'reply_markup': keyboard_start(),
+        'parse_mode': 'HTML',
+    }
+
+
+def get_start_reply(user: User) -> Optional[dict]:
+    """
+    Ответ на команду /start.
+
+    :param user: пользователь
+    :return: ответ или None, если пользователь в очереди или в игре
+    """
+    if not is_free(user.id):
+        return None
+
+    return {'text': 'Привет, {0.first_name}!'.format(user), 'reply_markup': keyboard_start()}
+
+
+def join_queue(user: User) -> tuple[dict[str: Any], bool]:
+    """
+    Добавление пользователя в очередь по команде /play.
+
+    :param user: пользователь
+    :return: ответ и нужно ли проверить очередь (пользователь добавлен в очередь)
+    """
+    # Если пользователь не в очереди и не в игре, то добавляем его очередь.
+    status = add_to_queue(user)
+    if status == 'added':
+        return {'text': 'Идет подбор игроков...', 'reply_markup': keyboard_play()}, True
+
+    # Если пользователь в очереди или в игре, то уведомляем его об этом.
+    if status == 'in_queue':
+        return {'text': 'Вы уже в очереди.'}, False
+
+    return {'text': 'Вы уже в игре.'}, False
+
+
+def leave(user_id: int) -> Optional[dict]:
+    """
+    Выход из игры или из очереди по команде /leave.
+
+    :param user_id: id пользователя
+    :return: ответ или None, если пользователь не был в очереди
+    """
+    user_state = get_state(user_id)
+
+    # Если игрок находится в игре, то ставим ему состояние leaving_game.
+    # После этого сессия увидит, что у игрока сменилось состояние и исключит его.
+    if user_state.in_game:
+        user_state.name = 'leaving_game'
+        user_state.notify_session()
+
+    # Если игрок находится в очереди подбора игроков, то удаляем его из очереди.
+    if remove_from_queue(user_id):
+        return {'text': 'Подбор игроков отменен.', 'reply_markup': keyboard_start()}
+
+    return None
+
+
+def press_position(user_id: int, position: str) -> None:
+    """
+    Обработка кнопки позиции ячейки.
+
+    :param user_id: id пользователя
+    :param position: позиция
+    """
+    user_state = get_state(user_id)
+    for ship in SHIPS:
+
+        # Обработка позиции при подготовке к игре.
+        if user_state.name == 'setting_ship_position_' + ship:
+            user_state.message_storage['position'] = position
+            user_state.name = 'check_ship_position_' + ship
+            user_state.notify_session()
+
+        # Обработка позиции в процессе игры.
+        elif user_state.name == 'making_move':
+            user_state.message_storage['position'] = position
+            user_state.name = 'check_move'
+            user_state.notify_session()
+
+
+def press_direction(user_id: int, direction: str) -> None:
+    """
+    Обработка кнопки направления.
+
+    :param user_id: id пользователя
+    :param direction: направление или cancel
+    """
+    user_state = get_state(user_id)
+    for ship in SHIPS:
+
+        # Обработка направления при подготовке к игре.
+        if user_state.name == 'setting_ship_direction_' + ship:
+
+            if direction == 'cancel':
+                user_state.name = 'cancel_ship_direction_' + ship
+                user_state.notify_session()
+                break
+
+            user_state.message_storage['direction'] = direction
+            user_state.name = 'check_ship_direction_' + ship
+            user_state.notify_session()
+
+
+def press_auto_place(user_id: int) -> None:
+    """
+    Обработка кнопки случайной расстановки кораблей.
+
+    :param user_id: id пользователя
+    """
+    user_state = get_state(user_id)
+
+    # Кнопка работает только пока игрок выбирает позицию корабля.
+    if user_state.name.startswith('setting_ship_position_'):
+        user_state.name = 'auto_placing_ships'
+        user_state.notify_session()
+
+
+def send_fleet(user_id: int, text: str) -> bool:
+    """
+    Передача сессии всей расстановки, отправленной одним сообщением.
+
+    :param user_id: id пользователя
+    :param text: текст сообщения
+    :return: принята ли расстановка (пользователь расставляет корабли)
+    """
+    user_state = get_state(user_id)
+    if not user_state.name.startswith(('setting_ship_position_', 'setting_ship_direction_')):
+        return False
+
+    user_state.message_storage['fleet'] = text
+    user_state.name = 'checking_fleet'
+    user_state.notify_session()
+    return True
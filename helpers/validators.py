@@ -1,6 +1,6 @@
 from telebot.types import CallbackQuery
 
-from settings import ROW_LETTERS, COL_NUMBERS
+from objects.bitboard import POSITION_INDEXES
 
 
 def validate_positions_callback(callback: CallbackQuery) -> bool:
@@ -10,11 +10,4 @@ def validate_positions_callback(callback: CallbackQuery) -> bool:
     :param callback: данные о кнопке
     :return: bool
     """
-    positions = []
-    for row in ROW_LETTERS:
-        for col in COL_NUMBERS:
-            positions.append(row + col)
-
-    if callback.data in positions:
-        return True
-    return False
+    return callback.data in POSITION_INDEXES
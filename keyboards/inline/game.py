@@ -3,12 +3,13 @@ from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from objects.player import Player
 
 
-def get_positions_keyboard(player: Player, opponent: bool = False) -> InlineKeyboardMarkup:
+def get_positions_keyboard(player: Player, opponent: bool = False, auto_place: bool = False) -> InlineKeyboardMarkup:
     """
     Создание клавиатуры для позиций.
 
     :param player: игрок
     :param opponent: отображать ли поле кнопок как вражеское
+    :param auto_place: добавить ли кнопку случайной расстановки кораблей
     :return: клавиатура
     """
     if opponent:
@@ -34,6 +35,9 @@ def get_positions_keyboard(player: Player, opponent: bool = False) -> InlineKeyb
 
         keyboard.row(*row_buttons)
 
+    if auto_place:
+        keyboard.row(InlineKeyboardButton(text='🎲 Расставить случайно', callback_data='auto_place'))
+
     return keyboard
 
 
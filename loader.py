@@ -3,7 +3,17 @@ import os
 import dotenv
 import telebot
 
+from settings import UPDATE_QUEUE_SIZE, UPDATE_WORKERS
+from threads.update_pool import ShardedTeleBot
+
 dotenv.load_dotenv()
 
 TOKEN = os.getenv('TOKEN')
-bot = telebot.TeleBot(TOKEN)
+
+# Адрес Bot API. Можно указать локальный сервер, например benchmarks/fake_telegram.py для нагрузочного тестирования.
+API_URL = os.getenv('TELEGRAM_API_URL')
+if API_URL:
+    telebot.apihelper.API_URL = API_URL
+
+# Обработчики выполняет пул потоков, в котором обновления одного пользователя идут строго по очереди.
+bot = ShardedTeleBot(TOKEN, UPDATE_WORKERS, UPDATE_QUEUE_SIZE)
@@ -1,10 +1,16 @@
+import asyncio
 import logging
 
 import dotenv
 
+import settings
 from database.queries import create_tables
 from loader import bot
-from threads.message_scheduler import start_message_scheduler
+from threads.dispatcher import start_dispatcher
+from threads.message_scheduler import start_message_scheduler, run_async_message_scheduler
+from threads.queue_watcher import start_queue_watcher, run_async_queue_watcher
+from threads.session_scheduler import start_session_scheduler
+from threads.webhook import run_webhook
 
 dotenv.load_dotenv()
 
@@ -13,17 +19,56 @@ logger = logging.getLogger(__name__)
 
 
 def main() -> None:
-    # Подгружаем все файлы с обработчиками.
-    import handlers
-
     # Создаем таблицы, если их еще нет.
     create_tables()
 
+    if settings.RUNTIME == 'asyncio':
+        asyncio.run(async_main())
+        return
+
+    # Подгружаем все файлы с обработчиками.
+    import handlers
+
     # Запускаем планировщик для очистки буфера.
     start_message_scheduler()
 
+    # Запускаем диспетчер исходящих сообщений.
+    start_dispatcher()
+
+    # Запускаем пул потоков для сессий.
+    if settings.RUNTIME == 'pool':
+        start_session_scheduler()
+
+    # Запускаем добавление компьютерных игроков в долго ждущие сессии.
+    start_queue_watcher(bot)
+
+    if settings.UPDATES_MODE == 'webhook':
+        logger.info('Бот запущен в режиме webhook!')
+        run_webhook(bot)
+        return
+
     logger.info('Бот запущен!')
-    bot.infinity_polling()
+    bot.infinity_polling(allowed_updates=settings.ALLOWED_UPDATES)
+
+
+async def async_main() -> None:
+    if settings.UPDATES_MODE == 'webhook':
+        raise ValueError('Режим webhook работает только с RUNTIME threads и pool')
+
+    # Подгружаем все файлы с обработчиками.
+    import async_handlers
+    from async_loader import async_bot
+
+    # Запускаем планировщик для очистки буфера.
+    scheduler_task = asyncio.create_task(run_async_message_scheduler())
+
+    # Запускаем добавление компьютерных игроков в долго ждущие сессии.
+    queue_watcher_task = asyncio.create_task(run_async_queue_watcher(async_bot))
+
+    logger.info('Бот запущен в режиме asyncio!')
+    await async_bot.infinity_polling(allowed_updates=settings.ALLOWED_UPDATES)
+    scheduler_task.cancel()
+    queue_watcher_task.cancel()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,119 @@
+import itertools
+import random
+from collections import Counter
+
+from telebot import TeleBot
+from telebot.types import User
+
+from objects.bitboard import POSITIONS, iter_indices
+from objects.layouts import PLACEMENTS
+from objects.player import Player
+from objects.state import State
+from settings import SHIPS, STATES
+
+# Способы поставить корабль каждого размера: битовое поле корабля и номера его ячеек.
+TARGET_PLACEMENTS = {
+    ship_size: tuple(
+        (ship_mask, tuple(iter_indices(ship_mask)))
+        for ship_mask, _, _, _ in placements
+    )
+    for ship_size, placements in PLACEMENTS.items()
+}
+
+# id компьютерных игроков. Отрицательные, чтобы не пересекаться с id пользователей Telegram.
+AI_USER_IDS = itertools.count(1)
+
+
+class AIPlayer(Player):
+    """
+    Компьютерный игрок.
+
+    Расставляет корабли случайно, а ходы выбирает по плотности вероятности кораблей соперника.
+    Сообщения компьютерному игроку не отправляются.
+
+    Attributes:
+        rnd (random.Random): генератор случайных чисел для расстановки и выбора среди равных ячеек
+    """
+    __slots__ = ('rnd',)
+
+    is_ai = True
+
+    def __init__(self, user: User, rnd: random.Random = random):
+        super().__init__(user)
+        self.rnd: random.Random = rnd
+
+    def choose_position(self) -> str:
+        """
+        Выбор ячейки соперника для хода.
+
+        :return: позиция ячейки
+        """
+        return POSITIONS[get_target_index(self.opponent, self.rnd)]
+
+
+def get_target_index(opponent: Player, rnd: random.Random = random) -> int:
+    """
+    Выбор ячейки соперника, на которой вероятнее всего стоит корабль.
+
+    Для каждой закрытой ячейки считается, сколькими способами ее могут занять оставшиеся корабли.
+    Если есть раненые корабли, то учитываются только способы, которые их продолжают (режим добивания),
+    иначе все способы, не задевающие открытых ячеек (режим поиска).
+    Используется только то, что видит любой игрок: открытые ячейки и потопленные корабли.
+
+    :param opponent: соперник
+    :param rnd: генератор случайных чисел для выбора среди равных ячеек
+    :return: номер бита ячейки
+    """
+    opened_mask = opponent.opened_mask
+    sunk_mask = 0
+    ship_sizes = Counter()
+    for name in SHIPS:
+        if opponent.ship_hits_left[name]:
+            ship_sizes[int(name[-1])] += 1
+        else:
+            sunk_mask |= opponent.ship_masks[name]
+
+    # Раненые корабли - открытые ячейки кораблей, которые еще не потоплены.
+    wounded_mask = opened_mask & opponent.ship_mask & ~sunk_mask
+    blocked_mask = opened_mask & ~wounded_mask
+
+    density = [0] * len(POSITIONS)
+    for ship_size, ships_count in ship_sizes.items():
+        for ship_mask, indices in TARGET_PLACEMENTS[ship_size]:
+            if ship_mask & blocked_mask:
+                continue
+
+            if wounded_mask:
+                # Способ тем вероятнее, чем больше раненых ячеек он продолжает.
+                weight = bin(ship_mask & wounded_mask).count('1')
+                if not weight:
+                    continue
+            else:
+                weight = 1
+
+            for index in indices:
+                density[index] += weight * ships_count
+
+    closed_indices = [index for index in range(len(POSITIONS)) if not opened_mask >> index & 1]
+    best_density = max(density[index] for index in closed_indices)
+    return rnd.choice([index for index in closed_indices if density[index] == best_density])
+
+
+def create_ai_users(bot: TeleBot, count: int) -> list[User]:
+    """
+    Создание пользователей для компьютерных игроков.
+
+    Пользователям сразу создаются состояния, так как сессия хранит ход игры в состояниях.
+
+    :param bot: основной объект бота
+    :param count: количество пользователей
+    :return: список пользователей
+    """
+    users = []
+    for _ in range(count):
+        number = next(AI_USER_IDS)
+        user = User(id=-number, is_bot=True, first_name=f'🤖 Компьютер {number}')
+        STATES[user.id] = State(bot, user, 'main', in_game=True)
+        users.append(user)
+
+    return users
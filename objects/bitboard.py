@@ -0,0 +1,160 @@
+from typing import Iterator, Optional
+
+from settings import ROW_LETTERS, COL_NUMBERS
+
+# Размеры поля.
+ROWS_COUNT = len(ROW_LETTERS)
+COLS_COUNT = len(COL_NUMBERS)
+
+# Битовое поле, в котором отмечены все ячейки.
+FULL_MASK = (1 << (ROWS_COUNT * COLS_COUNT)) - 1
+
+# Битовые поля без первой и без последней колонки.
+# Нужны, чтобы при сдвиге влево или вправо ячейка не переходила на соседнюю строку.
+NOT_FIRST_COL_MASK = sum(1 << (row * COLS_COUNT + col) for row in range(ROWS_COUNT) for col in range(1, COLS_COUNT))
+NOT_LAST_COL_MASK = sum(1 << (row * COLS_COUNT + col) for row in range(ROWS_COUNT) for col in range(COLS_COUNT - 1))
+
+
+def get_index(row: int, col: int) -> int:
+    """
+    Получение номера бита ячейки.
+
+    :param row: индекс строки
+    :param col: индекс колонки
+    :return: номер бита
+    """
+    return row * COLS_COUNT + col
+
+
+def get_area_mask(mask: int) -> int:
+    """
+    Получение битового поля, в котором отмечены переданные ячейки и все ячейки рядом с ними.
+
+    :param mask: битовое поле
+    :return: битовое поле
+    """
+    horizontal = mask | ((mask << 1) & NOT_FIRST_COL_MASK) | ((mask >> 1) & NOT_LAST_COL_MASK)
+    return (horizontal | (horizontal << COLS_COUNT) | (horizontal >> COLS_COUNT)) & FULL_MASK
+
+
+def get_diagonal_mask(index: int) -> int:
+    """
+    Получение битового поля ячеек по диагонали от переданной.
+
+    :param index: номер бита ячейки
+    :return: битовое поле
+    """
+    mask = 0
+    for row_step, col_step in ((-1, -1), (-1, 1), (1, 1), (1, -1)):
+        next_index = get_next_index(index, row_step, col_step)
+        if next_index is not None:
+            mask |= 1 << next_index
+
+    return mask
+
+
+def iter_indices(mask: int) -> Iterator[int]:
+    """
+    Перебор номеров установленных битов.
+
+    :param mask: битовое поле
+    :return: номера битов по возрастанию
+    """
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+def get_next_index(index: int, row_step: int, col_step: int) -> Optional[int]:
+    """
+    Получение номера бита соседней ячейки.
+
+    :param index: номер бита ячейки
+    :param row_step: смещение по строкам
+    :param col_step: смещение по колонкам
+    :return: номер бита или None, если соседняя ячейка за пределами поля
+    """
+    row, col = divmod(index, COLS_COUNT)
+    next_row = row + row_step
+    next_col = col + col_step
+    if 0 <= next_row < ROWS_COUNT and 0 <= next_col < COLS_COUNT:
+        return get_index(next_row, next_col)
+
+    return None
+
+
+# Позиции ячеек по номерам битов.
+POSITIONS = tuple(
+    ROW_LETTERS[row] + COL_NUMBERS[col]
+    for row in range(ROWS_COUNT)
+    for col in range(COLS_COUNT)
+)
+
+# Номера битов по позициям. Буква строки может быть в любом регистре.
+POSITION_INDEXES = {
+    **{position: index for index, position in enumerate(POSITIONS)},
+    **{position.lower(): index for index, position in enumerate(POSITIONS)},
+}
+
+# Смещения (строка, колонка) для каждого направления корабля.
+DIRECTION_STEPS = {
+    'top': (-1, 0),
+    'right': (0, 1),
+    'bottom': (1, 0),
+    'left': (0, -1),
+}
+
+# Номера битов следующих ячеек в каждом направлении.
+NEXT_INDEXES = {
+    direction: tuple(get_next_index(index, row_step, col_step) for index in range(ROWS_COUNT * COLS_COUNT))
+    for direction, (row_step, col_step) in DIRECTION_STEPS.items()
+}
+
+# Номера битов ячеек вокруг каждой ячейки по часовой стрелке, начиная с верхней левой.
+# Если ячейки нет, то вместо номера None.
+NEARBY_INDEXES = tuple(
+    tuple(
+        get_next_index(index, row_step, col_step)
+        for row_step, col_step in ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+    )
+    for index in range(ROWS_COUNT * COLS_COUNT)
+)
+
+# Битовые поля, в которых отмечена только одна ячейка.
+CELL_MASKS = tuple(
+    1 << index
+    for index in range(ROWS_COUNT * COLS_COUNT)
+)
+
+# Ячейки вокруг каждой ячейки (без нее самой).
+NEARBY_MASKS = tuple(
+    get_area_mask(1 << index) & ~(1 << index)
+    for index in range(ROWS_COUNT * COLS_COUNT)
+)
+
+# Ячейки по диагонали от каждой ячейки.
+DIAGONAL_MASKS = tuple(
+    get_diagonal_mask(index)
+    for index in range(ROWS_COUNT * COLS_COUNT)
+)
+
+
+def get_ship_indexes(index: int, ship_size: int, direction: Optional[str]) -> Optional[list[int]]:
+    """
+    Получение номеров битов ячеек корабля.
+
+    :param index: номер бита первой ячейки корабля
+    :param ship_size: количество ячеек корабля
+    :param direction: в какую сторону разместить остальные части корабля
+    :return: номера битов или None, если корабль выходит за пределы поля
+    """
+    indexes = [index]
+    for _ in range(ship_size - 1):
+        index = NEXT_INDEXES[direction][index]
+        if index is None:
+            return None
+
+        indexes.append(index)
+
+    return indexes
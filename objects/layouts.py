@@ -0,0 +1,78 @@
+import random
+from typing import Optional
+
+from objects.bitboard import POSITIONS, NEXT_INDEXES, CELL_MASKS, get_area_mask
+
+# Сколько раз пробовать расставить корабли, прежде чем сдаться.
+LAYOUT_ATTEMPTS = 1000
+
+
+def get_placements(ship_size: int) -> tuple[tuple[int, int, str, Optional[str]], ...]:
+    """
+    Получение всех способов поставить корабль на пустое поле.
+
+    Направления влево и вверх не нужны: такие же корабли получаются направлениями вправо и вниз.
+
+    :param ship_size: количество ячеек у корабля
+    :return: битовое поле корабля, битовое поле корабля с ячейками вокруг, позиция и направление
+    """
+    directions = ('right', 'bottom') if ship_size > 1 else (None,)
+    placements = []
+    for index, position in enumerate(POSITIONS):
+        for direction in directions:
+            ship_mask = CELL_MASKS[index]
+            cur_index = index
+            for _ in range(ship_size - 1):
+                cur_index = NEXT_INDEXES[direction][cur_index]
+                if cur_index is None:
+                    break
+
+                ship_mask |= CELL_MASKS[cur_index]
+            else:
+                placements.append((ship_mask, get_area_mask(ship_mask), position, direction))
+
+    return tuple(placements)
+
+
+# Способы поставить корабль каждого размера.
+PLACEMENTS = {
+    ship_size: get_placements(ship_size)
+    for ship_size in range(1, 5)
+}
+
+
+def generate_layout(
+        names: list[str],
+        blocked_mask: int = 0,
+        rnd: random.Random = random,
+) -> Optional[list[tuple[str, str, Optional[str]]]]:
+    """
+    Генерация случайной расстановки кораблей.
+
+    Корабли ставятся по очереди на случайные свободные места.
+    Если очередной корабль поставить некуда, то расстановка начинается заново.
+
+    :param names: названия кораблей (размер - последняя цифра названия)
+    :param blocked_mask: битовое поле ячеек, на которые нельзя ставить корабли
+    :param rnd: генератор случайных чисел
+    :return: список из названия корабля, позиции и направления или None, если расставить корабли не удалось
+    """
+    for _ in range(LAYOUT_ATTEMPTS):
+        layout = []
+        layout_blocked_mask = blocked_mask
+        for name in names:
+            candidates = [
+                placement
+                for placement in PLACEMENTS[int(name[-1])]
+                if not placement[0] & layout_blocked_mask
+            ]
+            if not candidates:
+                break
+
+            _, area_mask, position, direction = rnd.choice(candidates)
+            layout_blocked_mask |= area_mask
+            layout.append((name, position, direction))
+        else:
+            return layout
+
+    return None
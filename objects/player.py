@@ -1,14 +1,47 @@
+import functools
 import io
-import re
-from typing import Optional
+from typing import Optional, Union
 
-import PIL
-
-from PIL import ImageDraw, Image, ImageFont
+from PIL import ImageDraw, Image, ImageFont, ImageColor
 from telebot.types import User
 
-from settings import SHIPS, ROW_LETTERS, COL_NUMBERS
+from settings import (
+    SHIPS,
+    ROW_LETTERS,
+    BOARD_RENDERER,
+    BOARD_IMAGE_FORMAT,
+    BOARD_COMPRESS_LEVEL,
+    BOARD_JPEG_QUALITY,
+)
+from objects.bitboard import (
+    POSITIONS,
+    POSITION_INDEXES,
+    NEARBY_INDEXES,
+    CELL_MASKS,
+    NEARBY_MASKS,
+    DIAGONAL_MASKS,
+    get_area_mask,
+    get_ship_indexes,
+    iter_indices,
+)
 from objects.exceptions import PositionError, CellOpenedError, ShipNearbyError
+from objects.layouts import generate_layout
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Цвета ячеек по кодам состояния. Код 0 - пустая ячейка.
+CELL_COLORS = (None, 'black', 'green', 'red', 'yellow', 'blue', 'orange')
+
+# Названия файлов изображения поля для каждого формата.
+FIELD_FILE_NAMES = {
+    'png': 'field.png',
+    'png-palette': 'field.png',
+    'webp': 'field.webp',
+    'jpeg': 'field.jpeg',
+}
 
 
 class Player:
@@ -24,43 +57,99 @@ class Player:
         ready (bool): готов ли игрок к игре
         lost (bool): проиграл ли игрок или нет
         field (list[list[Cell]]): поле игрока
-        field_img (Image.Image): нарисованное пустое поле с помощью Pillow
+        cells (list[Cell]): ячейки поля по номерам их битов
+        ship_mask (int): битовое поле ячеек с кораблями (бит номер строка * 8 + колонка)
+        opened_mask (int): битовое поле открытых ячеек
+        ship_masks (dict[str: int]): ключ - название корабля; значение - битовое поле его ячеек
+        cell_ships (list[Optional[str]]): названия кораблей по номерам битов ячеек (None - корабля нет)
+        ship_hits_left (dict[str: int]): ключ - название корабля; значение - сколько его ячеек еще не открыто
+        ship_cells_left (int): сколько ячеек всех кораблей еще не открыто
+        field_img (Image.Image): нарисованное пустое поле с помощью Pillow (общее для всех игроков, только для чтения)
         ships (dict[int: list[Cell]): ключ - название корабля; значение - ячейки этого корабля
+        field_version (int): версия поля, увеличивается при каждом изменении ячеек
+        render_cache (dict[tuple[bool, str]: bytes]): закодированные изображения поля текущей версии
+        render_cache_version (int): версия поля, для которой заполнен render_cache
+        view_images (dict[bool: Image.Image]): нарисованные виды поля (свое - False, вражеское - True)
+        dirty_positions (dict[bool: set[str]]): позиции ячеек, которые нужно перерисовать в каждом виде
     """
+    __slots__ = (
+        'object',
+        'opponent',
+        'ready',
+        'lost',
+        'ship_mask',
+        'opened_mask',
+        'ship_masks',
+        'cell_ships',
+        'ship_hits_left',
+        'ship_cells_left',
+        'cells',
+        'field',
+        'field_img',
+        'ships',
+        'field_version',
+        'render_cache',
+        'render_cache_version',
+        'view_images',
+        'dirty_positions',
+    )
+
+    # Управляется ли игрок компьютером.
+    is_ai = False
+
     def __init__(self, user: User):
         self.object: User = user
         self.opponent: Optional[Player] = None
         self.ready: Optional[bool] = None
         self.lost: bool = False
+        self.ship_mask: int = 0
+        self.opened_mask: int = 0
+        self.ship_masks: dict[str: int] = {
+            name: 0
+            for name in SHIPS
+        }
+        self.cell_ships: list[Optional[str]] = [None] * len(POSITIONS)
+        self.ship_hits_left: dict[str: int] = {
+            name: 0
+            for name in SHIPS
+        }
+        self.ship_cells_left: int = 0
+        self.cells: list[Cell] = [Cell(self, index, position) for index, position in enumerate(POSITIONS)]
         self.field: list[list[Cell]] = self.create_field()
-        self.field_img: Image.Image = self.draw_empty_field()
+        self.field_img: Image.Image = get_field_template(ROW_LETTERS, BOARD_IMAGE_FORMAT == 'png-palette')
         self.ships: dict[str: list['Cell']] = {
             name: []
             for name in SHIPS
         }
+        self.field_version: int = 0
+        self.render_cache: dict[tuple[bool, Optional[str]]: bytes] = dict()
+        self.render_cache_version: int = 0
+        self.view_images: dict[bool: Image.Image] = dict()
+        self.dirty_positions: dict[bool: set[str]] = {False: set(), True: set()}
 
     def __str__(self):
         return self.object.username or self.object.first_name
 
-    @staticmethod
-    def create_field() -> list[list['Cell']]:
+    def create_field(self) -> list[list['Cell']]:
         """
         Генерация поля.
 
         Поле является вложенным списком. Размер 8X8.
+        Ячейки не хранят состояние, а берут его из битовых полей игрока.
 
         :return вложенный список
         """
         return [
-            [Cell(ROW_LETTERS[row] + str(col + 1)) for col in range(8)]
+            self.cells[row * 8:(row + 1) * 8]
             for row in range(8)
         ]
 
     @staticmethod
-    def draw_empty_field() -> Image.Image:
+    def draw_empty_field(row_letters: str = ROW_LETTERS) -> Image.Image:
         """
         Отрисовка пустого поля.
 
+        :param row_letters: буквы строк поля
         :return объект изображения
         """
         # Создание изображения.
@@ -77,10 +166,10 @@ class Player:
         gap = 30.5
         dist_edge_to_symbols = 5
         dist_edge_to_first_symbol = 29
-        font = PIL.ImageFont.truetype('arial', size=18)
+        font = get_font('arial', 18)
 
         # Отрисовка букв и цифр.
-        for num, letter in enumerate(ROW_LETTERS):
+        for num, letter in enumerate(row_letters):
             color = 'black'
 
             pencil.text(
@@ -114,7 +203,7 @@ class Player:
         pencil.rectangle((x0, y0, x1, y1), outline='black')
 
         # Отрисовка горизонтальных и вертикальных линий.
-        for num in range(len(ROW_LETTERS) - 1):
+        for num in range(len(row_letters) - 1):
             num += 1
             horizontal_lines_coords = [
                 (x0, y0 + (num * cell_size)),
@@ -132,78 +221,219 @@ class Player:
 
     def draw_player_field(self, opponent: bool = False, marked_position: str = None) -> io.BytesIO:
         """
-        Отрисовка ячеек поля игрока.
+        Получение изображения поля игрока.
+
+        Закодированное изображение кэшируется у владельца поля до следующего изменения его ячеек,
+        поэтому одно и то же поле за ход рисуется только один раз.
 
         :param opponent: нужно ли рисовать поле как вражеское
         :param marked_position: позиция ячейки, которую надо отметить
         :return двоичный поток
         """
+        owner = self.opponent if opponent else self
+
+        # Если поле изменилось, то старые изображения больше не нужны.
+        if owner.render_cache_version != owner.field_version:
+            owner.render_cache.clear()
+            owner.render_cache_version = owner.field_version
+
+        key = (opponent, marked_position)
+        data = owner.render_cache.get(key)
+        if data is None:
+            if BOARD_RENDERER == 'tiles':
+                field_img = self.compose_player_field(opponent, marked_position)
+            else:
+                field_img = self.render_player_field(opponent, marked_position)
+
+            data = self.get_io_field_image(field_img).getvalue()
+            owner.render_cache[key] = data
+
+        bio = io.BytesIO(data)
+        bio.name = FIELD_FILE_NAMES[BOARD_IMAGE_FORMAT]
+        return bio
+
+    def render_player_field(self, opponent: bool = False, marked_position: str = None) -> Image.Image:
+        """
+        Отрисовка ячеек поля игрока с помощью ImageDraw.
+
+        У владельца поля хранится нарисованное изображение для каждого вида поля (свое и вражеское).
+        При повторной отрисовке перерисовываются только ячейки, изменившиеся с прошлого раза.
+        Возвращаемое изображение изменяется при следующей отрисовке.
+
+        :param opponent: нужно ли рисовать поле как вражеское
+        :param marked_position: позиция ячейки, которую надо отметить
+        :return объект изображения
+        """
         # Рисовать ли поле как вражеское.
+        owner = self.opponent if opponent else self
+        dirty_positions = owner.dirty_positions[opponent]
+
+        # Если вид поля еще не рисовался, то копируем пустое поле и рисуем все ячейки,
+        # иначе перерисовываем только измененные ячейки.
+        field_img = owner.view_images.get(opponent)
+        if field_img is None:
+            field_img = owner.view_images[opponent] = self.field_img.copy()
+            positions = [cell.position for row in owner.field for cell in row]
+            clear = False
+        else:
+            positions = dirty_positions
+            clear = True
+
+        # Создаем объект для рисования
+        pencil = ImageDraw.Draw(field_img)
+        inks = get_cell_inks(ROW_LETTERS, field_img.mode == 'P')
+
+        # Отрисовка ячеек.
+        for position in positions:
+            cell = owner.get_cell(position)
+            self.draw_cell(pencil, position, self.get_cell_color(cell, opponent), clear, inks)
+
+        dirty_positions.clear()
+
+        # Отмеченная ячейка рисуется поверх и перерисовывается при следующей отрисовке.
+        if marked_position and not opponent:
+            self.draw_cell(pencil, marked_position, 'orange', False, inks)
+            dirty_positions.add(marked_position)
+
+        return field_img
+
+    def compose_player_field(self, opponent: bool = False, marked_position: str = None) -> Image.Image:
+        """
+        Сборка изображения поля игрока из готовых изображений ячеек.
+
+        Состояние поля переводится в таблицу кодов 8X8, а каждому коду соответствует
+        заранее нарисованная ячейка. Результат совпадает с render_player_field.
+
+        :param opponent: нужно ли рисовать поле как вражеское
+        :param marked_position: позиция ячейки, которую надо отметить
+        :return объект изображения
+        """
+        return compose_field(ROW_LETTERS, self.get_state_codes(opponent, marked_position), self.field_img.mode == 'P')
+
+    def get_state_codes(self, opponent: bool = False, marked_position: str = None) -> list[list[int]]:
+        """
+        Получение кодов состояния ячеек поля.
+
+        :param opponent: нужно ли рисовать поле как вражеское
+        :param marked_position: позиция ячейки, которую надо отметить
+        :return: вложенный список индексов цветов из CELL_COLORS
+        """
+        owner = self.opponent if opponent else self
+        codes = [
+            [CELL_COLORS.index(self.get_cell_color(cell, opponent)) for cell in row]
+            for row in owner.field
+        ]
+
+        if marked_position and not opponent:
+            row, col = divmod(POSITION_INDEXES[marked_position], 8)
+            codes[row][col] = CELL_COLORS.index('orange')
+
+        return codes
+
+    @staticmethod
+    def get_cell_color(cell: 'Cell', opponent: bool) -> Optional[str]:
+        """
+        Определение цвета ячейки.
+
+        :param cell: ячейка
+        :param opponent: рисуется ли поле как вражеское
+        :return: цвет или None, если ячейка остается пустой (без цвета)
+        """
         if opponent:
-            field = self.opponent.field
+            if cell.opened and cell.is_ship:
+                return 'green'
+
+            elif not cell.opened:
+                return 'black'
         else:
-            field = self.field
+            if cell.opened and cell.is_ship:
+                return 'red'
 
-        # Копируем изображение
-        copied_field = self.field_img.copy()
+            elif cell.is_ship:
+                return 'yellow'
 
-        # Создаем объект для рисования
-        pencil = ImageDraw.Draw(copied_field)
+            elif cell.opened:
+                return 'blue'
+
+        return None
+
+    @staticmethod
+    def draw_cell(
+            pencil: ImageDraw.ImageDraw,
+            position: str,
+            color: Optional[str],
+            clear: bool,
+            inks: Optional[dict] = None,
+    ) -> None:
+        """
+        Отрисовка одной ячейки.
 
-        # x_rectangle, y_rectangle - координаты верхнего левого пикселя поля.
+        :param pencil: объект для рисования
+        :param position: позиция ячейки
+        :param color: цвет ячейки
+        :param clear: нужно ли сначала стереть старый цвет ячейки
+        :param inks: значения цветов для рисования (см. get_cell_inks)
+        """
+        inks = inks or dict()
+
+        # x_rectangle, y_rectangle - координаты верхнего левого пикселя поля;
+        # cell_size - размер ячейки;
+        # cell_x, cell_y - координаты до верхнего левого пикселя ячейки.
         x_rectangle = 20
         y_rectangle = 25
+        cell_size = 30
+        row_num, col_num = divmod(POSITION_INDEXES[position], 8)
+        cell_x = x_rectangle + col_num * cell_size
+        cell_y = y_rectangle + row_num * cell_size
+        rectangle_coords = [
+            (cell_x + 5, cell_y + 5),
+            (cell_x + (cell_size - 5), cell_y + (cell_size - 5)),
+        ]
 
-        # Отрисовка ячеек.
-        for row_num, row in enumerate(field):
-            for col_num, cell in enumerate(row):
-                # cell_size - размер ячейки;
-                # cell_x, cell_y - координаты до верхнего левого пикселя ячейки.
-                cell_size = 30
-                cell_x = x_rectangle + col_num * cell_size
-                cell_y = y_rectangle + row_num * cell_size
-                rectangle_coords = [
-                    (cell_x + 5, cell_y + 5),
-                    (cell_x + (cell_size - 5), cell_y + (cell_size - 5)),
-                ]
-
-                # Определяем какого цвета должна быть ячейка.
-                color = None
-                if opponent:
-                    if cell.opened and cell.is_ship:
-                        color = 'green'
-
-                    elif not cell.opened:
-                        color = 'black'
-                else:
-                    if cell.position == marked_position:
-                        color = 'orange'
-
-                    elif cell.opened and cell.is_ship:
-                        color = 'red'
-
-                    elif cell.is_ship:
-                        color = 'yellow'
-
-                    elif cell.opened:
-                        color = 'blue'
-
-                # Если color = None, то ячейка остается пустой (без цвета)
-                if color:
-                    pencil.rectangle(rectangle_coords, fill=color, width=2)
-
-        return self.get_io_field_image(copied_field)
+        if clear:
+            pencil.rectangle(rectangle_coords, fill=inks.get('white', 'white'), width=2)
+
+        if color:
+            pencil.rectangle(rectangle_coords, fill=inks.get(color, color), width=2)
 
     @staticmethod
-    def get_io_field_image(img: Image.Image) -> io.BytesIO:
+    def get_io_field_image(
+            img: Image.Image,
+            image_format: str = BOARD_IMAGE_FORMAT,
+            compress_level: int = BOARD_COMPRESS_LEVEL,
+            jpeg_quality: int = BOARD_JPEG_QUALITY,
+    ) -> io.BytesIO:
         """
         Получение изображение поля в виде двоичного потока.
 
         :param img: изображение поля
+        :param image_format: формат изображения (ключ FIELD_FILE_NAMES)
+        :param compress_level: уровень сжатия PNG (0-9) или WebP (0-6)
+        :param jpeg_quality: качество JPEG
         """
+        # Если формат неверный, то возбуждаем ошибку.
+        if image_format not in FIELD_FILE_NAMES:
+            raise ValueError('Передан неверный формат изображения.')
+
         bio = io.BytesIO()
-        bio.name = 'field.jpeg'
-        img.save(bio, 'PNG')
+        bio.name = FIELD_FILE_NAMES[image_format]
+
+        if image_format == 'png':
+            img.save(bio, 'PNG', compress_level=compress_level)
+
+        elif image_format == 'png-palette':
+            # Обычно поле уже рисуется с палитрой, поэтому переводить ничего не нужно.
+            if img.mode != 'P':
+                img = convert_to_palette(img)
+
+            img.save(bio, 'PNG', compress_level=compress_level)
+
+        elif image_format == 'webp':
+            img.save(bio, 'WEBP', lossless=True, method=min(compress_level, 6))
+
+        elif image_format == 'jpeg':
+            img.convert('RGB').save(bio, 'JPEG', quality=jpeg_quality)
+
         bio.seek(0)
         return bio
 
@@ -213,14 +443,12 @@ class Player:
 
         :param position: позиция ячейки
         """
-        # Если валидация не прошла, то возбуждаем ошибку PositionError.
-        if not self.validate_position(position):
+        # Если такой позиции нет, то возбуждаем ошибку PositionError.
+        index = POSITION_INDEXES.get(position)
+        if index is None:
             raise PositionError()
 
-        # Получаем индексы из позиции, а затем получаем ячейку по этим индексам.
-        row = ROW_LETTERS.index(position[0].upper())
-        col = int(position[1:]) - 1
-        return self.field[row][col]
+        return self.cells[index]
 
     def set_ship(self, position: str, name: str, direction: Optional[str] = None) -> None:
         """
@@ -241,49 +469,17 @@ class Player:
         # ship_size - количество ячеек у корабля.
         ship_size = int(name[-1])
 
-        # Получаем первую ячейку будущего корабля и сохраняем ее.
-        cell = self.get_cell(position)
-        cells = [cell]
+        # Если у корабля несколько ячеек, то без направления его не поставить.
+        if ship_size > 1 and not direction:
+            raise ValueError('Передано неверное направление.')
 
-        # Определяем остальные ячейки в переданном направлении.
+        # Получаем первую ячейку будущего корабля и определяем остальные ячейки в переданном направлении.
         # Если какая-то ячейка в переданном направлении неверна, то возбуждаем ошибку PositionError.
-        cur_position = cell.position
-        for _ in range(ship_size - 1):
-            ind_cur_row = ROW_LETTERS.index(cur_position[0])
-            ind_cur_col = COL_NUMBERS.index(cur_position[1:])
-
-            if direction == 'top':
-                ind_next_row = ind_cur_row - 1
-                if ind_next_row < 0:
-                    raise PositionError()
-
-                next_position = ROW_LETTERS[ind_next_row] + cur_position[1:]
-
-            elif direction == 'right':
-                ind_next_col = ind_cur_col + 1
-                if ind_next_col > len(COL_NUMBERS) - 1:
-                    raise PositionError()
-
-                next_position = cur_position[0] + COL_NUMBERS[ind_next_col]
-
-            elif direction == 'bottom':
-                ind_next_row = ind_cur_row + 1
-                if ind_next_row > len(ROW_LETTERS) - 1:
-                    raise PositionError()
-
-                next_position = ROW_LETTERS[ind_next_row] + cur_position[1:]
-
-            elif direction == 'left':
-                ind_next_col = ind_cur_col - 1
-                if ind_next_col < 0:
-                    raise PositionError()
-
-                next_position = cur_position[0] + COL_NUMBERS[ind_next_col]
-
-            next_cell = self.get_cell(next_position)
-            cells.append(next_cell)
+        indexes = get_ship_indexes(self.get_cell(position).index, ship_size, direction)
+        if indexes is None:
+            raise PositionError()
 
-            cur_position = next_position
+        cells = [self.cells[index] for index in indexes]
 
         # Если поблизости с полученными ячейками есть корабли, то возбуждаем ошибку ShipNearbyError.
         for cell in cells:
@@ -292,8 +488,32 @@ class Player:
 
         # Устанавливаем корабль на полученные ячейки и сохраняем эти ячейки.
         for cell in cells:
-            cell.is_ship = True
+            self.ship_mask |= cell.mask
+            self.ship_masks[name] |= cell.mask
+            self.cell_ships[cell.index] = name
             self.ships.get(name).append(cell)
+            self.mark_cell_dirty(cell)
+
+        self.ship_hits_left[name] += len(cells)
+        self.ship_cells_left += len(cells)
+        self.field_version += 1
+
+    def clear_ships(self) -> None:
+        """
+        Удаление всех кораблей с поля.
+        """
+        for index in iter_indices(self.ship_mask):
+            self.mark_cell_dirty(self.cells[index])
+
+        self.ship_mask = 0
+        self.cell_ships = [None] * len(POSITIONS)
+        self.ship_cells_left = 0
+        for name in SHIPS:
+            self.ship_masks[name] = 0
+            self.ship_hits_left[name] = 0
+            self.ships[name] = []
+
+        self.field_version += 1
 
     def open_cell(self, position: str) -> bool:
         """
@@ -311,8 +531,13 @@ class Player:
             raise CellOpenedError()
 
         # Открытие переданной ячейки и лишних ячеек неподалеку.
-        cell.opened = True
+        self.opened_mask |= cell.mask
+        if cell.is_ship:
+            self.count_hit(cell)
+
+        self.mark_cell_dirty(cell)
         self.open_unnecessary_cells(cell)
+        self.field_version += 1
 
         # Если у игрока не осталось кораблей, то меняем self.lost на True.
         if self.is_loser():
@@ -330,26 +555,39 @@ class Player:
         if not cell.is_ship:
             return
 
-        # Определяем открыт ли уже корабль или нет.
-        ship_opened = self.ship_opened(cell)
-
         # Если корабль открыт, то можно открыть все ячейки рядом.
         # Если же корабль не открыт, то открываем только клетки по диагонали.
-        if ship_opened:
-            ship_cells = self.get_ship_cells(cell)
-            nearby_ship_cells = set()
-            for cell in ship_cells:
-                nearby_cells = self.get_cells_nearby(cell)
-                nearby_ship_cells.update(nearby_cells)
-
-            for nearby_ship_cell in nearby_ship_cells:
-                if nearby_ship_cell:
-                    nearby_ship_cell.opened = True
+        if self.ship_opened(cell):
+            nearby_mask = get_area_mask(self.get_ship_mask(cell))
         else:
-            cells_nearby = self.get_cells_nearby(cell)
-            for num, nearby_cell in enumerate(cells_nearby):
-                if nearby_cell and (num % 2 == 0 or ship_opened):
-                    nearby_cell.opened = True
+            nearby_mask = DIAGONAL_MASKS[cell.index]
+
+        new_opened_mask = nearby_mask & ~self.opened_mask
+        self.opened_mask |= new_opened_mask
+        for index in iter_indices(new_opened_mask):
+            nearby_cell = self.cells[index]
+            if nearby_cell.is_ship:
+                self.count_hit(nearby_cell)
+
+            self.mark_cell_dirty(nearby_cell)
+
+    def count_hit(self, cell: 'Cell') -> None:
+        """
+        Учет открытой ячейки корабля в счетчиках оставшихся ячеек.
+
+        :param cell: открытая ячейка корабля
+        """
+        self.ship_hits_left[self.cell_ships[cell.index]] -= 1
+        self.ship_cells_left -= 1
+
+    def mark_cell_dirty(self, cell: 'Cell') -> None:
+        """
+        Отметка ячейки для перерисовки во всех видах поля.
+
+        :param cell: измененная ячейка
+        """
+        for dirty_positions in self.dirty_positions.values():
+            dirty_positions.add(cell.position)
 
     def open_opponent_cell(self, position: str) -> bool:
         """
@@ -365,6 +603,19 @@ class Player:
             return self.opponent.open_cell(position)
         return False
 
+    def get_ship_mask(self, cell: 'Cell') -> int:
+        """
+        Получение битового поля корабля по переданной ячейке.
+
+        :param cell: ячейка, по которой определяется корабль
+        :return: битовое поле или 0, если ячейка не является кораблем
+        """
+        name = self.cell_ships[cell.index]
+        if name is None:
+            return 0
+
+        return self.ship_masks[name]
+
     def get_ship_cells(self, cell: 'Cell') -> list['Cell']:
         """
         Получение всех ячеек корабля по переданной ячейки.
@@ -374,11 +625,11 @@ class Player:
         :param cell: ячейка, по которой определяется корабль
         :return: список из ячеек
         """
-        for ship_cells in self.ships.values():
-            if cell in ship_cells:
-                return ship_cells
+        name = self.cell_ships[cell.index]
+        if name is None:
+            return list()
 
-        return list()
+        return self.ships[name]
 
     def get_cells_nearby(self, cell: 'Cell') -> list[Optional['Cell']]:
         """
@@ -387,33 +638,12 @@ class Player:
         :param cell: ячейка, по которой будут находиться все ближайшие ячейки
         :return: список ближайших ячеек
         """
-        # Получение индексов переданной ячейки.
-        ind_row = ROW_LETTERS.index(cell.position[0])
-        ind_col = COL_NUMBERS.index(cell.position[1:])
-
-        # Получение индексов всех ближних ячеек.
-        indices = [
-            (ind_row - 1, ind_col - 1),
-            (ind_row - 1, ind_col),
-            (ind_row - 1, ind_col + 1),
-            (ind_row, ind_col + 1),
-            (ind_row + 1, ind_col + 1),
-            (ind_row + 1, ind_col),
-            (ind_row + 1, ind_col - 1),
-            (ind_row, ind_col - 1),
+        # Если ячейки нет, то сохраняем None в списке, иначе саму ячейку.
+        return [
+            self.cells[index] if index is not None else None
+            for index in NEARBY_INDEXES[cell.index]
         ]
 
-        # Если ячейка неверна, то сохраняем None в списке, иначе саму ячейку.
-        cells_nearby = []
-        for ind_row, ind_col in indices:
-            if 0 <= ind_row <= len(ROW_LETTERS) - 1 and 0 <= ind_col <= len(COL_NUMBERS) - 1:
-                cell = self.field[ind_row][ind_col]
-                cells_nearby.append(cell)
-            else:
-                cells_nearby.append(None)
-
-        return cells_nearby
-
     def ship_opened(self, cell: 'Cell') -> bool:
         """
         Открыт ли полностью корабль.
@@ -421,11 +651,8 @@ class Player:
         :param cell: ячейка, по которой будет определяться ячейка корабля
         :return: bool
         """
-        for cells in self.ships.values():
-            if cell in cells and all(ship_cell.is_ship and ship_cell.opened for ship_cell in cells):
-                return True
-
-        return False
+        name = self.cell_ships[cell.index]
+        return name is not None and self.ship_hits_left[name] == 0
 
     def all_ships_on_field(self) -> bool:
         """
@@ -439,19 +666,34 @@ class Player:
 
         return True
 
+    def set_random_ships(self) -> bool:
+        """
+        Случайная расстановка кораблей, которые еще не установлены.
+
+        Уже установленные корабли остаются на своих местах.
+
+        :return: удалось ли расставить корабли
+        """
+        names = [name for name, cells in self.ships.items() if not cells]
+        layout = generate_layout(names, get_area_mask(self.ship_mask))
+        if layout is None:
+            return False
+
+        for name, position, direction in layout:
+            self.set_ship(position, name, direction)
+
+        return True
+
     @staticmethod
     def validate_position(position: str) -> bool:
         """
         Валидация позиции ячейки.
 
-        Для валидации используется регулярное выражение.
+        Позиция ищется в заранее составленной таблице всех позиций.
 
         :param position: позиция ячейки
         """
-        if not re.fullmatch(r'[a-hA-H][1-8]', position):
-            return False
-
-        return True
+        return position in POSITION_INDEXES
 
     def valid_cell(self, cell: 'Cell') -> bool:
         """
@@ -460,17 +702,8 @@ class Player:
         :param cell: ячейка
         :return: bool
         """
-        # Если на ячейке стоит кораблем, то возвращаем False.
-        if cell.is_ship:
-            return False
-
-        # Если на ближайших ячейках стоит корабль, то возвращаем False.
-        cells_nearby = self.get_cells_nearby(cell)
-        for cell in cells_nearby:
-            if cell and cell.is_ship:
-                return False
-
-        return True
+        # Если на ячейке или на ближайших ячейках стоит корабль, то возвращаем False.
+        return not self.ship_mask & (cell.mask | NEARBY_MASKS[cell.index])
 
     def is_loser(self) -> bool:
         """
@@ -480,25 +713,197 @@ class Player:
 
         :return: bool
         """
-        for row in self.field:
-            for cell in row:
-                if cell.is_ship and not cell.opened:
-                    return False
+        return self.ship_cells_left == 0
 
-        return True
+
+@functools.lru_cache(maxsize=None)
+def get_font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Загрузка шрифта.
+
+    Шрифт загружается с диска один раз за процесс.
+
+    :param name: название шрифта
+    :param size: размер шрифта
+    :return: шрифт
+    """
+    return ImageFont.truetype(name, size=size)
+
+
+@functools.lru_cache(maxsize=None)
+def get_field_template(row_letters: str, palette: bool = False) -> Image.Image:
+    """
+    Получение пустого поля.
+
+    Пустое поле рисуется один раз для каждого размера поля и используется всеми игроками.
+    Изображение нельзя изменять, для отрисовки ячеек нужно делать копию.
+
+    :param row_letters: буквы строк поля
+    :param palette: нужно ли перевести поле в режим с палитрой
+    :return: объект изображения
+    """
+    img = Player.draw_empty_field(row_letters)
+    if palette:
+        img = convert_to_palette(img)
+
+    return img
+
+
+@functools.lru_cache(maxsize=None)
+def get_cell_inks(row_letters: str, palette: bool = False) -> dict[str: Union[str, int]]:
+    """
+    Получение значений цветов ячеек для рисования.
+
+    Для поля с палитрой это номера цветов в палитре пустого поля.
+    Иначе ImageDraw ищет название цвета в палитре и строит для каждой копии поля свою таблицу цветов.
+
+    :param row_letters: буквы строк поля
+    :param palette: в режиме ли с палитрой пустое поле
+    :return: ключ - название цвета; значение - цвет для ImageDraw
+    """
+    colors = CELL_COLORS[1:] + ('white',)
+    if not palette:
+        return {color: color for color in colors}
+
+    template = get_field_template(row_letters, palette)
+    return {color: template.palette.getcolor(ImageColor.getrgb(color), template) for color in colors}
+
+
+def convert_to_palette(img: Image.Image) -> Image.Image:
+    """
+    Перевод изображения поля в режим с палитрой без потери цветов.
+
+    В палитру сразу добавляются цвета ячеек, чтобы при рисовании ячеек палитра не менялась.
+
+    :param img: изображение поля
+    :return: изображение в режиме P
+    """
+    palette_img = img.convert('RGB').convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
+    for color in CELL_COLORS[1:]:
+        palette_img.palette.getcolor(ImageColor.getrgb(color), palette_img)
+
+    return palette_img
+
+
+@functools.lru_cache(maxsize=None)
+def get_cell_tiles(row_letters: str, palette: bool = False) -> tuple[Image.Image, ...]:
+    """
+    Получение изображений ячейки для каждого кода состояния.
+
+    Изображение ячейки - квадрат пустого поля размером с ячейку вместе с ее левой и верхней линиями,
+    поэтому поле можно собрать, просто положив ячейки рядом.
+
+    :param row_letters: буквы строк поля
+    :param palette: в режиме ли с палитрой пустое поле
+    :return: изображения ячеек в порядке CELL_COLORS
+    """
+    # x_rectangle, y_rectangle - координаты верхнего левого пикселя поля;
+    # cell_size - размер ячейки.
+    x_rectangle = 20
+    y_rectangle = 25
+    cell_size = 30
+    empty_tile = get_field_template(row_letters, palette).crop(
+        (x_rectangle, y_rectangle, x_rectangle + cell_size, y_rectangle + cell_size)
+    )
+
+    tiles = []
+    for color in CELL_COLORS:
+        tile = empty_tile.copy()
+        if color:
+            ImageDraw.Draw(tile).rectangle([(5, 5), (cell_size - 5, cell_size - 5)], fill=color, width=2)
+
+        tiles.append(tile)
+
+    return tuple(tiles)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tile_arrays(row_letters: str, palette: bool = False) -> tuple['numpy.ndarray', 'numpy.ndarray']:
+    """
+    Получение пустого поля и изображений ячеек в виде массивов NumPy.
+
+    :param row_letters: буквы строк поля
+    :param palette: в режиме ли с палитрой пустое поле
+    :return: массив пустого поля и массив изображений ячеек
+    """
+    template = numpy.asarray(get_field_template(row_letters, palette))
+    tiles = numpy.stack([numpy.asarray(tile) for tile in get_cell_tiles(row_letters, palette)])
+    return template, tiles
+
+
+def compose_field(row_letters: str, codes: list[list[int]], palette: bool = False) -> Image.Image:
+    """
+    Сборка изображения поля из изображений ячеек.
+
+    Если установлен NumPy, то все ячейки подставляются одной операцией над массивом,
+    иначе ячейки вставляются в копию пустого поля по одной.
+
+    :param row_letters: буквы строк поля
+    :param codes: коды состояния ячеек
+    :param palette: в режиме ли с палитрой пустое поле
+    :return: объект изображения
+    """
+    x_rectangle = 20
+    y_rectangle = 25
+    cell_size = 30
+    size = len(codes)
+
+    if numpy is not None:
+        template, tiles = get_tile_arrays(row_letters, palette)
+        board = template.copy()
+
+        # (строка, колонка, y, x[, канал]) -> (строка * y, колонка * x[, канал]).
+        cells = tiles[numpy.asarray(codes)].swapaxes(1, 2).reshape(
+            size * cell_size, size * cell_size, *tiles.shape[3:]
+        )
+        board[y_rectangle:y_rectangle + size * cell_size, x_rectangle:x_rectangle + size * cell_size] = cells
+
+        field_img = Image.fromarray(board)
+        if palette:
+            field_img.putpalette(get_field_template(row_letters, palette).getpalette())
+
+        return field_img
+
+    tiles = get_cell_tiles(row_letters, palette)
+    field_img = get_field_template(row_letters, palette).copy()
+    for row_num, row in enumerate(codes):
+        for col_num, code in enumerate(row):
+            if code:
+                field_img.paste(tiles[code], (x_rectangle + col_num * cell_size, y_rectangle + row_num * cell_size))
+
+    return field_img
 
 
 class Cell:
     """
     Сущность ячейки.
 
+    Ячейка только показывает состояние из битовых полей игрока, сама она его не хранит.
+
     Attributes:
+        player (Player): владелец поля
+        index (int): номер бита ячейки
+        mask (int): битовое поле, в котором отмечена только эта ячейка
         position (str): позиция ячейки
-        opened (bool): открыта ли ячейка
-        is_ship (bool): стоит ли корабль на ячейке
     """
+    __slots__ = ('player', 'index', 'mask', 'position')
 
-    def __init__(self, position: str):
+    def __init__(self, player: Player, index: int, position: str):
+        self.player: Player = player
+        self.index: int = index
+        self.mask: int = CELL_MASKS[index]
         self.position: str = position
-        self.opened: bool = False
-        self.is_ship: bool = False
+
+    @property
+    def opened(self) -> bool:
+        """
+        Открыта ли ячейка.
+        """
+        return bool(self.player.opened_mask & self.mask)
+
+    @property
+    def is_ship(self) -> bool:
+        """
+        Стоит ли корабль на ячейке.
+        """
+        return bool(self.player.ship_mask & self.mask)
@@ -1,13 +1,17 @@
 import functools
 import time
 from datetime import datetime
-from typing import Callable, Optional
+from typing import Callable, Optional, TYPE_CHECKING
 
 from telebot import TeleBot
+from telebot.apihelper import ApiTelegramException
 from telebot.types import Message, User
 
 from settings import STATES
 
+if TYPE_CHECKING:
+    from telebot.async_telebot import AsyncTeleBot
+
 
 class State:
     """
@@ -15,24 +19,43 @@ class State:
 
     Он хранит текущее состояние пользователя.
 
+    Состояния хранятся для каждого пользователя, который когда-либо писал боту,
+    поэтому состояние хранит только id пользователя и сообщений, а не сами объекты.
+
     Attributes:
         bot (TeleBot): Объект бота
-        user (User): Объект пользователя
+        user_id (int): id пользователя
         message_storage (dict[str: str]): Временное хранилище сообщений
         in_game (bool): В игре ли пользователь
+        session (Session): Сессия, в которой находится пользователь
+        board_message_id (int): id сообщения с полем, которое редактируется во время игры
         _name (str): Название
         _buffer_count (int): Количество сообщений, которое может храниться в буфере
-        _buffer_messages (dict[str: str]): Буфер сообщений
+        _buffer_messages (list[int]): Буфер сообщений (id сообщений)
     """
+    __slots__ = (
+        'bot',
+        'user_id',
+        'message_storage',
+        'in_game',
+        'session',
+        'board_message_id',
+        '_name',
+        '_buffer_count',
+        '_buffer_messages',
+        '_last_buffer_update_time',
+    )
 
     def __init__(self, bot: TeleBot, user: User, name: str, in_game: bool = False, buffer_count: int = 1):
         self.bot: TeleBot = bot
-        self.user: User = user
+        self.user_id: int = user.id
         self.message_storage: dict[str: str] = dict()
         self.in_game: bool = in_game
+        self.session = None
+        self.board_message_id: Optional[int] = None
         self._name: str = name
         self._buffer_count: int = buffer_count
-        self._buffer_messages: list[int: Message] = list()
+        self._buffer_messages: list[int] = list()
         self._last_buffer_update_time: Optional[datetime] = None
 
     @property
@@ -63,23 +86,76 @@ class State:
     def last_buffer_update_time(self, value: int) -> None:
         self._last_buffer_update_time = value
 
+    def release_board_message(self) -> None:
+        """
+        Перенос сообщения с полем в буфер.
+
+        Сообщение становится самым старым в буфере, поэтому удаляется раньше остальных.
+        """
+        if self.board_message_id:
+            self._buffer_messages.insert(0, self.board_message_id)
+            self.board_message_id = None
+
+    def notify_session(self) -> None:
+        """
+        Уведомление сессии пользователя о том, что его состояние изменилось.
+        """
+        if self.session:
+            self.session.push_event(self.user_id)
+
     def add_buffer_message(self, message: Message) -> None:
-        self._buffer_messages.append(message)
+        self._buffer_messages.append(message.id)
         self.last_buffer_update_time = datetime.now()
         if len(self._buffer_messages) > self._buffer_count:
             self._delete_messages()
 
     def get_buffer_messages_ids(self) -> list[int]:
-        return [message.id for message in self._buffer_messages]
+        return list(self._buffer_messages)
 
     def _delete_messages(self) -> None:
         moving_messages_ids = self.get_buffer_messages_ids()[:-self._buffer_count]
-        deleted = self.bot.delete_messages(self.user.id, moving_messages_ids)
+
+        # Удаление вызывается после отправки сообщения. Если Telegram ответил 429, то сообщения остаются в буфере
+        # до следующей отправки: иначе диспетчер повторил бы вместе с удалением и уже доставленное сообщение.
+        try:
+            deleted = self.bot.delete_messages(self.user_id, moving_messages_ids)
+        except ApiTelegramException as exc:
+            if exc.error_code != 429:
+                raise
+
+            return
+
         if deleted:
             del self._buffer_messages[:-self._buffer_count]
 
     def clear_buffer(self) -> None:
-        self.bot.delete_messages(self.user.id, self.get_buffer_messages_ids())
+        self.bot.delete_messages(self.user_id, self.get_buffer_messages_ids())
+        self._buffer_messages.clear()
+
+    async def async_add_buffer_message(self, message: Message) -> None:
+        self._buffer_messages.append(message.id)
+        self.last_buffer_update_time = datetime.now()
+        if len(self._buffer_messages) > self._buffer_count:
+            await self._async_delete_messages()
+
+    async def _async_delete_messages(self) -> None:
+        # Асинхронный бот возбуждает свой класс ошибки, а его модуль требует aiohttp.
+        from telebot.asyncio_helper import ApiTelegramException as AsyncApiTelegramException
+
+        moving_messages_ids = self.get_buffer_messages_ids()[:-self._buffer_count]
+        try:
+            deleted = await self.bot.delete_messages(self.user_id, moving_messages_ids)
+        except AsyncApiTelegramException as exc:
+            if exc.error_code != 429:
+                raise
+
+            return
+
+        if deleted:
+            del self._buffer_messages[:-self._buffer_count]
+
+    async def async_clear_buffer(self) -> None:
+        await self.bot.delete_messages(self.user_id, self.get_buffer_messages_ids())
         self._buffer_messages.clear()
 
 
@@ -100,3 +176,18 @@ def init(bot: TeleBot) -> Callable:
         return decorator
 
     return preparatory_decorator
+
+
+def async_init(bot: 'AsyncTeleBot') -> Callable:
+    def preparatory_decorator(func: Callable):
+        @functools.wraps(func)
+        async def decorator(message: Message, *args, **kwargs):
+            if message.from_user.id not in STATES:
+                STATES[message.from_user.id] = State(bot, message.from_user, 'main')
+
+            result = await func(message, *args, **kwargs)
+            return result
+
+        return decorator
+
+    return preparatory_decorator
@@ -10,9 +10,91 @@ load_dotenv()
 # Основные настройки.
 BASE_DIR = os.path.dirname(__file__)
 DATABASE_PATH = os.path.join(BASE_DIR, 'database.db')
+# Сколько ждать освобождения заблокированной базы данных (сек.).
+DATABASE_BUSY_TIMEOUT = float(os.getenv('DATABASE_BUSY_TIMEOUT', 5))
 TOTAL_SESSION_PLAYERS = os.getenv('TOTAL_SESSION_PLAYERS', 4)
 CLEAR_BUFFER_TIME = int(os.getenv('CLEAR_BUFFER_TIME', 60 * 24))
 
+# Режим работы бота: threads (каждая сессия в своем потоке), pool (сессии выполняет общий пул потоков)
+# или asyncio (сессии - корутины).
+RUNTIME = os.getenv('RUNTIME', 'threads')
+
+# Способ получения обновлений: polling (длинный опрос getUpdates) или webhook (Telegram сам присылает обновления).
+# Режим webhook работает только с RUNTIME threads и pool.
+UPDATES_MODE = os.getenv('UPDATES_MODE', 'polling')
+
+# Типы обновлений, которые нужны боту. Остальные Telegram не присылает.
+ALLOWED_UPDATES = ['message', 'callback_query']
+
+# Количество потоков, которые выполняют обработчики обновлений.
+# Обновления одного пользователя всегда выполняются по очереди в одном потоке,
+# а общая очередь игроков защищена блокировкой (helpers/players_queue.py).
+UPDATE_WORKERS = int(os.getenv('UPDATE_WORKERS', 8))
+
+# Сколько полученных обновлений может ждать обработки. Если очередь заполнена, то при polling
+# новые обновления не запрашиваются, а при webhook Telegram получает ответ 503 и присылает обновление повторно.
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', 1000))
+
+# Настройки webhook:
+# WEBHOOK_URL - адрес, на который Telegram присылает обновления (https://example.com/webhook);
+# WEBHOOK_HOST, WEBHOOK_PORT - адрес и порт локального сервера, который принимает обновления;
+# WEBHOOK_SECRET - секрет, который Telegram передает в заголовке каждого запроса;
+# WEBHOOK_MAX_CONNECTIONS - сколько одновременных соединений Telegram может открыть к серверу;
+# WEBHOOK_SSL_CERT, WEBHOOK_SSL_KEY - сертификат и ключ, если сервер сам принимает HTTPS.
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40))
+WEBHOOK_SSL_CERT = os.getenv('WEBHOOK_SSL_CERT', '')
+WEBHOOK_SSL_KEY = os.getenv('WEBHOOK_SSL_KEY', '')
+
+# Количество рабочих потоков для сессий в режиме pool.
+SESSION_WORKERS = int(os.getenv('SESSION_WORKERS', os.cpu_count() or 4))
+
+# Сколько сессия ждет действий игроков, прежде чем проверить их состояния (сек.).
+SESSION_EVENT_TIMEOUT = float(os.getenv('SESSION_EVENT_TIMEOUT', 5))
+
+
+# Через сколько секунд ожидания в очереди добавлять в игру компьютерных игроков (0 - не добавлять).
+AI_FILL_TIME = float(os.getenv('AI_FILL_TIME', 0))
+
+# Сколько секунд компьютерный игрок думает над ходом, чтобы люди успевали следить за игрой.
+AI_MOVE_DELAY = float(os.getenv('AI_MOVE_DELAY', 1))
+
+
+# Редактировать ли одно сообщение с полем вместо отправки нового поля при каждом ходе.
+EDIT_IN_PLACE = os.getenv('EDIT_IN_PLACE', 'false').lower() in ('1', 'true', 'yes')
+
+
+# Способ отрисовки поля: draw (рисование ячеек с помощью ImageDraw) или tiles (сборка поля из готовых ячеек).
+BOARD_RENDERER = os.getenv('BOARD_RENDERER', 'draw')
+
+
+# Формат изображения поля: png (RGBA PNG), png-palette (PNG с палитрой), webp (WebP без потерь) или jpeg.
+BOARD_IMAGE_FORMAT = os.getenv('BOARD_IMAGE_FORMAT', 'png-palette')
+
+# Уровень сжатия изображения поля: для PNG от 0 до 9, для WebP от 0 до 6.
+BOARD_COMPRESS_LEVEL = int(os.getenv('BOARD_COMPRESS_LEVEL', 6))
+
+# Качество изображения поля в формате JPEG (от 1 до 95).
+BOARD_JPEG_QUALITY = int(os.getenv('BOARD_JPEG_QUALITY', 90))
+
+
+# Сколько file_id загруженных изображений полей хранить для повторной отправки.
+PHOTO_CACHE_SIZE = int(os.getenv('PHOTO_CACHE_SIZE', 4096))
+
+
+# Ограничения отправки сообщений сессиями:
+# DISPATCHER_WORKERS - количество потоков, параллельно отправляющих сообщения в разные чаты;
+# GLOBAL_MESSAGES_PER_SECOND - сколько сообщений бот может отправить в секунду всего;
+# CHAT_MESSAGES_PER_SECOND - сколько сообщений бот может отправить в секунду в один чат;
+# CHAT_MESSAGES_BURST - сколько сообщений подряд можно отправить в чат без ожидания.
+DISPATCHER_WORKERS = int(os.getenv('DISPATCHER_WORKERS', 8))
+GLOBAL_MESSAGES_PER_SECOND = float(os.getenv('GLOBAL_MESSAGES_PER_SECOND', 30))
+CHAT_MESSAGES_PER_SECOND = float(os.getenv('CHAT_MESSAGES_PER_SECOND', 1))
+CHAT_MESSAGES_BURST = float(os.getenv('CHAT_MESSAGES_BURST', 3))
+
 
 # Очередь игроков.
 PLAYERS_QUEUE = []
@@ -0,0 +1,61 @@
+import functools
+import itertools
+import os
+
+import pytest
+from PIL import ImageFont
+from telebot.types import User
+
+import objects.player
+from objects.player import Player
+from settings import STATES
+
+USER_IDS = itertools.count(1)
+
+# Шрифт для отрисовки полей в тестах: Lato (SIL Open Font License 1.1, текст лицензии - в метаданных файла).
+# Arial нельзя положить в репозиторий, поэтому тесты не зависят от шрифтов, установленных в системе.
+TEST_FONT = os.path.join(os.path.dirname(__file__), 'fonts', 'Lato-Regular.ttf')
+
+
+@functools.lru_cache(maxsize=None)
+def get_test_font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Загрузка шрифта из репозитория вместо шрифта name.
+
+    :param name: название шрифта
+    :param size: размер шрифта
+    :return: шрифт
+    """
+    return ImageFont.truetype(TEST_FONT, size=size)
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_font():
+    """
+    Отрисовка полей шрифтом из репозитория.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(objects.player, 'get_font', get_test_font)
+        objects.player.get_field_template.cache_clear()
+        yield
+        objects.player.get_field_template.cache_clear()
+
+
+@pytest.fixture
+def make_player():
+    def factory() -> Player:
+        user_id = next(USER_IDS)
+        return Player(User(user_id, False, f'user_{user_id}'))
+
+    return factory
+
+
+@pytest.fixture(autouse=True)
+def restore_states():
+    """
+    Восстановление глобальных состояний пользователей после теста.
+    """
+    saved_states = dict(STATES)
+    yield
+    STATES.clear()
+    STATES.update(saved_states)
@@ -0,0 +1,76 @@
+from helpers.fleet_notation import format_fleet, parse_fleet, set_fleet, validate_fleet
+
+FLEET = 'A1r A5r C1r C4r C7b E1 E3'
+
+
+def test_parse_fleet():
+    placements, errors = parse_fleet(FLEET)
+
+    assert errors == []
+    assert placements == [
+        ('first_3', 'A1', 'right'),
+        ('second_3', 'A5', 'right'),
+        ('first_2', 'C1', 'right'),
+        ('second_2', 'C4', 'right'),
+        ('third_2', 'C7', 'bottom'),
+        ('first_1', 'E1', None),
+        ('second_1', 'E3', None),
+    ]
+
+
+def test_parse_fleet_accepts_lowercase_and_separators():
+    placements, errors = parse_fleet('a1r, a5r; c1r  c4r,c7b e1 e3')
+
+    assert errors == []
+    assert placements == parse_fleet(FLEET)[0]
+
+
+def test_parse_fleet_wrong_ships_count():
+    _, errors = parse_fleet('A1r A5r')
+
+    assert errors[0] == 'Нужно указать 7 кораблей, а указано 2.'
+
+
+def test_parse_fleet_invalid_token():
+    placements, errors = parse_fleet('Z9 A5r C1r C4r C7b E1 E3')
+
+    assert errors == ['Z9: неверная запись корабля.']
+    assert len(placements) == 6
+
+
+def test_parse_fleet_direction_required_for_long_ships():
+    _, errors = parse_fleet('A1 A5r C1r C4r C7b E1 E3')
+
+    assert errors == ['A1: для 3 размерного корабля нужно указать направление.']
+
+
+def test_validate_fleet():
+    assert validate_fleet(parse_fleet(FLEET)[0]) == []
+
+
+def test_validate_fleet_ship_out_of_field():
+    placements, _ = parse_fleet('A7r A5r C1r C4r C7b E1 E3')
+
+    assert 'A7: корабль выходит за пределы поля.' in validate_fleet(placements)
+
+
+def test_validate_fleet_ships_nearby():
+    placements, _ = parse_fleet('A1r B1r C1r C4r C7b E1 E3')
+
+    errors = validate_fleet(placements)
+    assert [error.split(':')[0] for error in errors] == ['B1']
+
+
+def test_set_fleet_and_format_fleet(make_player):
+    player = make_player()
+
+    assert set_fleet(player, FLEET.lower()) == []
+    assert format_fleet(player) == FLEET
+
+
+def test_set_fleet_keeps_field_on_errors(make_player):
+    player = make_player()
+    set_fleet(player, FLEET)
+
+    assert set_fleet(player, 'A1r B1r C1r C4r C7b E1 E3')
+    assert format_fleet(player) == FLEET
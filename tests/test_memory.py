@@ -0,0 +1,13 @@
+from benchmarks.memory import check_session_memory, measure_sessions
+
+
+def test_session_memory_within_limits():
+    session_size, session_images_size = measure_sessions(count=20, first_user_id=10 ** 12, shots=10)
+
+    assert check_session_memory(session_size, session_images_size) == []
+
+
+def test_check_session_memory_reports_excess():
+    errors = check_session_memory(10 ** 9, 10 ** 9)
+
+    assert len(errors) == 2
@@ -0,0 +1,26 @@
+import asyncio
+import io
+
+from telebot.types import Message, PhotoSize
+
+from helpers.photo_cache import FileIdCache
+
+
+def test_async_send_uploads_same_image_once():
+    cache = FileIdCache(10)
+    sent = []
+
+    async def send(media):
+        sent.append('upload' if hasattr(media, 'read') else media)
+        await asyncio.sleep(0.01)
+        bot_message = Message(1, None, 0, None, 'photo', {}, '')
+        bot_message.photo = [PhotoSize('file_id', 'unique_id', 1, 1)]
+        return bot_message
+
+    async def broadcast():
+        await asyncio.gather(*(cache.async_send(io.BytesIO(b'board'), send) for _ in range(5)))
+
+    asyncio.run(broadcast())
+
+    assert sent == ['upload'] + ['file_id'] * 4
+    assert cache.async_uploading == {}
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+from telebot.types import User
+
+from database import queries
+from database.connection import ConnectionPool
+from database.queries import add_ratings, create_tables, get_users
+from threads.headless_session import HeadlessBot, play_game
+
+
+@pytest.fixture
+def temp_database(tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / 'database.db'), busy_timeout=1)
+    monkeypatch.setattr(queries, 'DATABASE', pool)
+    create_tables()
+    yield pool
+    pool.close()
+
+
+def test_add_ratings_inserts_and_updates(temp_database):
+    first = User(1, False, 'first', username='first_user')
+    second = User(2, False, 'second')
+
+    add_ratings([(first, 3), (second, 1)])
+    add_ratings([(first, 2), (second, -1)])
+
+    assert get_users() == [(1, 'first_user', 5), (2, 'second', 0)]
+
+
+def test_add_ratings_never_below_zero(temp_database):
+    user = User(1, False, 'user')
+
+    add_ratings([(user, -1)])
+    add_ratings([(user, -1)])
+
+    assert get_users() == [(1, 'user', 0)]
+
+
+def test_rating_changes_follow_standings():
+    session = play_game(HeadlessBot(), 4, rnd=random.Random(0))
+
+    assert [session.get_rating_change(players_left) for players_left in range(4)] == [3, 2, 1, -1]
+
+
+def test_game_settles_ratings_by_final_standings():
+    ratings = dict()
+    session = play_game(HeadlessBot(), 4, rnd=random.Random(0), ratings=ratings)
+
+    # Первый выбывший теряет единицу рейтинга, но рейтинг не опускается ниже нуля.
+    assert sorted(ratings.values()) == [0, 1, 2, 3]
+    assert session.rating_changes == []
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import objects.player
+from settings import SHIPS
+
+LAYOUT = [('A1', 'right'), ('A5', 'right'), ('C1', 'right'), ('C4', 'right'), ('C7', 'bottom'), ('E1', None), ('E3', None)]
+
+
+def draw_from_scratch(player, opponent, marked_position):
+    """
+    Отрисовка поля бэкендом draw без ранее нарисованного изображения.
+    """
+    owner = player.opponent if opponent else player
+    owner.view_images.pop(opponent, None)
+    return player.render_player_field(opponent, marked_position).convert('RGB').tobytes()
+
+
+def compose(player, opponent, marked_position):
+    return player.compose_player_field(opponent, marked_position).convert('RGB').tobytes()
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_tiles_match_draw(make_player, monkeypatch, use_numpy):
+    if use_numpy and objects.player.numpy is None:
+        pytest.skip('numpy не установлен')
+
+    if not use_numpy:
+        monkeypatch.setattr(objects.player, 'numpy', None)
+
+    attacker, defender = make_player(), make_player()
+    attacker.opponent, defender.opponent = defender, attacker
+    for name, (position, direction) in zip(SHIPS, LAYOUT):
+        defender.set_ship(position, name, direction)
+
+    positions = [cell.position for row in defender.field for cell in row]
+    random.Random(0).shuffle(positions)
+    for position in positions:
+        if defender.get_cell(position).opened:
+            continue
+
+        defender.open_cell(position)
+        assert compose(attacker, True, None) == draw_from_scratch(attacker, True, None)
+        assert compose(defender, False, None) == draw_from_scratch(defender, False, None)
+        assert compose(defender, False, 'C3') == draw_from_scratch(defender, False, 'C3')
+
+
+def test_incremental_draw_matches_full_draw(make_player):
+    player, opponent = make_player(), make_player()
+    player.opponent, opponent.opponent = opponent, player
+    for name, (position, direction) in zip(SHIPS, LAYOUT):
+        player.set_ship(position, name, direction)
+
+    for position in ('A1', 'B2', 'C7', 'H8', 'E3', 'A2', 'A3'):
+        if player.get_cell(position).opened:
+            continue
+
+        player.open_cell(position)
+        incremental = player.render_player_field(False, position).convert('RGB').tobytes()
+        assert incremental == draw_from_scratch(player, False, position)
@@ -0,0 +1,39 @@
+import pytest
+
+from threads.dispatcher import TokenBucket
+
+
+@pytest.fixture
+def bucket() -> TokenBucket:
+    bucket = TokenBucket(rate=2, capacity=3)
+    bucket.updated = 0.0
+    return bucket
+
+
+def test_starts_full(bucket):
+    assert bucket.is_full(0.0)
+    assert bucket.get_delay(0.0) == 0.0
+
+
+def test_burst_then_delay(bucket):
+    for _ in range(3):
+        assert bucket.get_delay(0.0) == 0.0
+        bucket.take()
+
+    assert bucket.get_delay(0.0) == pytest.approx(0.5)
+
+
+def test_refill_over_time(bucket):
+    for _ in range(3):
+        bucket.take()
+
+    assert bucket.get_delay(0.25) == pytest.approx(0.25)
+    assert bucket.get_delay(0.5) == 0.0
+
+
+def test_refill_is_capped(bucket):
+    bucket.take()
+    bucket.refill(100.0)
+
+    assert bucket.tokens == 3
+    assert bucket.is_full(100.0)
@@ -0,0 +1,120 @@
+import asyncio
+
+import telebot
+from telebot.async_telebot import AsyncTeleBot
+
+from database.queries import async_add_ratings
+from helpers.sending_messages import async_send_message, async_send_photo, async_send_board
+from objects.player import Player
+from threads.dispatcher import ASYNC_DISPATCHER
+from threads.session import BaseSession, take_players_from_queue
+
+# Запущенные сессии. Нужны, чтобы задачи asyncio не удалил сборщик мусора.
+SESSION_TASKS: set[asyncio.Task] = set()
+
+
+class AsyncSession(BaseSession):
+    """
+    Сессия игры в виде корутины.
+
+    Логика игры берется из BaseSession, а отправка сообщений, ожидание событий
+    и работа с базой данных выполняются без блокировки цикла событий.
+    """
+    senders = {
+        'message': async_send_message,
+        'photo': async_send_photo,
+        'board': async_send_board,
+    }
+
+    def __init__(self, bot: AsyncTeleBot, players: list[telebot.types.User]):
+        super().__init__(bot, players)
+
+    def create_events_queue(self) -> asyncio.Queue:
+        return asyncio.Queue()
+
+    async def run(self) -> None:
+        # подготовка к игре
+        self.begin()
+
+        # контроль игры
+        while self.running:
+            await self.flush()
+            await self.wait_for_event(self.get_timeout())
+            self.step()
+
+        # отправка итогов игры
+        await self.flush()
+
+    async def wait_for_event(self, timeout: float) -> None:
+        """
+        Ожидание события от игроков.
+
+        :param timeout: максимальное время ожидания (сек.)
+        """
+        try:
+            await asyncio.wait_for(self.events.get(), timeout)
+        except asyncio.TimeoutError:
+            return
+
+        while not self.events.empty():
+            self.events.get_nowait()
+
+    async def send_player_pool(self, player: Player) -> None:
+        """
+        Передача пула сообщений игрока диспетчеру.
+
+        Диспетчер отправляет сообщения в порядке очереди и с учетом ограничений Telegram,
+        поэтому сессия не ждет отправки.
+
+        :param player: игрок
+        """
+        player_message_pool = self.pop_player_pool(player)
+        if not player_message_pool:
+            return
+
+        chat_id = player.object.id
+        ASYNC_DISPATCHER.call(chat_id, self.change_player_buffer, player, self.get_buffer_count(player_message_pool))
+        for kind, args, kwargs in player_message_pool:
+            ASYNC_DISPATCHER.send(chat_id, self.senders[kind], self.bot, chat_id, *args, **kwargs)
+
+    async def send_pool(self) -> None:
+        for player in self.get_receivers():
+            await self.send_player_pool(player)
+
+        # После итогов игры возвращаем удаленным игрокам обычный размер буфера.
+        for player in self.pop_removed_players():
+            ASYNC_DISPATCHER.call(player.object.id, self.release_player, player)
+
+    async def update_ratings(self) -> None:
+        """
+        Обновление рейтинга игроков одной транзакцией после окончания игры.
+        """
+        changes = self.pop_rating_changes()
+        if changes:
+            await async_add_ratings(changes)
+
+    async def flush(self) -> None:
+        """
+        Отправка всех сообщений из пула и обновление рейтинга.
+        """
+        await self.update_ratings()
+        await self.send_pool()
+
+
+def async_check_queue(bot: AsyncTeleBot) -> None:
+    """
+    Проверка очереди игроков в режиме asyncio.
+    """
+    players = take_players_from_queue()
+    if players:
+        create_async_session(bot, players)
+
+
+def create_async_session(bot: AsyncTeleBot, players: list[telebot.types.User]) -> None:
+    """
+    Создание и запуск сессии в виде задачи asyncio.
+    """
+    session = AsyncSession(bot, players)
+    task = asyncio.create_task(session.run())
+    SESSION_TASKS.add(task)
+    task.add_done_callback(SESSION_TASKS.discard)
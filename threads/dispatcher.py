@@ -0,0 +1,393 @@
+import asyncio
+import collections
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from telebot.apihelper import ApiTelegramException
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов.
+
+    Attributes:
+        rate (float): сколько токенов добавляется в секунду
+        capacity (float): максимальное количество токенов
+        tokens (float): текущее количество токенов
+        updated (float): время последнего пополнения
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.tokens: float = capacity
+        self.updated: float = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def get_delay(self, now: float) -> float:
+        """
+        Получение времени, через которое появится токен.
+
+        :param now: текущее время
+        :return: время ожидания (сек.), 0 если токен уже есть
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class DispatcherTask:
+    """
+    Задача диспетчера.
+
+    Attributes:
+        func (Callable): функция, которую нужно вызвать
+        args (tuple): аргументы функции
+        kwargs (dict): именованные аргументы функции
+        limited (bool): является ли вызов запросом к Telegram, который учитывается в ограничениях
+    """
+    __slots__ = ('func', 'args', 'kwargs', 'limited')
+
+    def __init__(self, func: Callable, args: tuple, kwargs: dict, limited: bool):
+        self.func: Callable = func
+        self.args: tuple = args
+        self.kwargs: dict = kwargs
+        self.limited: bool = limited
+
+
+class MessageDispatcher:
+    """
+    Диспетчер исходящих сообщений.
+
+    У каждого чата своя очередь, задачи одного чата выполняются строго по порядку,
+    а задачи разных чатов - параллельно на нескольких потоках.
+    Частота отправки ограничивается общим ограничителем и ограничителем каждого чата.
+    Если Telegram ответил 429 Too Many Requests, то чат ставится на паузу на retry_after секунд,
+    а сообщение отправляется повторно.
+
+    Attributes:
+        workers_count (int): количество потоков отправки
+        chats (dict[int: deque[DispatcherTask]]): очереди задач чатов
+        ready (deque[int]): чаты, у которых есть задачи и которые сейчас не обрабатываются
+        chat_buckets (dict[int: TokenBucket]): ограничители чатов
+        global_bucket (TokenBucket): общий ограничитель
+        paused_until (dict[int: float]): до какого времени чат на паузе после ответа 429
+        condition (threading.Condition): условие для ожидания задач
+    """
+
+    def __init__(
+            self,
+            workers_count: int,
+            global_rate: float,
+            chat_rate: float,
+            chat_burst: float,
+    ):
+        self.workers_count: int = workers_count
+        self.chat_rate: float = chat_rate
+        self.chat_burst: float = chat_burst
+        self.chats: dict[int: collections.deque] = dict()
+        self.ready: collections.deque = collections.deque()
+        self.chat_buckets: dict[int: TokenBucket] = dict()
+        self.global_bucket: TokenBucket = TokenBucket(global_rate, global_rate)
+        self.paused_until: dict[int: float] = dict()
+        self.condition: threading.Condition = threading.Condition()
+        self.started: bool = False
+
+    def start(self) -> None:
+        with self.condition:
+            if self.started:
+                return
+
+            self.started = True
+
+        for num in range(self.workers_count):
+            threading.Thread(target=self.work, name=f'dispatcher-{num}', daemon=True).start()
+
+    def send(self, chat_id: int, func: Callable, *args, **kwargs) -> None:
+        """
+        Добавление запроса к Telegram в очередь чата.
+
+        :param chat_id: id чата
+        :param func: функция отправки
+        """
+        self.add_task(chat_id, DispatcherTask(func, args, kwargs, limited=True))
+
+    def call(self, chat_id: int, func: Callable, *args, **kwargs) -> None:
+        """
+        Добавление вызова, который должен выполниться по порядку с сообщениями чата.
+
+        Такие вызовы не учитываются в ограничениях частоты.
+
+        :param chat_id: id чата
+        :param func: функция
+        """
+        self.add_task(chat_id, DispatcherTask(func, args, kwargs, limited=False))
+
+    def add_task(self, chat_id: int, task: DispatcherTask) -> None:
+        with self.condition:
+            chat_tasks = self.chats.get(chat_id)
+
+            # Если у чата нет очереди, то он не обрабатывается и его нужно отметить как готовый.
+            if chat_tasks is None:
+                chat_tasks = self.chats[chat_id] = collections.deque()
+                self.ready.append(chat_id)
+
+            chat_tasks.append(task)
+            self.condition.notify()
+
+    def pick_chat(self, now: float) -> tuple[Optional[int], Optional[float]]:
+        """
+        Выбор чата, задачу которого можно выполнить прямо сейчас.
+
+        :param now: текущее время
+        :return: id чата или None и время, через которое стоит проверить снова
+        """
+        delay = None
+        for _ in range(len(self.ready)):
+            chat_id = self.ready.popleft()
+            task = self.chats[chat_id][0]
+
+            chat_delay = self.paused_until.get(chat_id, 0) - now
+            if task.limited:
+                chat_delay = max(
+                    chat_delay,
+                    self.get_chat_bucket(chat_id).get_delay(now),
+                    self.global_bucket.get_delay(now),
+                )
+
+            if chat_delay <= 0:
+                if task.limited:
+                    self.get_chat_bucket(chat_id).take()
+                    self.global_bucket.take()
+
+                self.paused_until.pop(chat_id, None)
+                return chat_id, None
+
+            self.ready.append(chat_id)
+            delay = chat_delay if delay is None else min(delay, chat_delay)
+
+        return None, delay
+
+    def get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        chat_bucket = self.chat_buckets.get(chat_id)
+        if chat_bucket is None:
+            chat_bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+
+        return chat_bucket
+
+    def work(self) -> None:
+        """
+        Выполнение задач из очередей чатов одним потоком.
+        """
+        while True:
+            with self.condition:
+                chat_id, delay = self.pick_chat(time.monotonic())
+                while chat_id is None:
+                    self.condition.wait(delay)
+                    chat_id, delay = self.pick_chat(time.monotonic())
+
+                task = self.chats[chat_id].popleft()
+
+            retry_after = self.execute(task)
+
+            with self.condition:
+                chat_tasks = self.chats[chat_id]
+                if retry_after:
+                    chat_tasks.appendleft(task)
+                    self.paused_until[chat_id] = time.monotonic() + retry_after
+
+                if chat_tasks:
+                    self.ready.append(chat_id)
+                    self.condition.notify()
+
+                else:
+                    del self.chats[chat_id]
+
+                    # Полный ограничитель ничем не отличается от нового, поэтому его можно не хранить.
+                    chat_bucket = self.chat_buckets.get(chat_id)
+                    if chat_bucket and chat_bucket.is_full(time.monotonic()):
+                        del self.chat_buckets[chat_id]
+
+    @staticmethod
+    def execute(task: DispatcherTask) -> Optional[float]:
+        """
+        Выполнение задачи.
+
+        :param task: задача
+        :return: через сколько секунд нужно повторить задачу, если Telegram ответил 429
+        """
+        try:
+            task.func(*task.args, **task.kwargs)
+        except ApiTelegramException as exc:
+            if exc.error_code == 429:
+                parameters = exc.result_json.get('parameters') or dict()
+                return parameters.get('retry_after', 1)
+
+            logger.exception('Не удалось выполнить запрос к Telegram')
+        except Exception:
+            logger.exception('Ошибка при выполнении задачи диспетчера')
+
+        return None
+
+
+class AsyncMessageDispatcher:
+    """
+    Диспетчер исходящих сообщений для режима asyncio.
+
+    Работает так же, как MessageDispatcher: у каждого чата своя очередь, задачи одного чата выполняются
+    строго по порядку, частота отправки ограничивается общим ограничителем и ограничителем каждого чата,
+    а после ответа 429 чат ждет retry_after секунд и повторяет запрос. Вместо потоков очереди чатов
+    обрабатывают задачи asyncio.
+
+    Attributes:
+        chats (dict[int: deque[DispatcherTask]]): очереди задач чатов
+        workers (dict[int: asyncio.Task]): задачи asyncio, которые обрабатывают очереди чатов
+        chat_buckets (dict[int: TokenBucket]): ограничители чатов
+        global_bucket (TokenBucket): общий ограничитель
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: float):
+        self.chat_rate: float = chat_rate
+        self.chat_burst: float = chat_burst
+        self.chats: dict[int: collections.deque] = dict()
+        self.workers: dict[int: asyncio.Task] = dict()
+        self.chat_buckets: dict[int: TokenBucket] = dict()
+        self.global_bucket: TokenBucket = TokenBucket(global_rate, global_rate)
+
+    def send(self, chat_id: int, func: Callable, *args, **kwargs) -> None:
+        """
+        Добавление запроса к Telegram в очередь чата.
+
+        :param chat_id: id чата
+        :param func: корутинная функция отправки
+        """
+        self.add_task(chat_id, DispatcherTask(func, args, kwargs, limited=True))
+
+    def call(self, chat_id: int, func: Callable, *args, **kwargs) -> None:
+        """
+        Добавление вызова, который должен выполниться по порядку с сообщениями чата.
+
+        Такие вызовы не учитываются в ограничениях частоты.
+
+        :param chat_id: id чата
+        :param func: функция или корутинная функция
+        """
+        self.add_task(chat_id, DispatcherTask(func, args, kwargs, limited=False))
+
+    def add_task(self, chat_id: int, task: DispatcherTask) -> None:
+        chat_tasks = self.chats.get(chat_id)
+        if chat_tasks is None:
+            chat_tasks = self.chats[chat_id] = collections.deque()
+            self.workers[chat_id] = asyncio.create_task(self.work(chat_id))
+
+        chat_tasks.append(task)
+
+    def get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        chat_bucket = self.chat_buckets.get(chat_id)
+        if chat_bucket is None:
+            chat_bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+
+        return chat_bucket
+
+    async def work(self, chat_id: int) -> None:
+        """
+        Выполнение задач из очереди чата.
+
+        :param chat_id: id чата
+        """
+        chat_tasks = self.chats[chat_id]
+        try:
+            while chat_tasks:
+                task = chat_tasks[0]
+                if task.limited:
+                    # Проверка и взятие токенов идут без await между ними, поэтому другие чаты не вклиниваются.
+                    now = time.monotonic()
+                    delay = max(self.get_chat_bucket(chat_id).get_delay(now), self.global_bucket.get_delay(now))
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                        continue
+
+                    self.get_chat_bucket(chat_id).take()
+                    self.global_bucket.take()
+
+                retry_after = await self.execute(task)
+                if retry_after:
+                    await asyncio.sleep(retry_after)
+                    continue
+
+                chat_tasks.popleft()
+
+        finally:
+            del self.chats[chat_id]
+            del self.workers[chat_id]
+
+            # Полный ограничитель ничем не отличается от нового, поэтому его можно не хранить.
+            chat_bucket = self.chat_buckets.get(chat_id)
+            if chat_bucket and chat_bucket.is_full(time.monotonic()):
+                del self.chat_buckets[chat_id]
+
+    @staticmethod
+    async def execute(task: DispatcherTask) -> Optional[float]:
+        """
+        Выполнение задачи.
+
+        :param task: задача
+        :return: через сколько секунд нужно повторить задачу, если Telegram ответил 429
+        """
+        # Асинхронный бот возбуждает свой класс ошибки, а его модуль требует aiohttp.
+        from telebot.asyncio_helper import ApiTelegramException as AsyncApiTelegramException
+
+        try:
+            result = task.func(*task.args, **task.kwargs)
+            if inspect.isawaitable(result):
+                await result
+        except AsyncApiTelegramException as exc:
+            if exc.error_code == 429:
+                parameters = exc.result_json.get('parameters') or dict()
+                return parameters.get('retry_after', 1)
+
+            logger.exception('Не удалось выполнить запрос к Telegram')
+        except Exception:
+            logger.exception('Ошибка при выполнении задачи диспетчера')
+
+        return None
+
+
+# Общий диспетчер исходящих сообщений сессий.
+DISPATCHER = MessageDispatcher(
+    workers_count=settings.DISPATCHER_WORKERS,
+    global_rate=settings.GLOBAL_MESSAGES_PER_SECOND,
+    chat_rate=settings.CHAT_MESSAGES_PER_SECOND,
+    chat_burst=settings.CHAT_MESSAGES_BURST,
+)
+
+
+def start_dispatcher() -> None:
+    DISPATCHER.start()
+
+
+# Общий диспетчер исходящих сообщений сессий в режиме asyncio.
+ASYNC_DISPATCHER = AsyncMessageDispatcher(
+    global_rate=settings.GLOBAL_MESSAGES_PER_SECOND,
+    chat_rate=settings.CHAT_MESSAGES_PER_SECOND,
+    chat_burst=settings.CHAT_MESSAGES_BURST,
+)
@@ -0,0 +1,296 @@
+import collections
+import itertools
+import random
+from typing import Any, Optional
+
+from telebot.types import Message, PhotoSize, User
+
+from helpers.fleet_notation import DIRECTION_LETTERS
+from objects.ai_player import create_ai_users, get_target_index
+from objects.bitboard import POSITIONS
+from objects.layouts import generate_layout
+from objects.player import Player
+from objects.state import State, get_state
+from settings import SHIPS, STATES
+from threads.session import SyncSession
+
+# id симулируемых пользователей. Начинаются далеко за id пользователей Telegram, чтобы не пересекаться с ними.
+SIMULATED_USER_IDS = itertools.count(10 ** 15)
+
+# Способы расстановки кораблей симулируемыми пользователями.
+PLACEMENT_MODES = ('manual', 'auto', 'fleet')
+
+# Буквы направлений для записи расстановки.
+LETTERS_BY_DIRECTION = {direction: letter for letter, direction in DIRECTION_LETTERS.items()}
+
+
+class HeadlessBot:
+    """
+    Бот без Telegram.
+
+    Реализует методы TeleBot, которые вызывает сессия, и только считает запросы.
+    Отправленные фотографии получают file_id, поэтому кэш file_id работает как с настоящим ботом.
+
+    Attributes:
+        calls (Counter[str: int]): количество вызовов каждого метода
+        uploads (int): количество загруженных изображений (фотографии, отправленные не по file_id)
+    """
+
+    def __init__(self):
+        self.calls: collections.Counter[str: int] = collections.Counter()
+        self.uploads: int = 0
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+
+    def create_message(self, content_type: str, photo: Any = None) -> Message:
+        message = Message(next(self._message_ids), None, 0, None, content_type, {}, '')
+        if photo is not None:
+            if isinstance(photo, str):
+                file_id = photo
+            else:
+                self.uploads += 1
+                file_id = f'file_{next(self._file_ids)}'
+
+            message.photo = [PhotoSize(file_id, file_id, 280, 280)]
+
+        return message
+
+    def send_message(self, chat_id: int, text: str, *args, **kwargs) -> Message:
+        self.calls['send_message'] += 1
+        return self.create_message('text')
+
+    def send_photo(self, chat_id: int, photo: Any, *args, **kwargs) -> Message:
+        self.calls['send_photo'] += 1
+        return self.create_message('photo', photo)
+
+    def edit_message_media(self, media: Any, chat_id: int, message_id: int, *args, **kwargs) -> Message:
+        self.calls['edit_message_media'] += 1
+        return self.create_message('photo', media.media)
+
+    def delete_messages(self, chat_id: int, message_ids: list[int]) -> bool:
+        self.calls['delete_messages'] += 1
+        return True
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class VirtualClock:
+    """
+    Часы, время которых идет только по команде.
+
+    Сессия не ждет таймеров: когда событий нет, часы переводятся сразу на время пробуждения сессии.
+
+    Attributes:
+        now (float): текущее время (сек.)
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now: float = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance_to(self, moment: float) -> None:
+        self.now = max(self.now, moment)
+
+
+class HeadlessSession(SyncSession):
+    """
+    Сессия игры без Telegram, потоков и базы данных.
+
+    Логика игры та же, что у обычной сессии, но сообщения отправляются боту сразу,
+    а рейтинг хранится в словаре. Поэтому игры можно проигрывать с той скоростью, которую дает процессор.
+
+    Attributes:
+        ratings (dict[int: int]): ключ - id пользователя; значение - рейтинг
+    """
+
+    def __init__(
+            self,
+            bot: HeadlessBot,
+            players: list[User],
+            clock: VirtualClock,
+            ratings: Optional[dict] = None,
+    ):
+        self.ratings: dict[int: int] = ratings if ratings is not None else dict()
+        super().__init__(bot, players, clock)
+
+    def send_player_pool(self, player: Player) -> None:
+        player_message_pool = self.pop_player_pool(player)
+        if not player_message_pool:
+            return
+
+        chat_id = player.object.id
+        self.change_player_buffer(player, self.get_buffer_count(player_message_pool))
+        for kind, args, kwargs in player_message_pool:
+            self.senders[kind](self.bot, chat_id, *args, **kwargs)
+
+    def send_pool(self) -> None:
+        for player in self.get_receivers():
+            self.send_player_pool(player)
+
+        for player in self.pop_removed_players():
+            self.release_player(player)
+
+    def update_ratings(self) -> None:
+        for user, change in self.pop_rating_changes():
+            self.ratings[user.id] = max(self.ratings.get(user.id, 0) + change, 0)
+
+
+class SimulatedUser:
+    """
+    Пользователь, который играет сам.
+
+    Меняет свое состояние так же, как это делают обработчики кнопок и сообщений.
+
+    Attributes:
+        user (User): пользователь
+        placement (str): способ расстановки кораблей (manual, auto или fleet)
+        layout (list[tuple[str, str, Optional[str]]]): расстановка для способов manual и fleet
+        rnd (random.Random): генератор случайных чисел
+    """
+
+    def __init__(self, user: User, placement: str, rnd: random.Random):
+        self.user: User = user
+        self.placement: str = placement
+        self.layout: list[tuple[str, str, Optional[str]]] = generate_layout(SHIPS, rnd=rnd)
+        self.rnd: random.Random = rnd
+
+    def act(self, session: HeadlessSession) -> None:
+        """
+        Действие пользователя, если сессия его ждет.
+
+        :param session: сессия
+        """
+        state = get_state(self.user.id)
+        name = state.name
+
+        if name.startswith('setting_ship_position_'):
+            ship = name[len('setting_ship_position_'):]
+            if self.placement == 'auto':
+                state.name = 'auto_placing_ships'
+
+            elif self.placement == 'fleet':
+                state.message_storage['fleet'] = ' '.join(
+                    position + LETTERS_BY_DIRECTION.get(direction, '')
+                    for _, position, direction in self.layout
+                )
+                state.name = 'checking_fleet'
+
+            else:
+                state.message_storage['position'] = self.get_ship_placement(ship)[0]
+                state.name = 'check_ship_position_' + ship
+
+        elif name.startswith('setting_ship_direction_'):
+            ship = name[len('setting_ship_direction_'):]
+            state.message_storage['direction'] = self.get_ship_placement(ship)[1]
+            state.name = 'check_ship_direction_' + ship
+
+        elif name == 'making_move':
+            player = next(player for player in session.players if player.object.id == self.user.id)
+            state.message_storage['position'] = POSITIONS[get_target_index(player.opponent, self.rnd)]
+            state.name = 'check_move'
+
+        else:
+            return
+
+        state.notify_session()
+
+    def get_ship_placement(self, ship: str) -> tuple[str, Optional[str]]:
+        """
+        Получение позиции и направления корабля из расстановки пользователя.
+
+        :param ship: название корабля
+        :return: позиция и направление
+        """
+        for name, position, direction in self.layout:
+            if name == ship:
+                return position, direction
+
+        raise ValueError(f'Корабля {ship} нет в расстановке')
+
+
+def create_simulated_users(
+        bot: HeadlessBot,
+        count: int,
+        rnd: random.Random,
+        placement: Optional[str] = None,
+) -> list[SimulatedUser]:
+    """
+    Создание симулируемых пользователей и их состояний.
+
+    :param bot: бот
+    :param count: количество пользователей
+    :param rnd: генератор случайных чисел
+    :param placement: способ расстановки кораблей (по умолчанию - все способы по очереди)
+    :return: список пользователей
+    """
+    simulated_users = []
+    for num in range(count):
+        user_id = next(SIMULATED_USER_IDS)
+        user = User(user_id, False, f'sim_{user_id}')
+        STATES[user_id] = State(bot, user, 'main', in_game=True)
+        simulated_users.append(SimulatedUser(user, placement or PLACEMENT_MODES[num % len(PLACEMENT_MODES)], rnd))
+
+    return simulated_users
+
+
+def play_game(
+        bot: HeadlessBot,
+        players_count: int,
+        ai_players_count: int = 0,
+        rnd: random.Random = random,
+        placement: Optional[str] = None,
+        ratings: Optional[dict] = None,
+        max_steps: int = 100000,
+) -> HeadlessSession:
+    """
+    Проигрывание одной игры от расстановки кораблей до итогов.
+
+    Состояния пользователей удаляются после игры.
+
+    :param bot: бот
+    :param players_count: количество симулируемых пользователей
+    :param ai_players_count: количество компьютерных игроков
+    :param rnd: генератор случайных чисел
+    :param placement: способ расстановки кораблей (по умолчанию - все способы по очереди)
+    :param ratings: общий для нескольких игр рейтинг
+    :param max_steps: максимальное количество шагов сессии
+    :return: завершенная сессия
+    """
+    simulated_users = create_simulated_users(bot, players_count, rnd, placement)
+    users = [simulated_user.user for simulated_user in simulated_users]
+    users += create_ai_users(bot, ai_players_count)
+
+    clock = VirtualClock()
+    session = HeadlessSession(bot, users, clock, ratings)
+    try:
+        session.begin()
+        session.flush()
+        for _ in range(max_steps):
+            if not session.running:
+                break
+
+            for simulated_user in simulated_users:
+                simulated_user.act(session)
+
+            # Если никто не действует, то сразу переводим часы на время пробуждения сессии.
+            if session.events.empty():
+                if session.wake_up_time is None:
+                    raise RuntimeError('Сессия ждет действий, которых не будет')
+
+                clock.advance_to(session.wake_up_time)
+
+            session.wait_for_event(0)
+            session.step()
+            session.flush()
+        else:
+            raise RuntimeError(f'Игра не закончилась за {max_steps} шагов')
+
+    finally:
+        for user in users:
+            STATES.pop(user.id, None)
+
+    return session
@@ -1,3 +1,4 @@
+import asyncio
 import threading
 import time
 from datetime import datetime, timedelta
@@ -9,18 +10,31 @@ class MessageScheduler(threading.Thread):
     def __init__(self, sleep_time: int):
         super().__init__()
         self.sleep_time: int = sleep_time
-        self.lock = threading.Lock()
 
     def run(self) -> None:
         while True:
             time.sleep(self.sleep_time)
 
-            with self.lock:
-                for state in settings.STATES.values():
-                    if state.buffer_messages and datetime.now() - state.last_buffer_update_time > timedelta(seconds=self.sleep_time):
-                        state.clear_buffer()
+            # Сессии добавляют и удаляют состояния компьютерных игроков во время игры, поэтому обходим копию.
+            for state in list(settings.STATES.values()):
+                if state.buffer_messages and datetime.now() - state.last_buffer_update_time > timedelta(seconds=self.sleep_time):
+                    state.clear_buffer()
 
 
 def start_message_scheduler() -> None:
     thread = MessageScheduler(settings.CLEAR_BUFFER_TIME)
     thread.start()
+
+
+async def run_async_message_scheduler(sleep_time: int = settings.CLEAR_BUFFER_TIME) -> None:
+    """
+    Очистка буфера сообщений в режиме asyncio.
+
+    :param sleep_time: как часто проверять буферы (сек.)
+    """
+    while True:
+        await asyncio.sleep(sleep_time)
+
+        for state in list(settings.STATES.values()):
+            if state.buffer_messages and datetime.now() - state.last_buffer_update_time > timedelta(seconds=sleep_time):
+                await state.async_clear_buffer()
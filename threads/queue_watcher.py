@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import telebot
+
+import settings
+from helpers.players_queue import PLAYERS_QUEUE_LOCK
+from objects.ai_player import create_ai_users
+from settings import PLAYERS_QUEUE
+from threads.session import take_players_from_queue, create_session
+
+if TYPE_CHECKING:
+    from telebot.async_telebot import AsyncTeleBot
+
+
+def take_players_with_ai(bot: telebot.TeleBot, waiting_times: dict[int: float]) -> list[telebot.types.User]:
+    """
+    Извлечение игроков из очереди с добавлением компьютерных игроков.
+
+    Если первый игрок в очереди ждет дольше AI_FILL_TIME, то свободные места в сессии
+    занимают компьютерные игроки. Иначе возвращается пустой список.
+
+    :param bot: основной объект бота
+    :param waiting_times: ключ - id пользователя; значение - когда пользователь замечен в очереди
+    :return: список пользователей
+    """
+    now = time.monotonic()
+    with PLAYERS_QUEUE_LOCK:
+        queue_ids = {user.id for user in PLAYERS_QUEUE}
+        for user_id in list(waiting_times):
+            if user_id not in queue_ids:
+                del waiting_times[user_id]
+
+        for user_id in queue_ids:
+            waiting_times.setdefault(user_id, now)
+
+        if not PLAYERS_QUEUE or now - waiting_times[PLAYERS_QUEUE[0].id] < settings.AI_FILL_TIME:
+            return list()
+
+        players = take_players_from_queue(min_players=1)
+        if not players:
+            return list()
+
+    for player in players:
+        waiting_times.pop(player.id, None)
+
+    return players + create_ai_users(bot, int(settings.TOTAL_SESSION_PLAYERS) - len(players))
+
+
+class QueueWatcher(threading.Thread):
+    """
+    Поток, который запускает сессии с компьютерными игроками, если игроки долго ждут в очереди.
+
+    Attributes:
+        bot (telebot.TeleBot): основной объект бота
+        sleep_time (float): как часто проверять очередь (сек.)
+        waiting_times (dict[int: float]): ключ - id пользователя; значение - когда пользователь замечен в очереди
+    """
+
+    def __init__(self, bot: telebot.TeleBot, sleep_time: float):
+        super().__init__(daemon=True)
+        self.bot: telebot.TeleBot = bot
+        self.sleep_time: float = sleep_time
+        self.waiting_times: dict[int: float] = dict()
+
+    def run(self) -> None:
+        while True:
+            time.sleep(self.sleep_time)
+
+            players = take_players_with_ai(self.bot, self.waiting_times)
+            if players:
+                create_session(self.bot, players)
+
+
+def start_queue_watcher(bot: telebot.TeleBot, sleep_time: float = 1) -> None:
+    if settings.AI_FILL_TIME > 0:
+        QueueWatcher(bot, sleep_time).start()
+
+
+async def run_async_queue_watcher(bot: 'AsyncTeleBot', sleep_time: float = 1) -> None:
+    """
+    Запуск сессий с компьютерными игроками в режиме asyncio.
+
+    :param bot: основной объект бота
+    :param sleep_time: как часто проверять очередь (сек.)
+    """
+    from threads.async_session import create_async_session
+
+    waiting_times = dict()
+    while settings.AI_FILL_TIME > 0:
+        await asyncio.sleep(sleep_time)
+
+        players = take_players_with_ai(bot, waiting_times)
+        if players:
+            create_async_session(bot, players)
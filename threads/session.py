@@ -1,4 +1,6 @@
+import abc
 import os
+import queue
 import random
 import threading
 import time
@@ -7,170 +9,438 @@ from typing import Optional, Any, Callable
 import telebot
 
 import settings
-from database.queries import update_or_add_rating, get_player_rating
-from helpers.sending_messages import send_message, send_photo
+from database.queries import add_ratings
+from helpers.fleet_notation import set_fleet, format_fleet
+from helpers.players_queue import PLAYERS_QUEUE_LOCK
+from helpers.sending_messages import send_message, send_photo, send_board
 from keyboards.inline.game import get_direction_keyboard, get_positions_keyboard
 from objects.state import get_state
-from settings import SHIPS, PLAYERS_QUEUE
+from settings import SHIPS, PLAYERS_QUEUE, STATES
 from objects.exceptions import PositionError, CellOpenedError, ShipNearbyError
 from objects.player import Player
+from objects.ai_player import AIPlayer
 from keyboards.reply.main_keyboard import keyboard_start, keyboard_play
+from threads.dispatcher import DISPATCHER
 
+# Максимальная длина подписи к фотографии в Telegram.
+MAX_CAPTION_LENGTH = 1024
 
-class Session(threading.Thread):
+
+class BaseSession(abc.ABC):
     """
     Сессия игры.
 
     При каждом запуске игры создается сессия, в которой идет игра до какого-то результата.
 
+    Сессия является машиной состояний: метод step обрабатывает состояния игроков
+    и складывает сообщения в пул, а отправкой сообщений, ожиданием событий и работой с базой данных
+    занимаются наследники (поток или корутина).
+
     Attributes:
-        running (bool): выполняться ли потоку (сессию)
+        running (bool): выполняться ли сессии
         bot (telebot.TeleBot): основной объект бота из библиотеки telebot
         players (list[Player]): список из игроков
         leading (Player): ведущий игрок
         total_players (int): количество игроков, участвующих в игре
         message_pool (dict[str: list[Message]]): пул сообщений для отправки
+        removed_players (list[Player]): удаленные из сессии игроки, которым еще нужно отправить итоги
+        rating_changes (list[tuple[Player, int]]): игроки, рейтинг которых нужно обновить, и число оставшихся игроков
+        standings (dict[int: int]): ключ - id выбывшего игрока; значение - сколько игроков осталось в игре после него
+        stage (str): этап игры (preparing, starting, playing)
+        wake_up_time (float): время, когда сессию нужно разбудить без событий от игроков
+        moves_count (int): количество сделанных ходов
+        clock (Callable[[], float]): часы сессии, по которым считается wake_up_time (сек.)
+        events: очередь событий от игроков (id пользователей, у которых сменилось состояние)
     """
-
-    def __init__(self, bot: telebot.TeleBot, players: list[telebot.types.User]):
-        super().__init__()
+    senders = {
+        'message': send_message,
+        'photo': send_photo,
+        'board': send_board,
+    }
+
+    def __init__(
+            self,
+            bot: telebot.TeleBot,
+            players: list[telebot.types.User],
+            clock: Callable[[], float] = time.monotonic,
+    ):
         self.running: bool = True
         self.bot: telebot.TeleBot = bot
-        self.players: list[Player] = [Player(user) for user in players]
+        self.players: list[Player] = [AIPlayer(user) if user.is_bot else Player(user) for user in players]
         self.spectators: list[Player] = list()
         self.leading: Optional[Player] = None
         self.total_players: int = len(players)
         self.message_pool: dict[str: list[tuple[Any]]] = dict()
+        self.removed_players: list[Player] = list()
+        self.rating_changes: list[tuple[Player, int]] = list()
+        self.standings: dict[int: int] = dict()
+        self.stage: str = 'preparing'
+        self.wake_up_time: Optional[float] = None
+        self.moves_count: int = 0
+        self.clock: Callable[[], float] = clock
+        self.events = self.create_events_queue()
+
+        # Привязываем состояния игроков к сессии, чтобы обработчики могли ее будить.
+        for player in self.players:
+            get_state(player.object.id).session = self
 
-    def run(self) -> None:
-        # подготовка к игре
-        self.prepare()
+    @abc.abstractmethod
+    def create_events_queue(self) -> Any:
+        """
+        Создание очереди событий, которую использует среда выполнения сессии.
+        """
+
+    def push_event(self, user_id: int) -> None:
+        """
+        Добавление события в очередь сессии.
 
-        # запуск игры
-        if self.running:
-            self.start_game()
+        :param user_id: id пользователя, у которого сменилось состояние
+        """
+        self.events.put_nowait(user_id)
 
-        # контроль игры
-        self.update()
+    def get_timeout(self) -> float:
+        """
+        Получение времени, которое сессия может ждать события от игроков.
+
+        :return: время ожидания (сек.)
+        """
+        if self.wake_up_time is None:
+            return settings.SESSION_EVENT_TIMEOUT
+
+        return max(0.0, min(settings.SESSION_EVENT_TIMEOUT, self.wake_up_time - self.clock()))
+
+    def step(self) -> None:
+        """
+        Один шаг сессии.
+
+        Проверяем состояния игроков в зависимости от этапа игры.
+        """
+        self.check_leaving_players()
+        if not self.running:
+            return
+
+        if self.stage == 'preparing':
+            self.process_preparation()
+
+            # Пока все не будут готовы к игре, игра не начнется.
+            if self.is_everyone_ready():
+                self.start_game()
+
+        elif self.stage == 'starting':
+            if self.clock() >= self.wake_up_time:
+                self.choose_leading()
+
+        elif self.stage == 'playing':
+            self.process_move()
 
     def send_message(self, player: Player, *args, **kwargs) -> None:
-        self.add_sending_to_pool(player, send_message, args, kwargs)
+        self.add_sending_to_pool(player, 'message', args, kwargs)
 
     def send_photo(self, player: Player, *args, **kwargs) -> None:
-        self.add_sending_to_pool(player, send_photo, args, kwargs)
+        self.add_sending_to_pool(player, 'photo', args, kwargs)
+
+    def add_sending_to_pool(self, player: Player, kind: str, args: tuple[Any], kwargs: dict['str': Any]) -> None:
+        # Компьютерным игрокам сообщения не отправляются.
+        if player.is_ai:
+            return
 
-    def add_sending_to_pool(self, player: Player, func: Callable, args: tuple[Any], kwargs: dict['str': Any]) -> None:
         player_message_pool = self.message_pool.setdefault(player.object.id, list())
-        player_message_pool.append((func, args, kwargs))
+        player_message_pool.append((kind, args, kwargs))
 
-    def send_player_pool(self, player: Player) -> None:
-        player_message_pool = self.message_pool.get(player.object.id)
-        if player_message_pool:
-            self.change_player_buffer(player, len(player_message_pool))
-            for func, args, kwargs in player_message_pool:
-                if 'reply_markup' not in kwargs:
-                    kwargs['reply_markup'] = keyboard_play()
+    def pop_player_pool(self, player: Player) -> list[tuple[Any]]:
+        """
+        Получение пула сообщений игрока для отправки.
 
-                func(self.bot, player.object.id, *args, **kwargs)
-                time.sleep(0.3)
+        Пул игрока очищается.
 
-            player_message_pool.clear()
+        :param player: игрок
+        :return: список из (вид сообщения, аргументы, именованные аргументы)
+        """
+        player_message_pool = self.message_pool.pop(player.object.id, None)
+        if not player_message_pool:
+            return list()
 
-    def send_pool(self) -> None:
-        for player in self.players + self.spectators:
-            self.send_player_pool(player)
+        player_message_pool = self.coalesce_pool(player_message_pool)
+
+        # В режиме редактирования все фотографии поля обновляют одно сообщение с полем.
+        if settings.EDIT_IN_PLACE:
+            player_message_pool = self.collapse_boards(player_message_pool)
+
+        for _, _, kwargs in player_message_pool:
+            if 'reply_markup' not in kwargs:
+                kwargs['reply_markup'] = keyboard_play()
+
+        return player_message_pool
+
+    @staticmethod
+    def coalesce_pool(player_message_pool: list[tuple[Any]]) -> list[tuple[Any]]:
+        """
+        Объединение фотографий с идущими за ними текстовыми сообщениями.
+
+        Текст сообщения становится подписью фотографии, а его клавиатура - клавиатурой фотографии.
+        Так вместо двух запросов к Telegram отправляется один.
+
+        :param player_message_pool: пул сообщений игрока
+        :return: пул сообщений игрока после объединения
+        """
+        coalesced_pool = list()
+        for kind, args, kwargs in player_message_pool:
+            if kind == 'message' and coalesced_pool and coalesced_pool[-1][0] == 'photo':
+                _, photo_args, photo_kwargs = coalesced_pool[-1]
+                caption = photo_kwargs.get('caption')
+                text = args[0] if args else None
+                if text:
+                    caption = f'{caption}\n\n{text}' if caption else text
+
+                # Объединяем, только если у сообщения нет своих параметров кроме клавиатуры,
+                # у фотографии и сообщения не две клавиатуры, а подпись помещается в лимит Telegram.
+                if (
+                        len(args) == 1
+                        and text
+                        and set(kwargs) <= {'reply_markup'}
+                        and not ('reply_markup' in kwargs and 'reply_markup' in photo_kwargs)
+                        and 'parse_mode' not in photo_kwargs
+                        and len(caption) <= MAX_CAPTION_LENGTH
+                ):
+                    coalesced_pool[-1] = ('photo', photo_args, {**photo_kwargs, **kwargs, 'caption': caption})
+                    continue
+
+            coalesced_pool.append((kind, args, kwargs))
+
+        return coalesced_pool
+
+    @staticmethod
+    def collapse_boards(player_message_pool: list[tuple[Any]]) -> list[tuple[Any]]:
+        """
+        Подготовка пула к редактированию сообщения с полем.
+
+        Каждая фотография поля редактирует одно и то же сообщение, поэтому от нескольких фотографий
+        осталась бы только подпись последней. Поэтому поле обновляется только последней фотографией,
+        а подписи предыдущих (например, результаты выстрелов) отправляются текстом на своих местах.
+
+        :param player_message_pool: пул сообщений игрока
+        :return: пул сообщений игрока, в котором последняя фотография стала полем
+        """
+        photo_indexes = [ind for ind, (kind, _, _) in enumerate(player_message_pool) if kind == 'photo']
+        if not photo_indexes:
+            return player_message_pool
+
+        collapsed_pool = list()
+        for ind, (kind, args, kwargs) in enumerate(player_message_pool):
+            if kind != 'photo':
+                collapsed_pool.append((kind, args, kwargs))
+
+            elif ind == photo_indexes[-1]:
+                collapsed_pool.append(('board', args, kwargs))
+
+            elif kwargs.get('caption'):
+                text_kwargs = {key: value for key, value in kwargs.items() if key == 'parse_mode'}
+                collapsed_pool.append(('message', (kwargs['caption'],), text_kwargs))
+
+        return collapsed_pool
+
+    def get_receivers(self) -> list[Player]:
+        """
+        Получение всех игроков, которым сессия может отправлять сообщения.
+
+        :return: список игроков
+        """
+        return self.players + self.spectators + self.removed_players
+
+    def pop_removed_players(self) -> list[Player]:
+        """
+        Получение удаленных игроков, которым уже отправлены итоги игры.
+
+        Состояния удаленных компьютерных игроков больше не нужны, поэтому удаляются.
+
+        :return: список игроков (без компьютерных)
+        """
+        removed_players = [player for player in self.removed_players if not player.is_ai]
+        for player in self.removed_players:
+            if player.is_ai:
+                STATES.pop(player.object.id, None)
+
+        self.removed_players.clear()
+        return removed_players
+
+    @staticmethod
+    def get_buffer_count(player_message_pool: list[tuple[Any]]) -> int:
+        """
+        Получение размера буфера для пула сообщений.
+
+        Сообщение с полем не хранится в буфере, поэтому не учитывается.
+
+        :param player_message_pool: пул сообщений игрока
+        :return: размер буфера
+        """
+        return max(1, sum(kind != 'board' for kind, _, _ in player_message_pool))
 
     @staticmethod
     def change_player_buffer(player: Player, buffer_count: int) -> None:
         player_state = get_state(player.object.id)
         player_state.buffer_count = buffer_count
 
-    def prepare(self) -> None:
+    @staticmethod
+    def release_player(player: Player) -> None:
+        """
+        Возвращение удаленному игроку обычного буфера после отправки ему итогов игры.
+
+        :param player: игрок
+        """
+        player_state = get_state(player.object.id)
+        player_state.buffer_count = 1
+        player_state.release_board_message()
+
+    def begin(self) -> None:
         """
         Подготовка к игре.
         """
         # Просим всех игроков установить первый корабль.
         for player in self.players:
             player_state = get_state(player.object.id)
+
+            # Компьютерные игроки расставляют корабли сразу.
+            if player.is_ai:
+                player.set_random_ships()
+                player.ready = True
+                player_state.name = 'waiting_for_players'
+                continue
+
             player_state.name = 'setting_ship_position_' + SHIPS[0]
             self.ask_to_set_the_ship(player, SHIPS[0])
 
-        # Пока все не будут готовы к игре, игра не начнется.
-        while not self.is_everyone_ready():
-            time.sleep(0.1)
+    def process_preparation(self) -> None:
+        """
+        Обработка состояний игроков, которые устанавливают корабли.
+        """
+        for player in self.players:
+            player_state = get_state(player.object.id)
 
-            self.send_pool()
-            self.check_leaving_players()
+            if player_state.name == 'auto_placing_ships':
+                self.auto_place_ships(player)
+                continue
+
+            if player_state.name == 'checking_fleet':
+                self.place_fleet(player, player_state.message_storage.get('fleet', ''))
+                continue
+
+            for count, ship in enumerate(SHIPS):
+                if player_state.name == 'check_ship_position_' + ship:
+                    # Позицию читаем только после проверки состояния: обработчик записывает ее до смены состояния.
+                    position = player_state.message_storage.get('position')
+                    try:
+                        cell = player.get_cell(position)
+                    except PositionError:
+                        self.ask_to_set_the_ship(player, ship)
+                        self.send_message(player, 'Неверная клетка')
+                        player_state.name = 'setting_ship_position_' + ship
+                        break
 
-            for player in self.players:
-                player_state = get_state(player.object.id)
-                position = player_state.message_storage.get('position')
-                direction = player_state.message_storage.get('direction')
-                for count, ship in enumerate(SHIPS):
-                    if player_state.name == 'check_ship_position_' + ship:
-                        try:
-                            cell = player.get_cell(position)
-                        except PositionError:
-                            self.ask_to_set_the_ship(player, ship)
-                            self.send_message(player, 'Неверная клетка')
-                            player_state.name = 'setting_ship_position_' + ship
-                            break
+                    if not player.valid_cell(cell):
+                        player_state.name = 'setting_ship_position_' + ship
+                        self.ask_to_set_the_ship(player, ship)
+                        self.send_message(player, 'Нельзя поставить корабль рядом с другим. Попробуйте снова.')
+                        break
 
-                        if not player.valid_cell(cell):
+                    if player_state.name.endswith('1'):
+                        try:
+                            player.set_ship(position, ship)
+                        except ShipNearbyError:
                             player_state.name = 'setting_ship_position_' + ship
                             self.ask_to_set_the_ship(player, ship)
                             self.send_message(player, 'Нельзя поставить корабль рядом с другим. Попробуйте снова.')
-                            break
-
-                        if player_state.name.endswith('1'):
-                            try:
-                                player.set_ship(position, ship)
-                            except ShipNearbyError:
-                                player_state.name = 'setting_ship_position_' + ship
-                                self.ask_to_set_the_ship(player, ship)
-                                self.send_message(player, 'Нельзя поставить корабль рядом с другим. Попробуйте снова.')
-
-                            if player.all_ships_on_field():
-                                player.ready = True
-                                player_state.name = 'waiting_for_players'
-                                self.send_photo(
-                                    player,
-                                    player.draw_player_field(),
-                                    caption='Вы готовы к игре. Дождитесь всех игроков.',
-                                )
-                            else:
-                                next_ship = SHIPS[count + 1]
-                                player_state.name = 'setting_ship_position_' + next_ship
-                                self.ask_to_set_the_ship(player, next_ship)
+
+                        if player.all_ships_on_field():
+                            self.finish_preparation(player)
                         else:
-                            player_state.name = 'setting_ship_direction_' + ship
-                            self.ask_to_choose_a_direction(player, position)
+                            next_ship = SHIPS[count + 1]
+                            player_state.name = 'setting_ship_position_' + next_ship
+                            self.ask_to_set_the_ship(player, next_ship)
+                    else:
+                        player_state.name = 'setting_ship_direction_' + ship
+                        self.ask_to_choose_a_direction(player, position)
+
+                elif player_state.name == 'check_ship_direction_' + ship:
+                    position = player_state.message_storage.get('position')
+                    direction = player_state.message_storage.get('direction')
+                    try:
+                        player.set_ship(position, ship, direction=direction)
+                    except (PositionError, ShipNearbyError, ValueError) as exc:
+                        player_state.name = 'setting_ship_direction_' + ship
+                        self.ask_to_choose_a_direction(player, position)
+
+                        if isinstance(exc, PositionError):
+                            self.send_message(player, 'Нельзя поставить корабль на несуществующую клетку. Попробуйте снова.')
+
+                        elif isinstance(exc, ShipNearbyError):
+                            self.send_message(player, 'Нельзя поставить корабль рядом с другим. Попробуйте снова.')
 
-                    elif player_state.name == 'check_ship_direction_' + ship:
-                        try:
-                            player.set_ship(position, ship, direction=direction)
-                        except (PositionError, ShipNearbyError, ValueError) as exc:
-                            player_state.name = 'setting_ship_direction_' + ship
-                            self.ask_to_choose_a_direction(player, position)
+                        elif isinstance(exc, ValueError):
+                            self.send_message(player, 'Передано неверное направление.')
 
-                            if isinstance(exc, PositionError):
-                                self.send_message(player, 'Нельзя поставить корабль на несуществующую клетку. Попробуйте снова.')
+                        break
 
-                            elif isinstance(exc, ShipNearbyError):
-                                self.send_message(player, 'Нельзя поставить корабль рядом с другим. Попробуйте снова.')
+                    next_ship = SHIPS[count + 1]
+                    player_state.name = 'setting_ship_position_' + next_ship
+                    self.ask_to_set_the_ship(player, next_ship)
 
-                            elif isinstance(exc, ValueError):
-                                self.send_message(player, 'Передано неверное направление.')
+                elif player_state.name == 'cancel_ship_direction_' + ship:
+                    player_state.name = 'setting_ship_position_' + ship
+                    self.ask_to_set_the_ship(player, ship)
 
-                            break
+    def auto_place_ships(self, player: Player) -> None:
+        """
+        Случайная расстановка оставшихся кораблей игрока.
 
-                        next_ship = SHIPS[count + 1]
-                        player_state.name = 'setting_ship_position_' + next_ship
-                        self.ask_to_set_the_ship(player, next_ship)
+        :param player: игрок
+        """
+        if player.set_random_ships():
+            self.finish_preparation(player, 'Корабли расставлены.')
+            return
 
-                    elif player_state.name == 'cancel_ship_direction_' + ship:
-                        player_state.name = 'setting_ship_position_' + ship
-                        self.ask_to_set_the_ship(player, ship)
+        # Если оставшиеся корабли не помещаются рядом с уже установленными, то продолжаем расстановку вручную.
+        ship = next(name for name, cells in player.ships.items() if not cells)
+        get_state(player.object.id).name = 'setting_ship_position_' + ship
+        self.ask_to_set_the_ship(player, ship)
+        self.send_message(player, 'Не удалось расставить оставшиеся корабли. Установите их вручную.')
+
+    def place_fleet(self, player: Player, text: str) -> None:
+        """
+        Расстановка всех кораблей игрока по записи из одного сообщения.
+
+        :param player: игрок
+        :param text: запись расстановки
+        """
+        errors = set_fleet(player, text)
+        if not errors:
+            self.finish_preparation(player, 'Корабли расставлены.')
+            return
+
+        # Поле игрока не изменилось, поэтому продолжаем с первого неустановленного корабля.
+        ship = next(name for name, cells in player.ships.items() if not cells)
+        get_state(player.object.id).name = 'setting_ship_position_' + ship
+        self.ask_to_set_the_ship(player, ship)
+        self.send_message(player, 'Не удалось расставить корабли:\n' + '\n'.join(errors))
+
+    def finish_preparation(self, player: Player, text: str = '') -> None:
+        """
+        Завершение расстановки кораблей игрока.
+
+        Вместе с полем игрок получает запись своей расстановки, чтобы в следующий раз отправить ее одним сообщением.
+
+        :param player: игрок
+        :param text: текст перед сообщением о готовности
+        """
+        player.ready = True
+        get_state(player.object.id).name = 'waiting_for_players'
+        self.send_photo(
+            player,
+            player.draw_player_field(),
+            caption=(
+                f'{text} Вы готовы к игре. Дождитесь всех игроков.\n'
+                f'Ваша расстановка: {format_fleet(player)}'
+            ).strip(),
+        )
 
     def ask_to_set_the_ship(self, player: Player, ship_name: str) -> None:
         """
@@ -186,7 +456,7 @@ class Session(threading.Thread):
         self.send_message(
             player,
             f'Установка {ship_name[-1]} размерного корабля',
-            reply_markup=get_positions_keyboard(player),
+            reply_markup=get_positions_keyboard(player, auto_place=True),
         )
 
     def ask_to_choose_a_direction(self, player: Player, position: str) -> None:
@@ -221,10 +491,16 @@ class Session(threading.Thread):
                 f'Игра начинается.\nВаш оппонент: {player.opponent}',
             )
 
-        self.send_pool()
+        # Ждем 3 секунды, чтобы игроки прочитали сообщение о старте игры.
+        self.stage = 'starting'
+        self.wake_up_time = self.clock() + 3
 
-        # Засыпаем, чтобы игроки прочитали сообщение о старте игры.
-        time.sleep(3)
+    def choose_leading(self) -> None:
+        """
+        Выбор первого ведущего игрока.
+        """
+        self.stage = 'playing'
+        self.wake_up_time = None
 
         if self.players:
             # Случайным образом определяем ведущего игрока.
@@ -238,50 +514,52 @@ class Session(threading.Thread):
             # Предупреждаем игрока об атаке.
             self.warn_player_about_an_attack()
 
-            self.send_pool()
-
-    def update(self) -> None:
+    def process_move(self) -> None:
         """
-        Обновление сессии.
-
-        Здесь происходит проверка состояний всех игроков.
-        Состояния ведущего игрока проверяются отдельно.
+        Обработка хода ведущего игрока.
         """
-        while self.running:
-            time.sleep(0.3)
+        # Получаем состояние ведущего игрока
+        leading_player_state = get_state(self.leading.object.id)
 
-            self.check_leaving_players()
+        # Компьютерный игрок ходит, когда наступит время его хода.
+        if (
+                self.leading.is_ai
+                and leading_player_state.name == 'making_move'
+                and (self.wake_up_time is None or self.clock() >= self.wake_up_time)
+        ):
+            self.wake_up_time = None
+            leading_player_state.message_storage['position'] = self.leading.choose_position()
+            leading_player_state.name = 'check_move'
 
-            # Получаем состояние ведущего игрока
-            leading_player_state = get_state(self.leading.object.id)
+        # Если у ведущего игрока состояние check_move, то пробуем раскрыть клетку у соперника.
+        if leading_player_state.name == 'check_move':
+            position = leading_player_state.message_storage.get('position')
+            try:
+                # Пробуем открыть клетку соперника. Если мы успешно ее открыли, то узнаем корабль это или нет.
+                is_ship = self.leading.open_opponent_cell(position)
+            except (PositionError, CellOpenedError) as exc:
+                self.ask_to_make_a_move()
 
-            # Если у ведущего игрока состояние check_move, то пробуем раскрыть клетку у соперника.
-            if leading_player_state.name == 'check_move':
-                position = leading_player_state.message_storage.get('position')
-                try:
-                    # Пробуем открыть клетку соперника. Если мы успешно ее открыли, то узнаем корабль это или нет.
-                    is_ship = self.leading.open_opponent_cell(position)
-                except (PositionError, CellOpenedError) as exc:
-                    self.ask_to_make_a_move()
-
-                    # Так как произошла ошибка, то меняем состояние на making_move,
-                    # чтобы игрок смог попробовать еще раз сделать ход.
-                    leading_player_state.name = 'making_move'
-
-                    # Если клетки, который ввел пользователь, не существует,
-                    # то отправляем ему соответствующее сообщение.
-                    if isinstance(exc, PositionError):
-                        self.send_message(self.leading, 'Неверная клетка.')
-
-                    # Если клетка, который ввел пользователь, уже открыта,
-                    # то отправляем ему соответствующее сообщение.
-                    elif isinstance(exc, CellOpenedError):
-                        self.send_message(self.leading, 'Эта клетка уже открыта.')
-
-                    self.send_player_pool(self.leading)
-                    continue
+                # Так как произошла ошибка, то меняем состояние на making_move,
+                # чтобы игрок смог попробовать еще раз сделать ход.
+                leading_player_state.name = 'making_move'
 
-                # Отправляем ведущему игроку поле противника.
+                # Если клетки, который ввел пользователь, не существует,
+                # то отправляем ему соответствующее сообщение.
+                if isinstance(exc, PositionError):
+                    self.send_message(self.leading, 'Неверная клетка.')
+
+                # Если клетка, который ввел пользователь, уже открыта,
+                # то отправляем ему соответствующее сообщение.
+                elif isinstance(exc, CellOpenedError):
+                    self.send_message(self.leading, 'Эта клетка уже открыта.')
+
+                return
+
+            self.moves_count += 1
+
+            # Отправляем ведущему игроку поле противника.
+            if not self.leading.is_ai:
                 format_lead_message = 'Вы попали' if is_ship else 'Вы не попали'
                 self.send_photo(
                     self.leading,
@@ -289,30 +567,31 @@ class Session(threading.Thread):
                     caption=f'{format_lead_message} в корабль игрока {self.leading.opponent}',
                 )
 
-                # Отправляем противнику ведущего игрока свое поле.
-                self.show_move_result_to_opponent(is_ship)
-
-                # Отправляем поле оппонента ведущего игрока всем игрокам, чтобы они могли наблюдать за игрой, пока ждут свой ход.
-                self.show_all_players_the_field(is_ship)
+            # Отправляем противнику ведущего игрока свое поле.
+            self.show_move_result_to_opponent(is_ship)
 
-                # Если игрок проиграл, то отправляем соответствующее сообщение и удаляем его из сессии.
-                opponent = self.leading.opponent
-                if opponent.lost:
-                    self.send_message(opponent, 'Вы проиграли.', reply_markup=keyboard_start())
-                    self.move_player_to_spectators(opponent)
+            # Отправляем поле оппонента ведущего игрока всем игрокам, чтобы они могли наблюдать за игрой, пока ждут свой ход.
+            self.show_all_players_the_field(is_ship)
 
-                # Изменяем ведущего игрока, если игроков в сессии больше одного и если он не попал,
-                # иначе просим ведущего игрока сделать еще один ход.
-                if len(self.players) > 1 and not is_ship:
-                    self.change_leading()
+            # Если игрок проиграл, то отправляем соответствующее сообщение и удаляем его из сессии.
+            opponent = self.leading.opponent
+            if opponent.lost:
+                self.send_message(opponent, 'Вы проиграли.', reply_markup=keyboard_start())
+                self.move_player_to_spectators(opponent)
 
-                elif len(self.players) > 1:
-                    leading_player_state.name = 'making_move'
-                    self.ask_to_make_a_move(send_field=False)
+            # Изменяем ведущего игрока, если игроков в сессии больше одного и если он не попал,
+            # иначе просим ведущего игрока сделать еще один ход.
+            if len(self.players) > 1 and not is_ship:
+                self.change_leading()
 
-            self.send_pool()
+            elif len(self.players) > 1:
+                leading_player_state.name = 'making_move'
+                self.ask_to_make_a_move(send_field=False)
 
     def show_move_result_to_opponent(self, is_ship: bool) -> None:
+        if self.leading.opponent.is_ai:
+            return
+
         format_opponent_message = 'попал' if is_ship else 'не попал'
         self.send_photo(
             self.leading.opponent,
@@ -329,7 +608,7 @@ class Session(threading.Thread):
         dynamic_text = 'попал' if hit else 'не попал'
         message_text = f'Игрок {self.leading} {dynamic_text} в корабль игрока {self.leading.opponent}'
         for player in self.players + self.spectators:
-            if player not in (self.leading, self.leading.opponent):
+            if player not in (self.leading, self.leading.opponent) and not player.is_ai:
                 self.send_photo(
                     player,
                     self.leading.draw_player_field(opponent=True),
@@ -374,6 +653,11 @@ class Session(threading.Thread):
 
         :param send_field: отправлять ли ведущему игроку поле соперника
         """
+        # Компьютерному игроку ничего не отправляем, а назначаем время его хода.
+        if self.leading.is_ai:
+            self.wake_up_time = self.clock() + settings.AI_MOVE_DELAY
+            return
+
         if send_field:
             # Отправка поля оппонента.
             self.send_photo(
@@ -445,13 +729,15 @@ class Session(threading.Thread):
         user_state = get_state(removing_player.object.id)
         user_state.name = 'main'
         user_state.in_game = False
+        user_state.session = None
 
-        # Обновляем рейтинг игрока.
-        self.update_rating(removing_player)
+        # Запоминаем, что нужно обновить рейтинг игрока и отправить ему итоги игры.
+        # Место наблюдателя определилось, когда он выбыл из игры. Рейтинг компьютерных игроков не хранится.
+        if not removing_player.is_ai:
+            players_left = self.standings.get(removing_player.object.id, len(self.players))
+            self.rating_changes.append((removing_player, players_left))
 
-        # Отправляем пользователю итоги игры, а затем отправляем ему сообщение
-        self.send_player_pool(removing_player)
-        self.change_player_buffer(removing_player, buffer_count=1)
+        self.removed_players.append(removing_player)
 
         # Проверяем количество оставшихся игроков.
         self.check_number_of_players()
@@ -473,8 +759,9 @@ class Session(threading.Thread):
                 format_string = 'проиграл' if moving_player.lost else 'покинул игру'
                 self.send_message(player, f'Игрок {moving_player} {format_string}')
 
-        # Удаляем игрока.
+        # Удаляем игрока и запоминаем его место.
         self.players.remove(moving_player)
+        self.standings[moving_player.object.id] = len(self.players)
 
         moving_player_state = get_state(moving_player.object.id)
         moving_player_state.name = 'watching_the_game'
@@ -485,27 +772,46 @@ class Session(threading.Thread):
         # Проверяем количество оставшихся игроков.
         self.check_number_of_players()
 
-    def update_rating(self, player: Player) -> None:
+    def get_rating_change(self, players_left: int) -> int:
         """
-        Обновление рейтинга игрока.
+        Получение изменения рейтинга игрока.
 
-        :param player: игрок
+        Первый выбывший игрок теряет единицу рейтинга, но рейтинг не опускается ниже нуля.
+
+        :param players_left: количество игроков, оставшихся в игре после выбывания игрока
+        :return: изменение рейтинга
         """
-        player_rating = get_player_rating(player.object)
-        if self.total_players - 1 == len(self.players) and player_rating > 0:
-            update_player_rating = -1
-        else:
-            update_player_rating = self.total_players - len(self.players) - 1
+        if self.total_players - 1 == players_left:
+            return -1
 
-        update_or_add_rating(player.object, update_player_rating)
+        return self.total_players - players_left - 1
+
+    def pop_rating_changes(self) -> list[tuple[telebot.types.User, int]]:
+        """
+        Получение изменений рейтинга по итогам игры.
+
+        Пока игра идет, изменения копятся, чтобы после ее окончания сохранить их все разом.
+
+        :return: пользователи и изменения их рейтинга (пустой список, если игра еще идет)
+        """
+        if self.running or not self.rating_changes:
+            return list()
+
+        changes = [
+            (player.object, self.get_rating_change(players_left))
+            for player, players_left in self.rating_changes
+        ]
+        self.rating_changes.clear()
+        return changes
 
     def check_number_of_players(self) -> None:
         """
         Проверка числа игроков в сессии.
 
-        Если игроков в сессии меньше 2, то заканчиваем игру и подводим итоги.
+        Если игроков в сессии меньше 2 или в ней остались только компьютерные игроки,
+        то заканчиваем игру и подводим итоги.
         """
-        if len(self.players) < 2:
+        if len(self.players) < 2 or all(player.is_ai for player in self.players + self.spectators):
             self.finish_game()
 
     def finish_game(self) -> None:
@@ -534,6 +840,100 @@ class Session(threading.Thread):
         self.running = False
 
 
+class SyncSession(BaseSession):
+    """
+    Сессия игры, которая отправляет сообщения и работает с базой данных блокирующими вызовами.
+    """
+
+    def create_events_queue(self) -> queue.Queue:
+        return queue.Queue()
+
+    def wait_for_event(self, timeout: float) -> None:
+        """
+        Ожидание события от игроков.
+
+        Блокирует поток, пока не придет событие или не истечет timeout.
+        Все накопившиеся события забираются из очереди разом,
+        так как сессия все равно проверяет состояния всех игроков.
+
+        :param timeout: максимальное время ожидания (сек.)
+        """
+        try:
+            self.events.get(timeout=timeout)
+        except queue.Empty:
+            return
+
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                break
+
+    def send_player_pool(self, player: Player) -> None:
+        """
+        Передача пула сообщений игрока диспетчеру.
+
+        Диспетчер отправляет сообщения в порядке очереди и с учетом ограничений Telegram,
+        поэтому сессия не ждет отправки.
+
+        :param player: игрок
+        """
+        player_message_pool = self.pop_player_pool(player)
+        if not player_message_pool:
+            return
+
+        chat_id = player.object.id
+        DISPATCHER.call(chat_id, self.change_player_buffer, player, self.get_buffer_count(player_message_pool))
+        for kind, args, kwargs in player_message_pool:
+            DISPATCHER.send(chat_id, self.senders[kind], self.bot, chat_id, *args, **kwargs)
+
+    def send_pool(self) -> None:
+        for player in self.get_receivers():
+            self.send_player_pool(player)
+
+        # После итогов игры возвращаем удаленным игрокам обычный размер буфера.
+        for player in self.pop_removed_players():
+            DISPATCHER.call(player.object.id, self.release_player, player)
+
+    def update_ratings(self) -> None:
+        """
+        Обновление рейтинга игроков одной транзакцией после окончания игры.
+        """
+        changes = self.pop_rating_changes()
+        if changes:
+            add_ratings(changes)
+
+    def flush(self) -> None:
+        """
+        Отправка всех сообщений из пула и обновление рейтинга.
+        """
+        self.update_ratings()
+        self.send_pool()
+
+
+class Session(SyncSession, threading.Thread):
+    """
+    Сессия игры в отдельном потоке.
+    """
+
+    def __init__(self, bot: telebot.TeleBot, players: list[telebot.types.User]):
+        threading.Thread.__init__(self)
+        SyncSession.__init__(self, bot, players)
+
+    def run(self) -> None:
+        # подготовка к игре
+        self.begin()
+
+        # контроль игры
+        while self.running:
+            self.flush()
+            self.wait_for_event(self.get_timeout())
+            self.step()
+
+        # отправка итогов игры
+        self.flush()
+
+
 def check_queue(bot: telebot.TeleBot) -> None:
     """
     Проверка очереди игроков.
@@ -541,25 +941,53 @@ def check_queue(bot: telebot.TeleBot) -> None:
     После того как пользователь ввел команду /play, проверяем очередь.
     Если игроков достаточное количество, то запускаем с ними сессию.
     """
+    players = take_players_from_queue()
+    if players:
+        create_session(bot, players)
+
+
+def take_players_from_queue(min_players: Optional[int] = None) -> list[telebot.types.User]:
+    """
+    Извлечение игроков для новой сессии из очереди.
+
+    Если игроков в очереди недостаточно, то возвращается пустой список.
+
+    :param min_players: сколько игроков должно быть в очереди (по умолчанию - количество игроков сессии)
+    :return: список пользователей
+    """
     # total_players - количество необходимых игроков для создания сессии.
     total_players = int(settings.TOTAL_SESSION_PLAYERS)
-    if len(PLAYERS_QUEUE) >= total_players:
-        for player in PLAYERS_QUEUE[:total_players]:
+    if min_players is None:
+        min_players = total_players
+
+    # Выбор игроков и их удаление из очереди не должны перемежаться с изменениями очереди в других потоках.
+    with PLAYERS_QUEUE_LOCK:
+        if not PLAYERS_QUEUE or len(PLAYERS_QUEUE) < min_players:
+            return list()
+
+        players = PLAYERS_QUEUE[:total_players]
+        for player in players:
 
             # Перед созданием сессии устанавливаем флаг in_game=True, чтобы знать, что пользователь в игре.
             state = get_state(player.id)
             state.in_game = True
 
-        # Создаем сессию.
-        create_session(bot, PLAYERS_QUEUE[:total_players])
+        # Удаляем игроков из очереди, с которыми создаем сессию.
+        del PLAYERS_QUEUE[:len(players)]
 
-        # Удаляем игроков из очереди, с которыми создали сессию.
-        del PLAYERS_QUEUE[:total_players]
+    return players
 
 
 def create_session(bot: telebot.TeleBot, players: list[telebot.types.User]) -> None:
     """
     Создание и запуск сессии.
+
+    Если выбран режим pool, то сессия выполняется общим пулом потоков, иначе в своем потоке.
     """
+    if settings.RUNTIME == 'pool':
+        from threads.session_scheduler import create_pooled_session
+        create_pooled_session(bot, players)
+        return
+
     session = Session(bot, players)
     session.start()
@@ -0,0 +1,192 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+import telebot
+
+import settings
+from threads.session import SyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession(SyncSession):
+    """
+    Сессия игры, которую выполняет общий пул потоков.
+
+    Сессия не имеет своего потока: планировщик вызывает run_once,
+    когда у сессии есть события от игроков или наступило время ее разбудить.
+
+    Attributes:
+        scheduler (SessionScheduler): планировщик, который выполняет сессию
+        started (bool): была ли выполнена подготовка к игре
+        queued (bool): стоит ли сессия в очереди на выполнение
+        executing (bool): выполняется ли сессия прямо сейчас
+        dirty (bool): пришло ли событие во время выполнения сессии
+        deadline (float): когда сессию нужно разбудить без событий от игроков
+    """
+
+    def __init__(self, bot: telebot.TeleBot, players: list[telebot.types.User], scheduler: 'SessionScheduler'):
+        self.scheduler: SessionScheduler = scheduler
+        self.started: bool = False
+        self.queued: bool = False
+        self.executing: bool = False
+        self.dirty: bool = False
+        self.deadline: Optional[float] = None
+        super().__init__(bot, players)
+
+    def push_event(self, user_id: int) -> None:
+        super().push_event(user_id)
+        self.scheduler.wake(self)
+
+    def run_once(self) -> None:
+        """
+        Один шаг сессии с отправкой всех накопившихся сообщений.
+        """
+        if not self.started:
+            self.started = True
+            self.begin()
+
+        else:
+            # Забираем все накопившиеся события без ожидания.
+            self.wait_for_event(0)
+            self.step()
+
+        self.flush()
+
+
+class SessionScheduler:
+    """
+    Планировщик сессий.
+
+    Владеет фиксированным числом потоков и по очереди выполняет на них шаги множества сессий.
+    Сессия попадает в очередь на выполнение только при событии от игрока или по таймеру,
+    поэтому число потоков не зависит от количества игр.
+
+    Attributes:
+        workers_count (int): количество рабочих потоков
+        ready (queue.Queue): очередь сессий, готовых к выполнению
+        timers (list[tuple[float, int, PooledSession]]): куча таймеров сессий
+        condition (threading.Condition): условие для ожидания ближайшего таймера
+        sessions (set[PooledSession]): выполняющиеся сессии
+    """
+
+    def __init__(self, workers_count: int):
+        self.workers_count: int = workers_count
+        self.ready: queue.Queue = queue.Queue()
+        self.timers: list[tuple[float, int, PooledSession]] = list()
+        self.condition: threading.Condition = threading.Condition()
+        self.sessions: set[PooledSession] = set()
+        self._counter = itertools.count()
+
+    def start(self) -> None:
+        for num in range(self.workers_count):
+            threading.Thread(target=self.work, name=f'session-worker-{num}', daemon=True).start()
+
+        threading.Thread(target=self.watch_timers, name='session-timers', daemon=True).start()
+
+    def add_session(self, session: PooledSession) -> None:
+        """
+        Добавление сессии в планировщик.
+
+        :param session: сессия
+        """
+        with self.condition:
+            self.sessions.add(session)
+
+        self.wake(session)
+
+    def wake(self, session: PooledSession) -> None:
+        """
+        Постановка сессии в очередь на выполнение.
+
+        Если сессия уже в очереди, то ничего не делаем.
+        Если сессия сейчас выполняется, то отмечаем, что ее нужно выполнить еще раз.
+
+        :param session: сессия
+        """
+        with self.condition:
+            if session.queued:
+                return
+
+            if session.executing:
+                session.dirty = True
+                return
+
+            session.queued = True
+            session.deadline = None
+
+        self.ready.put(session)
+
+    def work(self) -> None:
+        """
+        Выполнение сессий из очереди одним рабочим потоком.
+        """
+        while True:
+            session = self.ready.get()
+            with self.condition:
+                session.queued = False
+                session.executing = True
+
+            try:
+                session.run_once()
+            except Exception:
+                logger.exception('Ошибка в сессии')
+                session.stop_session()
+
+            with self.condition:
+                session.executing = False
+
+                if not session.running:
+                    self.sessions.discard(session)
+                    continue
+
+                if session.dirty:
+                    session.dirty = False
+                    session.queued = True
+                    self.ready.put(session)
+                    continue
+
+                session.deadline = time.monotonic() + session.get_timeout()
+                heapq.heappush(self.timers, (session.deadline, next(self._counter), session))
+                self.condition.notify()
+
+    def watch_timers(self) -> None:
+        """
+        Пробуждение сессий, у которых наступило время таймера.
+        """
+        while True:
+            with self.condition:
+                while not self.timers or self.timers[0][0] > time.monotonic():
+                    timeout = self.timers[0][0] - time.monotonic() if self.timers else None
+                    self.condition.wait(timeout)
+
+                deadline, _, session = heapq.heappop(self.timers)
+
+                # Таймер устарел, если сессию уже разбудили или переназначили ей время.
+                if session.deadline != deadline:
+                    continue
+
+            self.wake(session)
+
+
+# Планировщик сессий. Создается при запуске бота в режиме pool.
+SCHEDULER: Optional[SessionScheduler] = None
+
+
+def start_session_scheduler() -> None:
+    global SCHEDULER
+
+    SCHEDULER = SessionScheduler(settings.SESSION_WORKERS)
+    SCHEDULER.start()
+
+
+def create_pooled_session(bot: telebot.TeleBot, players: list[telebot.types.User]) -> None:
+    """
+    Создание сессии и передача ее планировщику.
+    """
+    SCHEDULER.add_session(PooledSession(bot, players, SCHEDULER))
@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+
+import telebot
+from telebot.types import Update
+
+logger = logging.getLogger(__name__)
+
+# Поля обновления, в которых есть пользователь. Обновления одного пользователя выполняются строго по очереди.
+USER_UPDATE_FIELDS = ('message', 'callback_query', 'edited_message', 'inline_query', 'chosen_inline_result')
+
+
+def get_update_user_id(update: Update) -> Optional[int]:
+    """
+    Получение id пользователя, от которого пришло обновление.
+
+    :param update: обновление
+    :return: id пользователя или None, если в обновлении нет пользователя
+    """
+    for field in USER_UPDATE_FIELDS:
+        content = getattr(update, field, None)
+        if content is not None and content.from_user is not None:
+            return content.from_user.id
+
+    return None
+
+
+class UpdateWorkerPool:
+    """
+    Пул потоков, которые выполняют обработчики полученных обновлений.
+
+    Обновления распределяются по потокам по id пользователя: обновления одного пользователя
+    выполняются по очереди в одном потоке, а обновления разных пользователей - параллельно.
+    Поэтому два быстрых нажатия одного пользователя не обрабатываются одновременно.
+    Общие для всех пользователей данные обработчики защищают сами: очередь игроков - блокировкой PLAYERS_QUEUE_LOCK.
+    У каждого потока своя ограниченная очередь, поэтому при пиковой нагрузке память не растет без предела.
+
+    Attributes:
+        process (Callable[[list[Update]], None]): функция, которая выполняет обработчики обновлений
+        workers_count (int): количество рабочих потоков
+        queues (list[queue.Queue]): очереди обновлений рабочих потоков
+    """
+
+    def __init__(self, process: Callable[[list[Update]], None], workers_count: int, queue_size: int):
+        self.process: Callable[[list[Update]], None] = process
+        self.workers_count: int = max(workers_count, 1)
+        shard_size = max(-(-queue_size // self.workers_count), 1)
+        self.queues: list[queue.Queue] = [queue.Queue(shard_size) for _ in range(self.workers_count)]
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+
+            self._started = True
+            for num, updates in enumerate(self.queues):
+                threading.Thread(target=self.work, args=(updates,), name=f'update-worker-{num}', daemon=True).start()
+
+    def get_queue(self, update: Update) -> queue.Queue:
+        """
+        Получение очереди потока, который выполняет обработчики обновления.
+
+        :param update: обновление
+        :return: очередь
+        """
+        user_id = get_update_user_id(update)
+        key = user_id if user_id is not None else update.update_id
+        return self.queues[key % self.workers_count]
+
+    def put(self, update: Update, timeout: Optional[float] = None) -> bool:
+        """
+        Добавление обновления в очередь.
+
+        :param update: обновление
+        :param timeout: сколько ждать места в очереди (сек.); None - ждать, пока место не появится
+        :return: добавлено ли обновление
+        """
+        try:
+            self.get_queue(update).put(update, timeout=timeout)
+        except queue.Full:
+            return False
+
+        return True
+
+    def work(self, updates: queue.Queue) -> None:
+        while True:
+            update = updates.get()
+            try:
+                self.process([update])
+            except Exception:
+                logger.exception('Ошибка при обработке обновления')
+
+
+class ShardedTeleBot(telebot.TeleBot):
+    """
+    Бот, который выполняет обработчики в пуле потоков с разбиением по пользователям.
+
+    Заменяет пул потоков telebot, в котором обновления одного пользователя могут выполняться одновременно.
+    Используется и при polling, и при webhook.
+
+    Attributes:
+        update_pool (UpdateWorkerPool): пул потоков для обработки обновлений
+    """
+
+    def __init__(self, token: str, workers_count: int, queue_size: int, **kwargs):
+        super().__init__(token, threaded=False, **kwargs)
+        self.update_pool: UpdateWorkerPool = UpdateWorkerPool(super().process_new_updates, workers_count, queue_size)
+
+    def process_new_updates(self, updates: list[Update]) -> None:
+        self.update_pool.start()
+        for update in updates:
+            # Смещение для getUpdates сдвигается сразу, не дожидаясь обработки.
+            if update.update_id > self.last_update_id:
+                self.last_update_id = update.update_id
+
+            self.update_pool.put(update)
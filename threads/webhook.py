@@ -0,0 +1,122 @@
+import hmac
+import logging
+import ssl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from telebot.types import Update
+
+import settings
+from threads.update_pool import ShardedTeleBot, UpdateWorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов Telegram с обновлениями.
+    """
+    protocol_version = 'HTTP/1.1'
+    server: 'WebhookServer'
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if urlsplit(self.path).path != self.server.path:
+            self.respond(404)
+            return
+
+        # Запросы без секрета пришли не от Telegram.
+        secret = self.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if self.server.secret and not hmac.compare_digest(secret, self.server.secret):
+            self.respond(403)
+            return
+
+        try:
+            update = Update.de_json(body.decode('utf-8'))
+        except Exception:
+            logger.exception('Не удалось разобрать обновление')
+            self.respond(400)
+            return
+
+        # Если очередь заполнена, то Telegram повторит запрос позже.
+        if not self.server.pool.put(update, timeout=1):
+            self.respond(503)
+            return
+
+        self.respond(200)
+
+    def respond(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    Сервер, который принимает обновления от Telegram и передает их пулу потоков.
+
+    Attributes:
+        path (str): путь, на который Telegram присылает обновления
+        secret (str): секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+        pool (UpdateWorkerPool): пул потоков для обработки обновлений
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], path: str, secret: str, pool: UpdateWorkerPool):
+        super().__init__(address, WebhookRequestHandler)
+        self.path: str = path
+        self.secret: str = secret
+        self.pool: UpdateWorkerPool = pool
+
+
+def run_webhook(bot: ShardedTeleBot) -> None:
+    """
+    Получение обновлений через webhook.
+
+    Регистрирует webhook в Telegram и принимает обновления, пока процесс не завершится.
+
+    :param bot: основной объект бота
+    """
+    if not settings.WEBHOOK_URL:
+        raise ValueError('Для режима webhook нужно указать WEBHOOK_URL')
+
+    pool = bot.update_pool
+    pool.start()
+
+    server = WebhookServer(
+        (settings.WEBHOOK_HOST, settings.WEBHOOK_PORT),
+        urlsplit(settings.WEBHOOK_URL).path or '/',
+        settings.WEBHOOK_SECRET,
+        pool,
+    )
+
+    certificate: Optional[Any] = None
+    if settings.WEBHOOK_SSL_CERT:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(settings.WEBHOOK_SSL_CERT, settings.WEBHOOK_SSL_KEY or None)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        certificate = open(settings.WEBHOOK_SSL_CERT, 'rb')
+
+    try:
+        bot.remove_webhook()
+        bot.set_webhook(
+            url=settings.WEBHOOK_URL,
+            certificate=certificate,
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=settings.ALLOWED_UPDATES,
+            secret_token=settings.WEBHOOK_SECRET or None,
+        )
+    finally:
+        if certificate:
+            certificate.close()
+
+    logger.info('Webhook установлен: %s', settings.WEBHOOK_URL)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()